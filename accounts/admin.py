@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from .models import CustomUser, RequestProfile
 from .forms import CustomUserCreationForm
 from django.utils.translation import gettext_lazy as _
 
@@ -48,3 +51,57 @@ class CustomUserAdmin(UserAdmin):
 
 # Register the CustomUser model with the custom admin configuration
 admin.site.register(CustomUser, CustomUserAdmin)
+
+
+# Read-only list of request profiles taken with ?_profile=1 (see accounts.profiling)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'view_name', 'status', 'duration_ms', 'samples', 'user')
+    list_filter = ('view_name', 'method')
+    search_fields = ('path', 'view_name')
+    list_select_related = ('user',)
+    readonly_fields = (
+        'created_at', 'user', 'method', 'path', 'view_name', 'status',
+        'duration_ms', 'samples', 'interval_ms', 'download', 'hottest_frames',
+    )
+    exclude = ('file',)
+
+    # Profiles are only created by the middleware and never edited
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        # Folded stacks as plain text, for flamegraph.pl or speedscope
+        return [
+            path(
+                '<path:object_id>/folded/',
+                self.admin_site.admin_view(self.folded_view),
+                name='accounts_requestprofile_folded',
+            ),
+        ] + super().get_urls()
+
+    def folded_view(self, request, object_id):
+        profile = self.get_object(request, object_id)
+        if profile is None or not self.has_view_permission(request, profile):
+            raise Http404
+        response = FileResponse(
+            profile.file.open('rb'), as_attachment=True, filename=f'profile-{profile.pk}.folded',
+        )
+        response['Content-Type'] = 'text/plain; charset=utf-8'
+        return response
+
+    @admin.display(description='Flamegraph file')
+    def download(self, obj):
+        url = reverse('admin:accounts_requestprofile_folded', args=[obj.pk])
+        return format_html('<a href="{}">Download folded stacks</a> (open in speedscope or flamegraph.pl)', url)
+
+    @admin.display(description='Hottest frames (samples)')
+    def hottest_frames(self, obj):
+        return format_html_join('', '<div>{} &mdash; {}</div>', (
+            (samples, frame) for frame, samples in obj.hottest_frames()
+        ))
+
+
+admin.site.register(RequestProfile, RequestProfileAdmin)
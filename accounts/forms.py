@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from .models import CustomUser
-import re
+from .validators import validate_mobile_no
 
 # Custom registration form based on Django's built-in UserCreationForm
 class CustomUserCreationForm(UserCreationForm):
@@ -34,8 +34,7 @@ class CustomUserCreationForm(UserCreationForm):
     def clean_mobile_no(self):
         #Validate that the mobile number is exactly 10 digits.
         mobile = self.cleaned_data.get('mobile_no')
-        if not re.fullmatch(r'\d{10}', mobile):
-            raise forms.ValidationError("Enter a valid 10-digit mobile number.")
+        validate_mobile_no(mobile)
         return mobile
 
     def save(self, commit=True):
@@ -0,0 +1,328 @@
+"""
+Per-request performance instrumentation.
+
+RequestTimingMiddleware times every request and splits the time into
+stages: SQL (db), template rendering (template), serialization of
+exports and JSON (serialize), the bitmap skill filter (skills) and the
+rest of the view's own Python code (app). Time is charged to the
+innermost running stage only, so SQL run while rendering a template counts
+as db, not template, and the stages add up to the total.
+
+Responses to staff users get a Server-Timing header (every response does
+with DEBUG or REQUEST_TIMINGS_HEADER on; stage timings are internals, not
+for anonymous clients) if the request loaded the user anyway, and a JSON log line is written to the
+accounts.instrumentation logger at INFO. Streamed bodies
+are timed while they are produced, so the log line, written when the
+stream ends, includes them; the header only covers the work done before
+the body starts. The last REQUEST_TIMINGS_WINDOW timings per URL name
+are kept in memory for the request_timings view (per process).
+
+Code that is not SQL or template rendering marks its stage with timed().
+Hooks cost a couple of perf_counter() calls, cheap enough to leave on.
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import LazyObject, empty
+
+logger = logging.getLogger(__name__)
+
+# Timings of the request being handled in the current thread or task
+_current = ContextVar('request_timings', default=None)
+
+# Stage names used in the Server-Timing header, in header order
+STAGES = ('db', 'template', 'serialize', 'skills', 'app')
+
+
+class Timings:
+    """
+    Exclusive time per stage for one request. Stages nest: entering a
+    stage pauses the one it was entered from.
+    """
+    def __init__(self):
+        self.durations = dict.fromkeys(STAGES, 0.0)
+        self.counts = {}
+        self._stack = ['app']
+        self._mark = time.perf_counter()
+
+    def enter(self, stage):
+        now = time.perf_counter()
+        self.durations[self._stack[-1]] += now - self._mark
+        self._stack.append(stage)
+        self._mark = now
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def exit(self):
+        now = time.perf_counter()
+        stage = self._stack.pop() if len(self._stack) > 1 else self._stack[0]
+        self.durations[stage] = self.durations.get(stage, 0.0) + now - self._mark
+        self._mark = now
+
+    def pause(self):
+        # Charge the running stage up to now; time until resume() is not counted
+        now = time.perf_counter()
+        self.durations[self._stack[-1]] += now - self._mark
+        self._mark = now
+
+    def resume(self):
+        self._mark = time.perf_counter()
+
+    @property
+    def total(self):
+        return sum(self.durations.values())
+
+    def as_dict(self):
+        # Milliseconds per stage plus the total and number of SQL queries
+        result = {f'{stage}_ms': round(duration * 1000, 3) for stage, duration in self.durations.items()}
+        result['total_ms'] = round(self.total * 1000, 3)
+        result['db_queries'] = self.counts.get('db', 0)
+        return result
+
+    def server_timing(self):
+        parts = [
+            f'{stage};dur={duration * 1000:.1f}'
+            for stage, duration in self.durations.items() if duration
+        ]
+        if self.counts.get('db'):
+            parts[0:0] = [f'db-queries;desc="{self.counts["db"]} queries"']
+        parts.append(f'total;dur={self.total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def current_timings():
+    return _current.get()
+
+
+@contextmanager
+def timed(stage):
+    """
+    Charge the time spent inside the block to stage, in the current
+    request's timings. Does nothing outside an instrumented request.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    timings.enter(stage)
+    try:
+        yield
+    finally:
+        timings.exit()
+
+
+def _time_query(execute, sql, params, many, context):
+    # Database execute wrapper charging every query to the db stage
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    timings.enter('db')
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.exit()
+
+
+def _install_query_timer():
+    # Connections are per thread; make sure this thread's ones are timed.
+    # Innermost, since connection.execute_wrapper() blocks pop the last wrapper
+    for connection in connections.all():
+        if _time_query not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, _time_query)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed('template'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Django template backend charging template rendering to the template
+    stage. Used as the TEMPLATES backend in place of DjangoTemplates.
+    """
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def _percentile(ordered, pct):
+    # Nearest-rank percentile of a sorted, non-empty list
+    return ordered[max(0, -(-pct * len(ordered) // 100) - 1)]
+
+
+class TimingStats:
+    """
+    The most recent request timings per URL name, for percentiles.
+    """
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, sample):
+        samples = self._samples.get(name)
+        if samples is None:
+            with self._lock:
+                window = getattr(settings, 'REQUEST_TIMINGS_WINDOW', 1000)
+                samples = self._samples.setdefault(name, deque(maxlen=window))
+        samples.append(sample)
+
+    def clear(self):
+        with self._lock:
+            self._samples = {}
+
+    def summary(self):
+        """
+        Return {URL name: {'count': n, 'total_ms': {p50, p95, p99}, ...}}
+        with the same percentiles for each stage.
+        """
+        result = {}
+        for name, samples in list(self._samples.items()):
+            samples = list(samples)
+            entry = {'count': len(samples)}
+            for key in ('total_ms',) + tuple(f'{stage}_ms' for stage in STAGES):
+                ordered = sorted(sample[key] for sample in samples)
+                entry[key] = {f'p{pct}': _percentile(ordered, pct) for pct in (50, 95, 99)}
+            result[name] = entry
+        return result
+
+
+# Timings of the requests handled by this process
+timing_stats = TimingStats()
+
+
+class RequestTimingMiddleware:
+    """
+    Times each request by stage (see the module docstring). Goes first in
+    MIDDLEWARE so the other middleware is timed too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        _install_query_timer()
+        timings = Timings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            timings.pause()
+            _current.reset(token)
+        return self.finish(request, response, timings, self.show_header(request))
+
+    async def __acall__(self, request):
+        # Async views run their queries through sync_to_async, in the request's
+        # sync thread, which sees the timings through the copied context
+        await sync_to_async(_install_query_timer)()
+        timings = Timings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            timings.pause()
+            _current.reset(token)
+        return self.finish(request, response, timings, self.show_header(request))
+
+    def show_header(self, request):
+        if getattr(settings, 'REQUEST_TIMINGS_HEADER', False) or settings.DEBUG:
+            return True
+        # Only a user the request already loaded: resolving request.user here
+        # would load the session and user of every anonymous or API request
+        user = getattr(request, 'user', None)
+        if isinstance(user, LazyObject) and user._wrapped is empty:
+            # Async views load the user through request.auser() instead
+            user = getattr(request, '_acached_user', None)
+        return user is not None and user.is_staff
+
+    def finish(self, request, response, timings, show_header):
+        if show_header:
+            response['Server-Timing'] = timings.server_timing()
+            # The header depends on who is logged in
+            patch_vary_headers(response, ('Cookie',))
+
+        if not response.streaming:
+            self.record(request, response, timings)
+        elif response.is_async:
+            response.streaming_content = self._atimed_stream(response.streaming_content, request, response, timings)
+        else:
+            response.streaming_content = self._timed_stream(response.streaming_content, request, response, timings)
+        return response
+
+    def _timed_stream(self, content, request, response, timings):
+        # Producing each chunk counts as serialization; sending it does not
+        iterator = iter(content)
+        try:
+            while True:
+                token = _current.set(timings)
+                timings.resume()
+                timings.enter('serialize')
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    timings.exit()
+                    timings.pause()
+                    _current.reset(token)
+                yield chunk
+        finally:
+            self.record(request, response, timings)
+
+    async def _atimed_stream(self, content, request, response, timings):
+        iterator = aiter(content)
+        try:
+            while True:
+                token = _current.set(timings)
+                timings.resume()
+                timings.enter('serialize')
+                try:
+                    chunk = await anext(iterator)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    timings.exit()
+                    timings.pause()
+                    _current.reset(token)
+                yield chunk
+        finally:
+            self.record(request, response, timings)
+
+    def record(self, request, response, timings):
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match else '<unresolved>'
+        sample = timings.as_dict()
+        timing_stats.add(name, sample)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'view': name,
+                'status': response.status_code,
+                **sample,
+            }))
@@ -1,7 +1,12 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .profiling import get_profile_storage
+from .tracking import DirtyFieldsMixin
+
 # Custom manager for handling user creation with email instead of username
 class CustomUserManager(BaseUserManager):
     def _create_user(self, email, password, **extra_fields):
@@ -46,7 +51,7 @@ class CustomUserManager(BaseUserManager):
 
 
 # Custom user model extending AbstractUser
-class CustomUser(AbstractUser):
+class CustomUser(DirtyFieldsMixin, AbstractUser):
     # Override username field to make it optional and not unique
     username = models.CharField(
         _("username"),
@@ -80,4 +85,40 @@ class CustomUser(AbstractUser):
     objects = CustomUserManager()
 
     def __str__(self):
-        return self.email  
\ No newline at end of file
+        return self.email  
+
+
+class RequestProfile(models.Model):
+    """
+    Sampled stacks of one request profiled by a staff user (see accounts.profiling).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    samples = models.PositiveIntegerField()
+    interval_ms = models.FloatField()
+    # Folded stacks, one "frame;frame;frame count" line per distinct stack
+    file = models.FileField(storage=get_profile_storage)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f}ms)"
+
+    def hottest_frames(self, top=15):
+        """
+        Return [(frame, samples)] for the frames most often at the top
+        of the stack, i.e. where the request spent its time.
+        """
+        counts = {}
+        with self.file.open('rb') as fileobj:
+            for line in fileobj.read().decode('utf-8').splitlines():
+                stack, _, count = line.rpartition(' ')
+                leaf = stack.rsplit(';', 1)[-1]
+                counts[leaf] = counts.get(leaf, 0) + int(count)
+        return sorted(counts.items(), key=lambda item: -item[1])[:top]
@@ -0,0 +1,223 @@
+"""
+On-demand sampling profiler for single requests.
+
+A staff user adds ?_profile=1 to a URL to profile that one request. While
+the request is handled (including a streamed body), a background thread
+samples the request thread's stack every REQUEST_PROFILE_INTERVAL seconds.
+The samples are saved as a RequestProfile with a folded-stack file
+("frame;frame;frame count" per line), the input format of flamegraph.pl,
+speedscope and similar tools. Profiles are listed on a read-only admin
+page, outside MEDIA_ROOT so only staff can download them.
+
+Requests without the flag only pay a substring check of the query string.
+Async requests are sampled on the event loop thread, where the async view's
+own code runs; its ORM calls show up as waits for sync_to_async.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+
+# Query string parameter that turns on profiling for a request
+PROFILE_PARAM = '_profile'
+
+
+def get_interval():
+    # Seconds between two stack samples
+    return getattr(settings, 'REQUEST_PROFILE_INTERVAL', 0.005)
+
+
+def get_keep():
+    # Number of most recent profiles kept; older ones are deleted with their files
+    return getattr(settings, 'REQUEST_PROFILE_KEEP', 200)
+
+
+def get_profile_dir():
+    # Kept outside MEDIA_ROOT so profiles are never served to the public
+    return getattr(settings, 'REQUEST_PROFILE_DIR', None) or os.path.join(
+        tempfile.gettempdir(), 'career-portal-profiles'
+    )
+
+
+def get_profile_storage():
+    # Used as a callable so migrations do not serialize the storage location
+    return FileSystemStorage(location=get_profile_dir())
+
+
+def _frame_label(code):
+    # "function (path:line)", with paths relative to the project or site-packages
+    filename = code.co_filename
+    base = str(settings.BASE_DIR) + os.sep
+    if filename.startswith(base):
+        filename = filename[len(base):]
+    elif 'site-packages' + os.sep in filename:
+        filename = filename.split('site-packages' + os.sep, 1)[1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+
+
+def fold_stack(frame):
+    # The stack of frame as one folded line, outermost frame first
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread from a background thread until
+    stopped, counting identical folded stacks.
+    """
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[fold_stack(frame)] += 1
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def folded(self):
+        # Folded-stack file contents, most sampled stacks first
+        return ''.join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+def save_profile(request, response, sampler):
+    """
+    Store the sampler's stacks as a RequestProfile and prune old ones.
+    Returns the new profile.
+    """
+    from .models import RequestProfile
+
+    match = getattr(request, 'resolver_match', None)
+    profile = RequestProfile(
+        user=request.user if request.user.is_authenticated else None,
+        method=request.method,
+        path=request.get_full_path()[:500],
+        view_name=match.view_name if match else '',
+        status=response.status_code,
+        duration_ms=round(sampler.duration * 1000, 3),
+        samples=sum(sampler.counts.values()),
+        interval_ms=sampler.interval * 1000,
+    )
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{profile.view_name.replace(':', '-') or 'request'}.folded"
+    profile.file.save(name, ContentFile(sampler.folded().encode('utf-8')), save=False)
+    profile.save()
+
+    for old in RequestProfile.objects.order_by('-created_at', '-id')[get_keep():]:
+        old.file.delete(save=False)
+        old.delete()
+    return profile
+
+
+class RequestProfilerMiddleware:
+    """
+    Profiles requests from staff users carrying ?_profile=1. Goes after
+    AuthenticationMiddleware, which it needs to tell staff users apart.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        # Cheap check first, so normal traffic does not parse the query string
+        if PROFILE_PARAM not in request.META.get('QUERY_STRING', '') or not self.wants_profile(request):
+            return self.get_response(request)
+
+        # Saving the profile adds queries of its own; see QueryBudgetMiddleware
+        request.profiled = True
+        sampler = StackSampler(threading.get_ident(), get_interval())
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            sampler.stop()
+            raise
+
+        def finish():
+            sampler.stop()
+            profile = save_profile(request, response, sampler)
+            return reverse('admin:accounts_requestprofile_change', args=[profile.pk])
+
+        # A streamed body is profiled until it has been produced
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._profiled_stream(response.streaming_content, finish)
+        else:
+            response['X-Request-Profile'] = finish()
+        return response
+
+    async def __acall__(self, request):
+        if PROFILE_PARAM not in request.META.get('QUERY_STRING', '') or not await self.awants_profile(request):
+            return await self.get_response(request)
+
+        request.profiled = True
+        sampler = StackSampler(threading.get_ident(), get_interval())
+        sampler.start()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            sampler.stop()
+            raise
+
+        def finish():
+            sampler.stop()
+            profile = save_profile(request, response, sampler)
+            return reverse('admin:accounts_requestprofile_change', args=[profile.pk])
+
+        if not response.streaming:
+            response['X-Request-Profile'] = await sync_to_async(finish)()
+        elif response.is_async:
+            response.streaming_content = self._aprofiled_stream(response.streaming_content, sync_to_async(finish))
+        else:
+            response.streaming_content = self._profiled_stream(response.streaming_content, finish)
+        return response
+
+    def wants_profile(self, request):
+        user = getattr(request, 'user', None)
+        return request.GET.get(PROFILE_PARAM) == '1' and user is not None and user.is_staff
+
+    async def awants_profile(self, request):
+        auser = getattr(request, 'auser', None)
+        return request.GET.get(PROFILE_PARAM) == '1' and auser is not None and (await auser()).is_staff
+
+    def _profiled_stream(self, content, finish):
+        try:
+            yield from content
+        finally:
+            finish()
+
+    async def _aprofiled_stream(self, content, finish):
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            await finish()
@@ -0,0 +1,277 @@
+"""
+Per-view query budgets: the most SQL queries, and the most total SQL time,
+a request to a view may take.
+
+Views declare their budget with the query_budget decorator; views we do
+not own (the admin) get theirs from the QUERY_BUDGETS setting, keyed by
+URL name. Tests check views against their budgets with
+QueryBudgetTestMixin, and in development QueryBudgetMiddleware checks
+every request, logging or raising (QUERY_BUDGET_ACTION) when a budget is
+exceeded, with the stack trace of the offending query.
+"""
+import logging
+import sys
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudget:
+    def __init__(self, max_queries=None, max_time_ms=None):
+        self.max_queries = max_queries
+        self.max_time_ms = max_time_ms
+
+    def __repr__(self):
+        return f"QueryBudget(max_queries={self.max_queries}, max_time_ms={self.max_time_ms})"
+
+    def check(self, queries):
+        """
+        Return a report of how the recorded queries exceed the budget,
+        or None when they stay within it.
+        """
+        problems = []
+        offending = None
+        if self.max_queries is not None and len(queries) > self.max_queries:
+            problems.append(f"{len(queries)} queries, budget is {self.max_queries}")
+            # The first query over the budget
+            offending = queries[self.max_queries]
+
+        total_ms = sum(query.duration for query in queries) * 1000
+        if self.max_time_ms is not None and total_ms > self.max_time_ms:
+            problems.append(f"{total_ms:.1f}ms of SQL, budget is {self.max_time_ms}ms")
+            offending = offending or max(queries, key=lambda query: query.duration)
+
+        if not problems:
+            return None
+        return '\n'.join([
+            f"Query budget exceeded: {'; '.join(problems)}.",
+            *describe_repeated(queries),
+            f"Offending query: {offending.sql}",
+            ''.join(offending.format_stack()).rstrip(),
+        ])
+
+
+def query_budget(max_queries=None, max_time_ms=None):
+    """
+    Declare the query budget of a view. The budget is only read by the
+    test helper and the development middleware; the view itself is
+    returned unchanged, and decorators using functools.wraps carry it over.
+    """
+    def decorator(view):
+        view.query_budget = QueryBudget(max_queries, max_time_ms)
+        return view
+    return decorator
+
+
+def get_view_budget(resolver_match):
+    # A decorated view's own budget, else one from the QUERY_BUDGETS setting
+    if resolver_match is None:
+        return None
+    budget = getattr(resolver_match.func, 'query_budget', None)
+    if budget is None:
+        declared = getattr(settings, 'QUERY_BUDGETS', {}).get(resolver_match.view_name)
+        budget = QueryBudget(**declared) if declared else None
+    return budget
+
+
+class RecordedQuery:
+    def __init__(self, sql, duration, stack):
+        self.sql = sql
+        self.duration = duration
+        # (code, line number) pairs, innermost first; formatted only when reported
+        self.stack = stack
+
+    def format_stack(self):
+        """
+        Return the stack that ran the query as formatted lines, keeping
+        the frames from this project's code, where a fix would go.
+        """
+        base = str(settings.BASE_DIR)
+        frames = [
+            traceback.FrameSummary(code.co_filename, lineno, code.co_name)
+            for code, lineno in reversed(self.stack)
+        ]
+        project = [
+            frame for frame in frames
+            if frame.filename.startswith(base) and 'site-packages' not in frame.filename
+        ]
+        return traceback.StackSummary.from_list(project or frames[-5:]).format()
+
+
+def _capture_stack():
+    # Cheaper than traceback.extract_stack(): no source lines are read here
+    frame = sys._getframe(2)
+    stack = []
+    while frame is not None:
+        if frame.f_code.co_filename != __file__:
+            stack.append((frame.f_code, frame.f_lineno))
+        frame = frame.f_back
+    return stack
+
+
+def describe_repeated(queries, limit=3):
+    # SQL run more than once with different parameters usually means an N+1
+    counts = Counter(query.sql for query in queries)
+    return [
+        f"Repeated {count}x: {sql}"
+        for sql, count in counts.most_common(limit) if count > 1
+    ]
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper recording every query with its duration and
+    the stack that ran it.
+    """
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries.append(RecordedQuery(sql, duration, _capture_stack()))
+
+
+@contextmanager
+def record_queries(using=connection):
+    """
+    Record the queries run on the connection inside the block.
+    Yields the list of RecordedQuery, filled in as queries run.
+    """
+    recorder = QueryRecorder()
+    with using.execute_wrapper(recorder):
+        yield recorder.queries
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin checking requests against their view's query budget.
+    """
+    def assertWithinQueryBudget(self, method, path, data=None, budget=None, **extra):
+        """
+        Make a request with the test client and fail if it takes more
+        queries or SQL time than its view's budget (or budget, if given).
+        Streaming responses are read to the end. Returns the response.
+        """
+        with record_queries() as queries:
+            response = getattr(self.client, method)(path, data, **extra)
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+        budget = budget or get_view_budget(response.resolver_match)
+        if budget is None:
+            self.fail(f"No query budget declared for {path}")
+        report = budget.check(queries)
+        if report:
+            self.fail(f"{method.upper()} {path}: {report}")
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Development middleware checking each request against its view's
+    query budget. QUERY_BUDGET_ACTION is 'log' (the default) or 'raise'.
+    Goes first in MIDDLEWARE so queries made by other middleware count too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        recorder = QueryRecorder()
+        connection.execute_wrappers.append(recorder)
+
+        def finish():
+            connection.execute_wrappers.remove(recorder)
+            self.check(request, recorder.queries)
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            connection.execute_wrappers.remove(recorder)
+            raise
+
+        # Streamed bodies run their queries while the response is sent
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._watch(response.streaming_content, finish)
+        else:
+            finish()
+        return response
+
+    async def __acall__(self, request):
+        # Async views run their queries through sync_to_async, in the
+        # request's sync thread, so the recorder goes on that thread's connection
+        recorder = QueryRecorder()
+
+        def install():
+            connection.execute_wrappers.append(recorder)
+
+        def uninstall():
+            connection.execute_wrappers.remove(recorder)
+
+        def finish():
+            uninstall()
+            self.check(request, recorder.queries)
+
+        await sync_to_async(install)()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            await sync_to_async(uninstall)()
+            raise
+
+        if not response.streaming:
+            await sync_to_async(finish)()
+        elif response.is_async:
+            response.streaming_content = self._awatch(response.streaming_content, sync_to_async(finish))
+        else:
+            # Synchronous iterators are read in the same sync thread
+            response.streaming_content = self._watch(response.streaming_content, finish)
+        return response
+
+    def _watch(self, content, finish):
+        try:
+            yield from content
+        finally:
+            finish()
+
+    async def _awatch(self, content, finish):
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            await finish()
+
+    def check(self, request, queries):
+        # Profiled requests (accounts.profiling) also run the profiler's own queries
+        if getattr(request, 'profiled', False):
+            return
+        budget = get_view_budget(getattr(request, 'resolver_match', None))
+        report = budget.check(queries) if budget else None
+        if report is None:
+            return
+        message = f"{request.method} {request.path}: {report}"
+        if getattr(settings, 'QUERY_BUDGET_ACTION', 'log') == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -1,3 +1,236 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.client import AsyncClientHandler
+from django.utils.functional import SimpleLazyObject
+
+from .models import CustomUser, RequestProfile
+from .instrumentation import RequestTimingMiddleware, Timings, timed, timing_stats
+from .query_budget import QueryBudgetTestMixin
+
+
+class DirtyFieldsTests(TestCase):
+    def setUp(self):
+        CustomUser.objects.create_user(
+            email='alice@example.com', password='pass12345', name='Alice',
+            mobile_no='9876543210', work_status='fresher',
+        )
+        self.user = CustomUser.objects.get(email='alice@example.com')
+
+    def test_new_instances_are_not_tracked(self):
+        self.assertIsNone(CustomUser(email='bob@example.com').get_dirty_fields())
+
+    def test_reports_changed_fields_only(self):
+        self.user.name = 'Alice'
+        self.assertEqual(self.user.get_dirty_fields(), [])
+
+        self.user.name = 'Alice Smith'
+        self.user.mobile_no = '9123456780'
+        self.assertEqual(self.user.get_dirty_fields(), ['name', 'mobile_no'])
+
+    def test_loaded_values_are_only_read_when_needed(self):
+        self.assertNotIn('_loaded_values', self.user.__dict__)
+        self.assertEqual(self.user.get_loaded_value('name'), 'Alice')
+        self.assertIn('_loaded_values', self.user.__dict__)
+
+    def test_save_dirty_skips_unchanged_instances(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.user.save_dirty(), [])
+
+    def test_save_dirty_resets_the_baseline(self):
+        self.user.name = 'Alice Smith'
+        with self.assertNumQueries(1):
+            self.assertEqual(self.user.save_dirty(), ['name'])
+        self.assertEqual(self.user.get_dirty_fields(), [])
+        self.assertEqual(CustomUser.objects.get(pk=self.user.pk).name, 'Alice Smith')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AccountQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    def test_login_stays_within_budget(self):
+        CustomUser.objects.create_user(
+            email='alice@example.com', password='pass12345', name='Alice',
+            mobile_no='9876543210', work_status='fresher',
+        )
+        self.assertWithinQueryBudget('get', '/login/')
+        response = self.assertWithinQueryBudget('post', '/login/', {
+            'email': 'alice@example.com', 'password': 'pass12345',
+        })
+        self.assertEqual(response.status_code, 302)
+
+    def test_register_stays_within_budget(self):
+        self.assertWithinQueryBudget('get', '/register/')
+        response = self.assertWithinQueryBudget('post', '/register/', {
+            'name': 'Bob', 'mobile_no': '9876543210', 'email': 'bob@example.com',
+            'work_status': 'fresher', 'password1': 'S3cure-pass!', 'password2': 'S3cure-pass!',
+        })
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        timing_stats.clear()
+        self.user = CustomUser.objects.create_user(
+            email='alice@example.com', password='pass12345', name='Alice',
+            mobile_no='9876543210', work_status='fresher',
+        )
+
+    def test_nested_stages_are_charged_exclusively(self):
+        timings = Timings()
+        timings.enter('template')
+        timings.enter('db')
+        timings.exit()
+        timings.exit()
+        timings.pause()
+
+        self.assertEqual(timings.counts, {'template': 1, 'db': 1})
+        self.assertAlmostEqual(sum(timings.durations.values()), timings.total)
+        # Outside a request, timed() is a no-op
+        with timed('serialize'):
+            pass
+
+    def test_server_timing_is_only_shown_to_staff(self):
+        self.assertNotIn('Server-Timing', self.client.get('/register/'))
+        self.client.force_login(self.user)
+        self.assertNotIn('Server-Timing', self.client.get('/perf/timings/'))
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/perf/timings/')
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_server_timing_does_not_load_the_user(self):
+        request = RequestFactory().get('/api/profiles/')
+        request.user = SimpleLazyObject(mock.Mock(side_effect=AssertionError('user loaded')))
+        response = RequestTimingMiddleware(lambda request: HttpResponse())(request)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_TIMINGS_HEADER=True)
+    def test_responses_carry_server_timing_and_log_line(self):
+        with self.assertLogs('accounts.instrumentation', 'INFO') as logs:
+            response = self.client.post('/login/', {'email': 'alice@example.com', 'password': 'wrong'})
+
+        self.assertRegex(response['Server-Timing'], r'db-queries;desc="\d+ queries", db;dur=[\d.]+')
+        self.assertIn('template;dur=', response['Server-Timing'])
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((record['view'], record['method'], record['status']), ('login', 'POST', 200))
+        self.assertGreater(record['db_queries'], 0)
+        self.assertAlmostEqual(
+            record['total_ms'],
+            sum(record[key] for key in ('db_ms', 'template_ms', 'serialize_ms', 'skills_ms', 'app_ms')),
+            places=1,
+        )
+
+    async def test_async_views_are_timed_until_the_stream_ends(self):
+        await CustomUser.objects.filter(pk=self.user.pk).aupdate(is_staff=True)
+        await self.async_client.aforce_login(self.user)
+        with self.assertLogs('accounts.instrumentation', 'INFO') as logs:
+            response = await self.async_client.get('/export-profiles/async-csv/')
+            self.assertEqual(logs.records, [])
+            content = b''.join([chunk async for chunk in response.streaming_content])
+
+        self.assertTrue(content.startswith(b'Name,'))
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'async_export_csv')
+        self.assertGreater(record['db_queries'], 0)
+        self.assertGreater(record['serialize_ms'], 0)
+        self.assertIn('Server-Timing', response)
+
+    def test_staff_get_percentiles_per_url_name(self):
+        for _ in range(5):
+            self.client.get('/register/')
+        self.assertEqual(self.client.get('/perf/timings/').status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        timings = self.client.get('/perf/timings/').json()['views']['register']
+
+        self.assertEqual(timings['count'], 5)
+        self.assertLessEqual(timings['total_ms']['p50'], timings['total_ms']['p99'])
+        self.assertEqual(set(timings['template_ms']), {'p50', 'p95', 'p99'})
+
+
+def _slow_render(request, template_name, context=None):
+    # Keeps the view busy long enough for the sampler to catch it
+    time.sleep(0.05)
+    return HttpResponse('slow')
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    REQUEST_PROFILE_INTERVAL=0.001,
+)
+class RequestProfilerTests(TestCase):
+    def setUp(self):
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir, ignore_errors=True)
+        settings_override = override_settings(REQUEST_PROFILE_DIR=profile_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.staff = CustomUser.objects.create_superuser(
+            email='admin@example.com', password='pass12345', name='Admin',
+            mobile_no='9876543210', work_status='experienced',
+        )
+        self.candidate = CustomUser.objects.create_user(
+            email='bob@example.com', password='pass12345', name='Bob',
+            mobile_no='9876543211', work_status='fresher',
+        )
+
+    @mock.patch('accounts.views.render', _slow_render)
+    def test_staff_request_is_profiled_as_folded_stacks(self):
+        self.client.force_login(self.staff)
+        response = self.client.get('/register/?_profile=1')
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual(response['X-Request-Profile'], f'/admin/accounts/requestprofile/{profile.pk}/change/')
+        self.assertEqual((profile.view_name, profile.status, profile.user), ('register', 200, self.staff))
+        self.assertGreater(profile.samples, 0)
+
+        folded = self.client.get(f'/admin/accounts/requestprofile/{profile.pk}/folded/')
+        content = b''.join(folded.streaming_content).decode()
+        stack, _, count = content.splitlines()[0].rpartition(' ')
+        self.assertIn('register (accounts/views.py:', stack)
+        self.assertIn(';', stack)
+        self.assertGreater(int(count), 0)
+        self.assertEqual(self.client.get(f'/admin/accounts/requestprofile/{profile.pk}/change/').status_code, 200)
+
+    def test_flag_is_ignored_for_other_users(self):
+        self.client.get('/register/?_profile=1')
+        self.client.force_login(self.candidate)
+        response = self.client.get('/register/?_profile=1')
+
+        self.assertNotIn('X-Request-Profile', response)
+        self.assertFalse(RequestProfile.objects.exists())
+        # Nor can they download profiles
+        self.assertEqual(self.client.get('/admin/accounts/requestprofile/1/folded/').status_code, 302)
+
+    async def test_async_requests_are_profiled(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get('/export-profiles/async-csv/?_profile=1')
+        b''.join([chunk async for chunk in response.streaming_content])
+
+        profile = await RequestProfile.objects.aget()
+        self.assertEqual((profile.view_name, profile.status), ('async_export_csv', 200))
+        self.assertGreater(profile.samples, 0)
+
+    @override_settings(DEBUG=True)
+    def test_middleware_keeps_async_views_async(self):
+        # Django logs every sync-only middleware it adapts when DEBUG is on
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            AsyncClientHandler().load_middleware(is_async=True)
+
+    @override_settings(REQUEST_PROFILE_KEEP=2)
+    def test_old_profiles_are_pruned(self):
+        self.client.force_login(self.staff)
+        for _ in range(3):
+            self.client.get('/register/?_profile=1')
+        self.assertEqual(RequestProfile.objects.count(), 2)
@@ -0,0 +1,125 @@
+"""
+Dirty-field tracking for models.
+
+Instances loaded from the database remember the values they were loaded
+with, so save_dirty() can write only the columns that actually changed,
+or skip the UPDATE entirely when nothing did.
+
+Remembering costs a reference to the loaded row; the values are only
+looked at when the instance is saved or asked what changed, so instances
+that are just read (exports, listings) pay nothing. Values are not copied:
+assign a new list or dict to a JSON field rather than changing it in place.
+"""
+from django.db.models.fields.files import FieldFile
+
+
+class DirtyFieldsMixin:
+    """
+    Mix into a model to get get_dirty_fields() and save_dirty().
+    Uses the from_db() hook, so only instances read from the database are
+    tracked; new instances are always saved in full.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # field_names are attnames; deferred fields are left out and never reported
+        instance._loaded_row = (field_names, values)
+        return instance
+
+    def _get_loaded_values(self):
+        # {attname: value} as loaded or last saved; built from the row on first use
+        loaded = self.__dict__.get('_loaded_values')
+        if loaded is None:
+            row = self.__dict__.pop('_loaded_row', None)
+            if row is None:
+                return None
+            loaded = self._loaded_values = dict(zip(*row))
+        return loaded
+
+    def _tracked_value(self, field):
+        value = self.__dict__.get(field.attname)
+        # Files compare by stored name; a freshly uploaded file is always a change
+        if isinstance(value, FieldFile):
+            if not value._committed:
+                return object()
+            value = value.name
+        if field.get_internal_type() in ('FileField', 'ImageField'):
+            value = value or None
+        return value
+
+    def get_dirty_fields(self):
+        """
+        Return the names of the concrete fields changed since the instance
+        was loaded or last saved, or None for instances that are not tracked.
+        """
+        loaded = self._get_loaded_values()
+        if self._state.adding or loaded is None:
+            return None
+
+        dirty = []
+        for field in self._meta.concrete_fields:
+            if field.attname not in loaded:
+                continue
+            old = loaded[field.attname]
+            if field.get_internal_type() in ('FileField', 'ImageField'):
+                old = old or None
+            if self._tracked_value(field) != old:
+                dirty.append(field.name)
+        return dirty
+
+    def get_loaded_value(self, name):
+        """
+        Return the value a field had when the instance was loaded or last
+        saved (None for untracked instances or fields).
+        """
+        loaded = self._get_loaded_values() or {}
+        return loaded.get(self._meta.get_field(name).attname)
+
+    def save_dirty(self, **kwargs):
+        """
+        Save only the changed fields (plus any auto_now fields). Untracked
+        instances get a full save. Returns the list of fields written, or
+        None after a full save.
+        """
+        dirty = self.get_dirty_fields()
+        if dirty is None:
+            self.save(**kwargs)
+            return None
+        if not dirty:
+            return []
+
+        # auto_now fields are only stamped when listed in update_fields
+        dirty += [
+            field.name for field in self._meta.concrete_fields
+            if getattr(field, 'auto_now', False) and field.name not in dirty
+        ]
+        self.save(update_fields=dirty, **kwargs)
+        return dirty
+
+    def mark_clean(self, *fields):
+        """
+        Treat the current values of the given fields as saved, for fields
+        written to the database behind the instance's back (e.g. with update()).
+        """
+        loaded = self._get_loaded_values()
+        if loaded is not None:
+            for name in fields:
+                attname = self._meta.get_field(name).attname
+                loaded[attname] = self.__dict__.get(attname)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        # What was just written is the new baseline
+        loaded = self._get_loaded_values()
+        if loaded is not None:
+            update_fields = kwargs.get('update_fields')
+            for field in self._meta.concrete_fields:
+                if update_fields is None or field.name in update_fields:
+                    value = self.__dict__.get(field.attname)
+                    if isinstance(value, FieldFile):
+                        value = value.name
+                    loaded[field.attname] = value
+
+    save.alters_data = True
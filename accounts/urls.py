@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import register, login_view, home_view
+from .views import register, login_view, home_view, request_timings
 from django.contrib.auth.views import LogoutView
 from django.contrib.auth import views as auth_views
 
@@ -8,6 +8,7 @@ urlpatterns = [
     path('login/', login_view, name='login'),
     path('logout/', LogoutView.as_view(next_page='login'), name='logout'),
     path('home/', home_view, name='home'),
+    path('perf/timings/', request_timings, name='request_timings'),
     path('password-reset/', auth_views.PasswordResetView.as_view(template_name='accounts/password_reset_form.html'), name='password_reset'),
     path('password-reset/done/', auth_views.PasswordResetDoneView.as_view(template_name='accounts/password_reset_done.html'), name='password_reset_done'),
     path('reset/<uidb64>/<token>/', auth_views.PasswordResetConfirmView.as_view(template_name='accounts/password_reset_confirm.html'), name='password_reset_confirm'),
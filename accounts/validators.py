@@ -0,0 +1,12 @@
+import re
+
+from django.core.exceptions import ValidationError
+
+# Mobile numbers are stored as exactly ten digits
+MOBILE_NO_PATTERN = re.compile(r'\d{10}')
+
+
+def validate_mobile_no(value):
+    # Shared by the registration form and the candidate import
+    if not isinstance(value, str) or not MOBILE_NO_PATTERN.fullmatch(value):
+        raise ValidationError("Enter a valid 10-digit mobile number.")
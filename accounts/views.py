@@ -1,9 +1,14 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from .forms import CustomUserCreationForm, CustomLoginForm
+from .instrumentation import timing_stats
+from .query_budget import query_budget
 
 # Handles user registration
+@query_budget(max_queries=4, max_time_ms=50)
 def register(request):
     if request.method == 'POST':
         # Bind submitted POST data to the registration form
@@ -22,6 +27,7 @@ def register(request):
 
 
 # Handles user login
+@query_budget(max_queries=12, max_time_ms=50)
 def login_view(request):
     # Redirect authenticated users directly to home
     if request.user.is_authenticated:
@@ -55,3 +61,10 @@ def login_view(request):
 # Renders the home page (accessible after login)
 def home_view(request):
     return render(request, 'accounts/home.html', {'user': request.user})
+
+
+# Admin-only JSON with p50/p95/p99 request timings per URL name, as recorded
+# by RequestTimingMiddleware in the process serving this request
+@staff_member_required
+def request_timings(request):
+    return JsonResponse({'views': timing_stats.summary()})
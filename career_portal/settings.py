@@ -42,11 +42,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Per-stage request timings (see accounts.instrumentation); first so everything below is timed
+    'accounts.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Staff-only ?_profile=1 sampling profiler (see accounts.profiling); needs request.user
+    'accounts.profiling.RequestProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -55,7 +59,8 @@ ROOT_URLCONF = 'career_portal.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that also times rendering for RequestTimingMiddleware
+        'BACKEND': 'accounts.instrumentation.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -143,4 +148,51 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 import os
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Cache used for derived data such as the skill vocabulary.
+# Switch to a shared backend (Redis, Memcached) when running several processes
+# so invalidations are seen by all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Export page results per filter set: entries expire after TIMEOUT seconds
+    # and the least recently used ones are evicted beyond MAX_ENTRIES
+    'profile_results': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'profile-results',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 500,
+        },
+    },
+}
+
+PROFILE_RESULT_CACHE = 'profile_results'
+
+# Request timings kept per URL name for the request_timings view, and whether
+# every response carries a Server-Timing header; when off, only responses to
+# staff users do (and all of them with DEBUG on). Per-request JSON log lines go
+# to the accounts.instrumentation logger at INFO; route it to a handler to collect them.
+REQUEST_TIMINGS_WINDOW = 1000
+REQUEST_TIMINGS_HEADER = False
+
+# Profiles of staff requests made with ?_profile=1: seconds between stack
+# samples, how many profiles to keep, and where their files go (outside
+# MEDIA_ROOT; None means a directory under the system temp dir).
+REQUEST_PROFILE_INTERVAL = 0.005
+REQUEST_PROFILE_KEEP = 200
+REQUEST_PROFILE_DIR = None
+
+# Query budgets (see accounts.query_budget). Views declare theirs with the
+# query_budget decorator; these are for views we do not own, by URL name.
+QUERY_BUDGETS = {
+    'admin:profiles_userprofile_changelist': {'max_queries': 10, 'max_time_ms': 200},
+}
+# What the development middleware does when a request exceeds its budget: 'log' or 'raise'
+QUERY_BUDGET_ACTION = 'log'
+
+if DEBUG:
+    # First, so queries made by the other middleware count too
+    MIDDLEWARE.insert(0, 'accounts.query_budget.QueryBudgetMiddleware')
@@ -1,6 +1,7 @@
+from django.conf import settings
 from django.contrib import admin
-from django.db.models import Q
-from .models import UserProfile 
+from .models import ExportJob, UserProfile 
+from .skills import skill_vocabulary
 
 # Custom admin filter to filter users by individual skills stored in JSONField
 class SkillsFilter(admin.SimpleListFilter):
@@ -9,30 +10,24 @@ class SkillsFilter(admin.SimpleListFilter):
 
     def lookups(self, request, model_admin):
         """
-        Returns a list of skill choices for the filter.
-        Extracts unique skills from all UserProfile entries.
+        Returns a list of skill choices for the filter, with profile counts.
+        Read from the cached skill vocabulary instead of scanning profiles;
+        PROFILE_SKILLS_FILTER_TOP_N limits the sidebar to the most common skills.
         """
-        all_skills = set()
-        for profile in UserProfile.objects.exclude(skills__isnull=True):
-            if profile.skills and isinstance(profile.skills, list):
-                for skill in profile.skills:
-                    all_skills.add(skill.lower())  # Normalize to lowercase for consistency
-        return [(skill, skill.capitalize()) for skill in sorted(list(all_skills))]
+        top = getattr(settings, 'PROFILE_SKILLS_FILTER_TOP_N', None)
+        return [
+            (skill, f"{skill.capitalize()} ({count})")
+            for skill, count in skill_vocabulary(top=top)
+        ]
 
     def queryset(self, request, queryset):
         """
         Filters the queryset based on the selected skill.
-        Uses multiple Q objects to handle different JSON array formats.
+        Matches the exact, case-insensitive skill name through the indexed
+        normalized skill table rather than pattern matching the JSON text.
         """
         if self.value():
-            skill_to_filter = self.value().lower()
-            q_objects = (
-                Q(skills__icontains=f'["{skill_to_filter}"]') |          # Single skill
-                Q(skills__icontains=f'["{skill_to_filter}",') |          # Skill at start
-                Q(skills__icontains=f', "{skill_to_filter}",') |         # Skill in middle
-                Q(skills__icontains=f', "{skill_to_filter}"]')           # Skill at end
-            )
-            return queryset.filter(q_objects)
+            return queryset.with_all_skills([self.value()])
         return queryset
 
 
@@ -43,6 +38,8 @@ class UserProfileAdmin(admin.ModelAdmin):
         'user', 'gender', 'dob', 'education', 
         'work_experience', 'display_skills', 'photo', 'resume'
     )
+    # The user column shows str(user); load users with the page instead of one query per row
+    list_select_related = ('user',)
     search_fields = ('user__email', 'user__name', 'skills')  # Allow search by user email, name, skills
     list_filter = (
         'gender', 
@@ -65,3 +62,15 @@ class UserProfileAdmin(admin.ModelAdmin):
         #Display skills as a comma-separated string. 
         return ", ".join(obj.skills) if obj.skills else "N/A"
     display_skills.short_description = 'Skills'  # Column title in admin list view
+
+
+# Read-only overview of background export jobs
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'created_by', 'status', 'row_count', 'total_rows', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    list_select_related = ('created_by',)
+    readonly_fields = (
+        'created_by', 'params', 'status', 'row_count', 'total_rows', 'file', 'error',
+        'created_at', 'started_at', 'finished_at',
+    )
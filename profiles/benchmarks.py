@@ -0,0 +1,263 @@
+"""
+Shared helpers for the benchmark management commands.
+Benchmarks run against a throwaway database so they never touch real data.
+"""
+import json
+import math
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import RequestFactory
+from django.utils import timezone
+
+from .models import UserProfile
+from .skills import index_profiles
+
+User = get_user_model()
+
+# Pool of skills used when generating synthetic profiles, most common first
+SAMPLE_SKILLS = [
+    'python', 'sql', 'excel', 'communication', 'java', 'javascript', 'git', 'linux',
+    'django', 'react', 'aws', 'docker', 'c++', 'html', 'css', 'node.js', 'kubernetes',
+    'go', 'typescript', 'power bi', 'tableau', 'spring', 'angular', 'rust', 'scala',
+    'terraform', 'flutter', 'kotlin', 'swift', 'hadoop',
+]
+# Skill popularity falls off with rank (Zipf-like), as with real skill tags:
+# a few skills appear on most profiles and a long tail on very few
+SKILL_CUM_WEIGHTS = list(accumulate(1 / rank for rank in range(1, len(SAMPLE_SKILLS) + 1)))
+# Relative frequency of profiles listing 0, 1, 2, ... skills
+SKILL_COUNT_WEIGHTS = [3, 8, 15, 20, 20, 14, 10, 6, 4]
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Create an empty on-disk test database, switch the default connection
+    to it and destroy it again on exit.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        old_name = connection.settings_dict['NAME']
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def pick_skills(rng):
+    """
+    Return a random list of distinct skills for one profile, sometimes
+    typed with different capitalization or stray spaces like real input.
+    """
+    count = rng.choices(range(len(SKILL_COUNT_WEIGHTS)), weights=SKILL_COUNT_WEIGHTS)[0]
+    picked = []
+    while len(picked) < count:
+        skill = rng.choices(SAMPLE_SKILLS, cum_weights=SKILL_CUM_WEIGHTS)[0]
+        if skill not in picked:
+            picked.append(skill)
+    return [rng.choice((skill, skill.title(), f' {skill} ')) if rng.random() < 0.1 else skill for skill in picked]
+
+
+def seed_profiles(count, seed=0, batch_size=5000, prefix='bench', password='!'):
+    """
+    Insert count synthetic users with profiles using batched inserts.
+    The same seed produces the same profiles, apart from created_at which
+    is relative to the current time. Passwords are left unusable
+    unless an already hashed password is given, so no hashing cost is paid.
+    """
+    rng = random.Random(seed)
+    offset = User.objects.count()
+    now = timezone.now()
+
+    for start in range(0, count, batch_size):
+        stop = min(start + batch_size, count)
+        users = User.objects.bulk_create([
+            User(
+                email=f'{prefix}{offset + i}@example.com',
+                username=f'{prefix}{offset + i}@example.com',
+                name=f'Candidate {offset + i}',
+                mobile_no=f'{9000000000 + offset + i}'[:10],
+                work_status=rng.choice(['experienced', 'fresher']),
+                password=password,
+            )
+            for i in range(start, stop)
+        ])
+        profiles = UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                gender=rng.choice(UserProfile.GENDER_CHOICES)[0],
+                dob=date(1980, 1, 1) + timedelta(days=rng.randint(0, 25 * 365)),
+                education=rng.choices(UserProfile.EDUCATION_CHOICES, weights=[5, 15, 50, 25, 5])[0][0],
+                work_experience=rng.choices(UserProfile.EXPERIENCE_CHOICES, weights=[35, 30, 20, 15])[0][0],
+                skills=pick_skills(rng),
+                created_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+            )
+            for user in users
+        ])
+        index_profiles(profiles)
+
+
+# Words used to build synthetic resume text
+RESUME_WORDS = [
+    'python', 'django', 'postgres', 'machine', 'learning', 'analytics', 'backend', 'frontend',
+    'kubernetes', 'docker', 'microservices', 'leadership', 'agile', 'testing', 'security',
+    'cloud', 'pipelines', 'react', 'typescript', 'statistics', 'finance', 'marketing',
+    'design', 'mobile', 'android', 'embedded', 'networking', 'support', 'sales', 'research',
+]
+
+
+def resume_text(rng, words=300):
+    # Random resume-like text, one line per ten words: mostly common words,
+    # plus one rare "tool" name in ten so selective searches exist too
+    picked = [
+        f'tool{rng.randint(0, 5000)}' if rng.random() < 0.1 else rng.choice(RESUME_WORDS)
+        for _ in range(words)
+    ]
+    return [' '.join(picked[i:i + 10]) for i in range(0, words, 10)]
+
+
+def make_pdf(lines):
+    """
+    Return the bytes of a minimal one-page PDF showing the given ASCII lines.
+    """
+    def escape(text):
+        return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    stream = 'BT /F1 10 Tf 12 TL 40 780 Td ' + ' '.join(f'({escape(line)}) Tj T*' for line in lines) + ' ET'
+    objects = [
+        '<< /Type /Catalog /Pages 2 0 R >>',
+        '<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+        '/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>',
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream',
+    ]
+
+    pdf = b'%PDF-1.4\n'
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f'{number} 0 obj\n{obj}\nendobj\n'.encode('latin-1')
+
+    # Cross-reference table pointing at each object's byte offset
+    xref = len(pdf)
+    pdf += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    pdf += b''.join(f'{offset:010d} 00000 n \n'.encode() for offset in offsets)
+    pdf += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return pdf
+
+
+def staff_request(path, params=None):
+    """
+    Build a GET request made by an (unsaved) active staff user,
+    suitable for calling staff-only views directly.
+    """
+    request = RequestFactory().get(path, params or {})
+    request.user = User(email='bench-staff@example.com', is_staff=True, is_active=True)
+    return request
+
+
+def peak_rss_mb():
+    # Peak resident set size of the current process (ru_maxrss is in KB on Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child_main(conn, func, args):
+    baseline = peak_rss_mb()
+    result = func(*args)
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    result['rss_growth_mb'] = round(peak_rss_mb() - baseline, 1)
+    conn.send(result)
+    conn.close()
+
+
+def run_isolated(func, *args):
+    """
+    Run func in a forked child process and return the dict it produces,
+    extended with the child's peak RSS. Running each measurement in its
+    own process keeps peaks from earlier runs out of the numbers.
+    """
+    # Database connections must not be shared with the child
+    connections.close_all()
+
+    ctx = multiprocessing.get_context('fork')
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_child_main, args=(child_conn, func, args))
+    process.start()
+    result = parent_conn.recv()
+    process.join()
+    return result
+
+
+def consume_response(response, start):
+    """
+    Read a response to the end and return (time to first byte, total time, size).
+    Timings are in seconds, measured from start (a time.perf_counter() value
+    taken before the view was called).
+    """
+    first_byte = None
+    size = 0
+
+    chunks = response.streaming_content if response.streaming else [response.content]
+    for chunk in chunks:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+
+    if hasattr(response, 'close'):
+        response.close()
+    return first_byte or 0.0, time.perf_counter() - start, size
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile of a non-empty list of numbers
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize_timings(timings):
+    """
+    Summarize per-request timings in seconds as a dict of milliseconds
+    (mean, p50, p95, min, max) plus requests per second.
+    """
+    return {
+        'requests': len(timings),
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'min_ms': round(min(timings) * 1000, 3),
+        'max_ms': round(max(timings) * 1000, 3),
+        'rps': round(len(timings) / sum(timings), 1),
+    }
+
+
+def compare_results(results, baseline, threshold=0.2, metric='p50_ms'):
+    """
+    Compare benchmark results with a baseline run, both as saved by the
+    run_benchmarks command. Returns a list of (name, baseline value, value,
+    relative change, regressed) for every benchmark in both runs; regressed
+    is True when the metric grew by more than threshold (0.2 = 20%).
+    """
+    rows = []
+    for name, result in results['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None or not base.get(metric):
+            continue
+        change = result[metric] / base[metric] - 1
+        rows.append((name, base[metric], result[metric], change, change > threshold))
+    return rows
+
+
+def load_results(path):
+    with open(path) as fileobj:
+        return json.load(fileobj)
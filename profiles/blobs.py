@@ -0,0 +1,97 @@
+"""
+Garbage collection of content-addressed media blobs (see profiles.storage).
+"""
+import posixpath
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MediaBlob, UserProfile
+from .storage import media_storage
+
+# Upload directories of the profile file fields, and what to skip inside them
+MEDIA_DIRS = ('resumes', 'profile_photos')
+SKIP_DIRS = {'profile_photos/renditions'}
+
+
+def get_grace_period():
+    # Unreferenced blobs younger than this are kept: an upload may not be attached yet
+    return getattr(settings, 'PROFILE_MEDIA_GC_GRACE', timedelta(hours=24))
+
+
+def collect_unreferenced_blobs(grace=None, dry_run=False):
+    """
+    Delete blobs whose reference count dropped to zero before the grace
+    period. Returns the names of the deleted blobs.
+    """
+    cutoff = timezone.now() - (grace if grace is not None else get_grace_period())
+    names = list(MediaBlob.objects.filter(refcount__lte=0, updated_at__lt=cutoff).values_list('name', flat=True))
+    if dry_run:
+        return names
+
+    deleted = []
+    for name in names:
+        # Only delete the blob if it was not picked up or uploaded again
+        # meanwhile; a concurrent upload touching the row waits for this
+        # transaction and then stores the file anew
+        with transaction.atomic():
+            if MediaBlob.objects.filter(name=name, refcount__lte=0, updated_at__lt=cutoff).delete()[0]:
+                media_storage.delete(name)
+                deleted.append(name)
+    return deleted
+
+
+def recount_references():
+    """
+    Rebuild every blob's reference count from the profiles, adding rows
+    for referenced files without one (e.g. uploads from before content
+    addressing). Returns the set of referenced names.
+    """
+    counts = Counter()
+    for resume, photo in UserProfile.objects.values_list('resume', 'photo').iterator(chunk_size=10000):
+        counts.update(name for name in (resume, photo) if name)
+
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name) for name in counts], ignore_conflicts=True, batch_size=1000,
+    )
+    for blob in MediaBlob.objects.only('id', 'name', 'refcount').iterator():
+        if blob.refcount != counts[blob.name]:
+            MediaBlob.objects.filter(pk=blob.pk).update(refcount=counts[blob.name], updated_at=timezone.now())
+    return set(counts)
+
+
+def _walk(directory):
+    # Every file name below directory in media storage
+    if directory in SKIP_DIRS or not media_storage.exists(directory):
+        return
+    subdirs, files = media_storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for subdir in subdirs:
+        yield from _walk(posixpath.join(directory, subdir))
+
+
+def collect_untracked_files(referenced, grace=None, dry_run=False):
+    """
+    Delete files in the upload directories that no profile references and
+    that are older than the grace period. Returns the deleted names.
+    """
+    cutoff = timezone.now() - (grace if grace is not None else get_grace_period())
+    deleted = []
+    for directory in MEDIA_DIRS:
+        for name in _walk(directory):
+            if name in referenced or media_storage.get_modified_time(name) >= cutoff:
+                continue
+            if not dry_run:
+                with transaction.atomic():
+                    blobs = MediaBlob.objects.filter(name=name)
+                    # Referenced or recently uploaded again
+                    if blobs.exclude(refcount__lte=0, updated_at__lt=cutoff).exists():
+                        continue
+                    blobs.delete()
+                    media_storage.delete(name)
+            deleted.append(name)
+    return deleted
@@ -0,0 +1,217 @@
+import csv
+import io
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.timezone import localtime
+from openpyxl import Workbook
+
+from accounts.instrumentation import timed
+
+# pyarrow is optional; the Parquet format is only offered when it is installed
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Header row written at the top of every export
+EXPORT_HEADERS = ['Name', 'Email', 'Mobile', 'Gender', 'Education', 'Work Experience', 'Skills', 'Created At']
+
+
+def get_chunk_size():
+    # Number of rows fetched from the database per round trip while exporting
+    return getattr(settings, 'PROFILE_EXPORT_CHUNK_SIZE', 2000)
+
+
+def get_batch_size():
+    # Rows buffered per record batch when writing columnar formats
+    return getattr(settings, 'PROFILE_EXPORT_BATCH_SIZE', 10000)
+
+
+def get_spool_size():
+    # Exports smaller than this many bytes stay in memory, larger ones spill to a temp file
+    return getattr(settings, 'PROFILE_EXPORT_SPOOL_SIZE', 8 * 1024 * 1024)
+
+
+def profile_rows(profiles):
+    """
+    Yield one export row per profile.
+    Profiles are expected to come with their related user already selected.
+    """
+    for profile in profiles:
+        yield profile_row(profile)
+
+
+async def aprofile_rows(profiles):
+    # Async version of profile_rows for an async iterable of profiles
+    async for profile in profiles:
+        yield profile_row(profile)
+
+
+def profile_row(profile):
+    return [
+        profile.user.name,
+        profile.user.email,
+        profile.user.mobile_no,
+        profile.gender or '',
+        profile.education or '',
+        profile.work_experience or '',
+        ', '.join(profile.skills) if profile.skills else '',
+        localtime(profile.created_at).strftime('%Y-%m-%d'),
+    ]
+
+
+def write_xlsx(rows, fileobj):
+    """
+    Write rows to fileobj as an Excel workbook.
+    Uses a write-only worksheet so rows are flushed to disk as they are
+    appended instead of being kept as cell objects in memory.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="Profiles")
+
+    ws.append(EXPORT_HEADERS)
+    for row in rows:
+        ws.append(row)
+
+    wb.save(fileobj)
+
+
+def write_csv(rows, fileobj, header=True):
+    """
+    Write rows to the binary fileobj as UTF-8 CSV, optionally
+    preceded by the header row.
+    """
+    text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(text)
+    if header:
+        writer.writerow(EXPORT_HEADERS)
+    writer.writerows(rows)
+    # Hand the underlying file back to the caller instead of closing it
+    text.detach()
+
+
+def write_parquet(rows, fileobj):
+    """
+    Write rows to fileobj as a Parquet file, one row group per batch of
+    rows, so only a single batch is held in memory at a time.
+    """
+    schema = pyarrow.schema([(header, pyarrow.string()) for header in EXPORT_HEADERS])
+    with pyarrow.parquet.ParquetWriter(fileobj, schema, compression='zstd') as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= get_batch_size():
+                writer.write_batch(_record_batch(batch, schema))
+                batch = []
+        if batch:
+            writer.write_batch(_record_batch(batch, schema))
+
+
+def _record_batch(rows, schema):
+    # Transpose a list of rows into one Arrow array per column
+    columns = [pyarrow.array(column, type=pyarrow.string()) for column in zip(*rows)]
+    return pyarrow.RecordBatch.from_arrays(columns, schema=schema)
+
+
+class _Echo:
+    # File-like object whose write() returns the value instead of storing it
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    """
+    Yield the header and rows as encoded CSV lines, one at a time.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADERS).encode('utf-8')
+    for row in rows:
+        yield writer.writerow(row).encode('utf-8')
+
+
+async def astream_csv(rows):
+    """
+    Yield the header and the rows of an async iterable as encoded CSV,
+    one chunk of rows at a time. Every chunk is a separate send on the
+    ASGI connection, so rows are grouped rather than sent one by one.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADERS).encode('utf-8')
+
+    chunk = []
+    async for row in rows:
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= get_chunk_size():
+            yield ''.join(chunk).encode('utf-8')
+            chunk = []
+    if chunk:
+        yield ''.join(chunk).encode('utf-8')
+
+
+def csv_response(rows, filename='filtered_profiles.csv'):
+    """
+    Build a streaming CSV response. Rows are encoded as they are produced,
+    so memory use stays constant and the first bytes go out immediately.
+    """
+    response = StreamingHttpResponse(stream_csv(rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def async_csv_response(rows, filename='filtered_profiles.csv'):
+    """
+    Build a streaming CSV response from an async iterable of rows. Under
+    ASGI a slow client only holds a suspended coroutine, not a worker thread.
+    """
+    response = StreamingHttpResponse(astream_csv(rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def parquet_response(rows, filename='filtered_profiles.parquet'):
+    """
+    Build a response that sends the rows as a Parquet attachment,
+    written in batches to a spooled temp file.
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=get_spool_size())
+    with timed('serialize'):
+        write_parquet(rows, output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/vnd.apache.parquet',
+    )
+
+
+def xlsx_response(rows, filename='filtered_profiles.xlsx'):
+    """
+    Build a streaming response that sends the rows as an Excel attachment.
+    The workbook is written to a spooled temp file and then streamed back
+    in blocks, so memory use does not grow with the number of rows.
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=get_spool_size())
+    with timed('serialize'):
+        write_xlsx(rows, output)
+    output.seek(0)
+
+    # FileResponse streams the file in blocks and closes it once sent
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/ms-excel',
+    )
+
+
+# Download formats offered by export_filter_page and the function building each response
+EXPORT_FORMATS = {
+    'xlsx': xlsx_response,
+    'csv': csv_response,
+}
+if pyarrow is not None:
+    EXPORT_FORMATS['parquet'] = parquet_response
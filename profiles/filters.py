@@ -0,0 +1,96 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import UserProfile, normalize_skills
+from .resumes import keyword_terms, search_resume_ids
+
+# Query string parameters understood by filter_profiles
+FILTER_PARAMS = ('gender', 'education', 'work_experience', 'created_date', 'skills', 'keywords')
+
+
+def get_filter_params(query):
+    """
+    Pick the non-empty profile filter parameters out of a QueryDict
+    (or any mapping) and return them as a plain dict.
+    """
+    return {name: query.get(name) for name in FILTER_PARAMS if query.get(name)}
+
+
+def normalize_filter_params(params):
+    """
+    Reduce filter parameters to a canonical form: choice values mapped onto
+    the stored choice, the date parsed, and skills and keywords as sorted
+    lists of lowercase words. Equivalent filter sets normalize to equal dicts.
+    """
+    normalized = {}
+    if params.get('gender'):
+        normalized['gender'] = _choice_value(params['gender'], UserProfile.GENDER_CHOICES)
+    if params.get('education'):
+        normalized['education'] = _choice_value(params['education'], UserProfile.EDUCATION_CHOICES)
+    if params.get('work_experience'):
+        normalized['work_experience'] = _choice_value(params['work_experience'], UserProfile.EXPERIENCE_CHOICES)
+    created_after = _start_of_day(params.get('created_date'))
+    if created_after:
+        normalized['created_after'] = created_after
+    skills = normalize_skills(params.get('skills', '').split(','))
+    if skills:
+        normalized['skills'] = skills
+    keywords = keyword_terms(params.get('keywords'))
+    if keywords:
+        normalized['keywords'] = keywords
+    return normalized
+
+
+def filter_profiles(params, resume_ids=None):
+    """
+    Return the UserProfiles (with their users) matching the given filter
+    parameters, as produced by get_filter_params. Callers that already ran
+    the keyword search pass its result as resume_ids so it is not run again.
+    """
+    queryset = UserProfile.objects.select_related('user').all()
+    params = normalize_filter_params(params)
+
+    # Apply filters if the parameters are provided. Choice fields are matched
+    # exactly (after mapping the input onto the stored choice value) and the
+    # date becomes a range on created_at, so every filter can use an index.
+    if 'gender' in params:
+        queryset = queryset.filter(gender=params['gender'])
+    if 'education' in params:
+        queryset = queryset.filter(education=params['education'])
+    if 'work_experience' in params:
+        queryset = queryset.filter(work_experience=params['work_experience'])
+    if 'created_after' in params:
+        queryset = queryset.filter(created_at__gte=params['created_after'])
+
+    # Keep only profiles that have all of the input skills
+    if 'skills' in params:
+        queryset = queryset.with_all_skills(params['skills'])
+
+    # Keep only profiles whose resume text contains every keyword
+    if 'keywords' in params:
+        if resume_ids is None:
+            resume_ids = search_resume_ids(params['keywords'])
+        queryset = queryset.filter(id__in=resume_ids)
+
+    return queryset
+
+
+def _choice_value(value, choices):
+    # Map user input onto the stored choice value, ignoring case
+    for choice, _label in choices:
+        if choice.lower() == value.strip().lower():
+            return choice
+    return value
+
+
+def _start_of_day(value):
+    # Midnight at the start of the given YYYY-MM-DD date in the current time zone
+    try:
+        day = parse_date(value or '')
+    except ValueError:
+        return None
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.min))
@@ -0,0 +1,319 @@
+"""
+Bulk import of candidates (a user plus profile per row) from CSV, XLSX or
+JSONL files, used by the import_candidates management command.
+
+Rows are read one at a time and inserted in batches with bulk_create, one
+transaction per batch, so memory stays bounded by the batch size. Rows are
+validated with the same rules as registration; rows whose email is already
+registered, or appeared earlier in the file, are skipped.
+"""
+import csv
+import json
+import os
+import secrets
+from datetime import date, datetime
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_date
+from openpyxl import load_workbook
+
+from accounts.validators import validate_mobile_no
+
+from .models import UserProfile
+from .result_cache import invalidate_results
+from .skills import index_profiles
+
+User = get_user_model()
+
+# File extensions understood by read_rows
+FORMATS = {'.csv': 'csv', '.xlsx': 'xlsx', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+def _header(name):
+    # "Work Status" and "work_status" name the same column
+    return str(name or '').strip().lower().replace(' ', '_')
+
+
+def _read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as fileobj:
+        reader = csv.reader(fileobj)
+        header = [_header(name) for name in next(reader, [])]
+        for values in reader:
+            if any(values):
+                yield reader.line_num, dict(zip(header, values))
+
+
+def _read_xlsx(path):
+    # Read-only mode streams the sheet instead of loading it whole
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_header(name) for name in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield line, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def _read_jsonl(path):
+    with open(path, encoding='utf-8') as fileobj:
+        for line, text in enumerate(fileobj, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError:
+                row = None
+            # Anything but an object is reported as invalid by clean_row
+            yield line, {_header(key): value for key, value in row.items()} if isinstance(row, dict) else None
+
+
+def read_rows(path, file_format=None):
+    """
+    Yield (line number, row dict) for every row of a CSV, XLSX or JSONL
+    file, with column names lowercased and spaces turned into underscores.
+    The format is taken from the file extension unless given.
+    """
+    file_format = file_format or FORMATS.get(os.path.splitext(path)[1].lower())
+    readers = {'csv': _read_csv, 'xlsx': _read_xlsx, 'jsonl': _read_jsonl}
+    if file_format not in readers:
+        raise ValueError(f"Unsupported file format: {path}")
+    return readers[file_format](path)
+
+
+def _text(value):
+    # Spreadsheets hand back numbers for mobile numbers and the like
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _choice(value, choices, field):
+    # Accept a choice by its value or its label, in any case
+    text = _text(value).lower()
+    for key, label in choices:
+        if text in (key.lower(), label.lower()):
+            return key
+    raise ValidationError(f"{field}: '{_text(value)}' is not a valid choice.")
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        parsed = parse_date(_text(value))
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError(f"dob: '{_text(value)}' is not a valid YYYY-MM-DD date.")
+    return parsed
+
+
+def _skills(value):
+    # A JSON list, or a comma separated string in CSV and XLSX files
+    if isinstance(value, list):
+        items = value
+    else:
+        items = _text(value).split(',')
+    return [_text(item) for item in items if _text(item)]
+
+
+def clean_row(row):
+    """
+    Validate a row and return a dict of cleaned user and profile values.
+    Raises ValidationError listing every problem with the row.
+    """
+    if row is None:
+        raise ValidationError("Row is not a JSON object.")
+
+    cleaned = {}
+    errors = []
+
+    def check(field, func):
+        try:
+            cleaned[field] = func()
+        except ValidationError as exc:
+            errors.extend(exc.messages)
+
+    def email():
+        value = _text(row.get('email'))
+        try:
+            validate_email(value)
+        except ValidationError:
+            raise ValidationError("email: Enter a valid email address.")
+        return User.objects.normalize_email(value)
+
+    def name():
+        value = _text(row.get('name'))
+        if not value or len(value) > 150:
+            raise ValidationError("name: Enter a name of at most 150 characters.")
+        return value
+
+    def mobile_no():
+        value = _text(row.get('mobile_no'))
+        try:
+            validate_mobile_no(value)
+        except ValidationError as exc:
+            raise ValidationError(f"mobile_no: {exc.messages[0]}")
+        return value
+
+    check('email', email)
+    check('name', name)
+    check('mobile_no', mobile_no)
+    check('work_status', lambda: _choice(row.get('work_status'), User.WORK_STATUS_CHOICES, 'work_status'))
+    check('gender', lambda: _choice(row.get('gender'), UserProfile.GENDER_CHOICES, 'gender'))
+
+    # Optional profile fields
+    if _text(row.get('education')):
+        check('education', lambda: _choice(row.get('education'), UserProfile.EDUCATION_CHOICES, 'education'))
+    if _text(row.get('work_experience')):
+        check('work_experience', lambda: _choice(
+            row.get('work_experience'), UserProfile.EXPERIENCE_CHOICES, 'work_experience',
+        ))
+    if _text(row.get('dob')):
+        check('dob', lambda: _date(row.get('dob')))
+    cleaned['skills'] = _skills(row.get('skills'))
+    cleaned['password'] = _text(row.get('password'))
+
+    if errors:
+        raise ValidationError(errors)
+    return cleaned
+
+
+def hash_passwords(passwords, pool=None):
+    """
+    Hash a list of raw passwords, spread over a multiprocessing pool when
+    given. Empty passwords become unusable ones, so those candidates set
+    theirs through password reset.
+    """
+    raw = [password for password in passwords if password]
+    if pool is not None and len(raw) > 1:
+        # Hashing dominates the import when passwords are given; send work in small chunks
+        hashed = iter(pool.map(make_password, raw, chunksize=max(1, len(raw) // 64)))
+    else:
+        hashed = iter(map(make_password, raw))
+    # Same form as make_password(None), without its slow per-character random string
+    return [
+        next(hashed) if password else UNUSABLE_PASSWORD_PREFIX + secrets.token_urlsafe(30)
+        for password in passwords
+    ]
+
+
+def _insert(candidates):
+    # Create the users, then their profiles and skill rows
+    users = User.objects.bulk_create([
+        User(
+            email=cleaned['email'],
+            username=cleaned['email'],
+            name=cleaned['name'],
+            mobile_no=cleaned['mobile_no'],
+            work_status=cleaned['work_status'],
+            password=cleaned['password'],
+        )
+        for cleaned in candidates
+    ])
+    profiles = UserProfile.objects.bulk_create([
+        UserProfile(
+            user=user,
+            gender=cleaned['gender'],
+            dob=cleaned.get('dob'),
+            education=cleaned.get('education', ''),
+            work_experience=cleaned.get('work_experience', 'fresher'),
+            skills=cleaned['skills'],
+        )
+        for user, cleaned in zip(users, candidates)
+    ])
+    # bulk_create skips the post_save signal that keeps the skill table in sync
+    index_profiles(profiles)
+
+
+def import_batch(batch, pool=None, on_error=None):
+    """
+    Insert a batch of (line number, cleaned row) in one transaction,
+    skipping emails that are already registered or repeated in the batch.
+    Returns (created, duplicates).
+    """
+    seen = set()
+    candidates = []
+    duplicates = 0
+    for line, cleaned in batch:
+        if cleaned['email'] in seen:
+            duplicates += 1
+            if on_error:
+                on_error(line, cleaned['email'], "email: Repeated earlier in the file.")
+            continue
+        seen.add(cleaned['email'])
+        candidates.append((line, cleaned))
+
+    hashed = False
+    while True:
+        existing = set(User.objects.filter(email__in=seen).values_list('email', flat=True))
+        for line, cleaned in candidates:
+            if cleaned['email'] in existing:
+                duplicates += 1
+                if on_error:
+                    on_error(line, cleaned['email'], "email: A user with this email already exists.")
+        candidates = [(line, cleaned) for line, cleaned in candidates if cleaned['email'] not in existing]
+        seen -= existing
+
+        # Hash only once the rows that will actually be inserted are known
+        if not hashed:
+            passwords = hash_passwords([cleaned['password'] for _, cleaned in candidates], pool)
+            for (_, cleaned), password in zip(candidates, passwords):
+                cleaned['password'] = password
+            hashed = True
+
+        try:
+            with transaction.atomic():
+                _insert([cleaned for _, cleaned in candidates])
+        except IntegrityError:
+            # Someone registered one of the emails meanwhile; check again
+            if not User.objects.filter(email__in=seen).exists():
+                raise
+            continue
+        return len(candidates), duplicates
+
+
+def import_candidates(rows, batch_size=1000, pool=None, on_error=None, on_batch=None):
+    """
+    Import (line number, row dict) pairs as produced by read_rows.
+    Invalid and duplicate rows are passed to on_error(line, email, message)
+    and on_batch(stats) is called after each batch. Returns the stats
+    dict: rows read, created, duplicates and invalid.
+    """
+    stats = {'rows': 0, 'created': 0, 'duplicates': 0, 'invalid': 0}
+    batch = []
+
+    def flush():
+        created, duplicates = import_batch(batch, pool, on_error)
+        stats['created'] += created
+        stats['duplicates'] += duplicates
+        batch.clear()
+        if on_batch:
+            on_batch(stats)
+
+    for line, row in rows:
+        stats['rows'] += 1
+        try:
+            batch.append((line, clean_row(row)))
+        except ValidationError as exc:
+            stats['invalid'] += 1
+            if on_error:
+                on_error(line, _text((row or {}).get('email')), '; '.join(exc.messages))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    if stats['created']:
+        invalidate_results()
+    return stats
@@ -0,0 +1,121 @@
+"""
+Database-backed queue for background profile exports.
+Jobs are ExportJob rows; workers started with the run_export_worker
+management command claim pending jobs and write their files under MEDIA_ROOT.
+"""
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .exports import get_chunk_size, get_spool_size, profile_rows, write_xlsx
+from .filters import filter_profiles
+from .models import ExportJob
+from .parallel_export import export_parallel
+
+logger = logging.getLogger(__name__)
+
+
+def get_retention():
+    # How long finished export files are kept before being purged
+    return getattr(settings, 'PROFILE_EXPORT_JOB_RETENTION', timedelta(days=7))
+
+
+def get_job_timeout():
+    # Running jobs older than this are assumed to belong to a dead worker
+    return getattr(settings, 'PROFILE_EXPORT_JOB_TIMEOUT', timedelta(hours=2))
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest pending job to running and return it,
+    or return None when the queue is empty. The conditional UPDATE
+    makes sure two workers never claim the same job.
+    """
+    while True:
+        job_id = (
+            ExportJob.objects.filter(status=ExportJob.STATUS_PENDING)
+            .order_by('created_at')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+
+        claimed = ExportJob.objects.filter(id=job_id, status=ExportJob.STATUS_PENDING).update(
+            status=ExportJob.STATUS_RUNNING, started_at=timezone.now()
+        )
+        if claimed:
+            return ExportJob.objects.get(id=job_id)
+
+
+def _track_progress(job, rows, every=1000):
+    # Pass rows through, saving the running row count every `every` rows
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count % every == 0:
+            ExportJob.objects.filter(id=job.id).update(row_count=count)
+    job.row_count = count
+
+
+def run_job(job):
+    """
+    Write the export file for a claimed job and mark it done or failed.
+    """
+    try:
+        queryset = filter_profiles(job.params)
+        job.total_rows = queryset.count()
+        ExportJob.objects.filter(id=job.id).update(total_rows=job.total_rows)
+
+        with tempfile.SpooledTemporaryFile(max_size=get_spool_size()) as output:
+            if job.parts:
+                # Parts are rendered in a process pool forked from this worker;
+                # the row count is only known once they are all done
+                job.row_count = export_parallel(job.params, output, part_format=job.parts)
+                name = 'export.zip'
+            else:
+                profiles = queryset.iterator(chunk_size=get_chunk_size())
+                write_xlsx(_track_progress(job, profile_rows(profiles)), output)
+                name = 'export.xlsx'
+            output.seek(0)
+            job.file.save(name, File(output), save=False)
+
+        job.status = ExportJob.STATUS_DONE
+    except Exception as exc:
+        logger.exception("Export job %s failed", job.id)
+        job.status = ExportJob.STATUS_FAILED
+        job.error = str(exc)
+
+    job.finished_at = timezone.now()
+    job.save()
+
+
+def requeue_stale_jobs():
+    # Put jobs left running by a crashed worker back in the queue
+    cutoff = timezone.now() - get_job_timeout()
+    return ExportJob.objects.filter(status=ExportJob.STATUS_RUNNING, started_at__lt=cutoff).update(
+        status=ExportJob.STATUS_PENDING, started_at=None, row_count=0
+    )
+
+
+def purge_expired_jobs():
+    """
+    Delete finished jobs older than the retention period, with their files.
+    Returns the number of jobs removed.
+    """
+    cutoff = timezone.now() - get_retention()
+    expired = ExportJob.objects.filter(
+        status__in=[ExportJob.STATUS_DONE, ExportJob.STATUS_FAILED], finished_at__lt=cutoff
+    )
+    count = 0
+    for job in expired.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
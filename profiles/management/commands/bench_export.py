@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from profiles.benchmarks import (
+    benchmark_database, consume_response, run_isolated, seed_profiles, staff_request,
+)
+from profiles.views import export_filter_page
+
+
+def _measure_export(params):
+    # Call the export view and read the whole response, as a client would
+    request = staff_request('/export-profiles/', params)
+    start = time.perf_counter()
+    response = export_filter_page(request)
+    ttfb, total, size = consume_response(response, start)
+    return {
+        'ttfb_s': round(ttfb, 3),
+        'total_s': round(total, 3),
+        'bytes': size,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the Excel download of export_filter_page. "
+        "Reports peak RSS and time-to-first-byte for each row count."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+            help='Row counts to benchmark (default: 10000 100000 1000000)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            seeded = 0
+            for rows in sorted(options['rows']):
+                # Grow the data set up to the requested size
+                seed_profiles(rows - seeded, seed=options['seed'] + seeded)
+                seeded = rows
+
+                result = run_isolated(_measure_export, {'download': '1'})
+                self.stdout.write(
+                    f"rows={rows:>9} ttfb={result['ttfb_s']:.3f}s total={result['total_s']:.3f}s "
+                    f"size={result['bytes'] / 1024 / 1024:.1f}MB peak_rss={result['peak_rss_mb']}MB "
+                    f"rss_growth={result['rss_growth_mb']}MB"
+                )
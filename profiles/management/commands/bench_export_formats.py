@@ -0,0 +1,46 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from profiles import exports
+from profiles.benchmarks import benchmark_database, seed_profiles
+from profiles.filters import filter_profiles
+
+# Writer used for each format; Parquet is skipped when pyarrow is missing
+WRITERS = {
+    'xlsx': exports.write_xlsx,
+    'csv': exports.write_csv,
+    'parquet': exports.write_parquet if exports.pyarrow is not None else None,
+}
+
+
+class Command(BaseCommand):
+    help = "Compare file size and rows/sec of the XLSX, CSV and Parquet export formats."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='Number of profiles to generate')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            seed_profiles(options['rows'])
+
+            for name, writer in WRITERS.items():
+                if writer is None:
+                    self.stdout.write(f"{name:>8}: skipped (pyarrow is not installed)")
+                    continue
+
+                with tempfile.TemporaryDirectory() as tmpdir:
+                    path = os.path.join(tmpdir, f'export.{name}')
+                    start = time.perf_counter()
+                    with open(path, 'wb') as output:
+                        profiles = filter_profiles({}).iterator(chunk_size=exports.get_chunk_size())
+                        writer(exports.profile_rows(profiles), output)
+                    elapsed = time.perf_counter() - start
+                    size = os.path.getsize(path)
+
+                self.stdout.write(
+                    f"{name:>8}: {size / 1024 / 1024:8.2f}MB on disk, "
+                    f"{options['rows'] / elapsed:>10,.0f} rows/s ({elapsed:.2f}s)"
+                )
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from profiles.benchmarks import benchmark_database, seed_profiles
+from profiles.parallel_export import export_parallel
+
+
+class Command(BaseCommand):
+    help = "Measure how the parallel export scales with the number of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200_000, help='Number of profiles to generate')
+        parser.add_argument(
+            '--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+            help='Worker counts to benchmark (default: 1 2 4 8)',
+        )
+        parser.add_argument('--parts', choices=['xlsx', 'csv'], default='xlsx', help='Part file format')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{os.cpu_count()} CPU(s) available")
+
+        with benchmark_database():
+            seed_profiles(options['rows'])
+
+            baseline = None
+            for workers in options['workers']:
+                with tempfile.TemporaryFile() as output:
+                    start = time.perf_counter()
+                    rows = export_parallel({}, output, workers=workers, part_format=options['parts'])
+                    elapsed = time.perf_counter() - start
+
+                baseline = baseline or elapsed
+                self.stdout.write(
+                    f"workers={workers}: {elapsed:.2f}s for {rows} rows "
+                    f"({rows / elapsed:,.0f} rows/s, speedup {baseline / elapsed:.2f}x)"
+                )
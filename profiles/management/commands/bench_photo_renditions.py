@@ -0,0 +1,63 @@
+import random
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from profiles.photos import get_sizes, render_renditions
+
+
+def make_photo(width, height, seed):
+    """
+    Return JPEG bytes of a noisy phone-sized photo with EXIF orientation
+    and camera metadata, similar in weight to a real upload.
+    """
+    rng = random.Random(seed)
+    # Smooth colour shapes from an upscaled small image, plus sensor-like grain
+    small = Image.frombytes('RGB', (40, 30), rng.randbytes(40 * 30 * 3))
+    image = small.resize((width, height), Image.Resampling.BICUBIC)
+    grain = Image.effect_noise((width, height), 24).convert('RGB')
+    image = Image.blend(image, grain, 0.15)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees
+    exif[0x010F] = 'Benchmark Camera'
+    output = BytesIO()
+    image.save(output, 'JPEG', quality=92, exif=exif)
+    return output.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark profile photo renditions: time per photo and bytes a page "
+        "shows for the avatar, uploaded original versus WebP rendition."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--photos', type=int, default=10, help='Number of synthetic photos')
+        parser.add_argument('--width', type=int, default=4000, help='Photo width in pixels')
+        parser.add_argument('--height', type=int, default=3000, help='Photo height in pixels')
+
+    def handle(self, *args, **options):
+        sizes = get_sizes()
+        originals = [
+            make_photo(options['width'], options['height'], seed) for seed in range(options['photos'])
+        ]
+
+        timings = []
+        renditions = []
+        for photo in originals:
+            start = time.perf_counter()
+            renditions.append(render_renditions(BytesIO(photo), sizes))
+            timings.append(time.perf_counter() - start)
+
+        original_bytes = sum(len(photo) for photo in originals) / len(originals)
+        self.stdout.write(
+            f"{options['width']}x{options['height']} originals: {original_bytes / 1024 / 1024:.1f}MB each, "
+            f"{sum(timings) / len(timings) * 1000:.0f}ms per photo for sizes {', '.join(map(str, sizes))}"
+        )
+        for size in sizes:
+            size_bytes = sum(len(r[size]) for r in renditions) / len(renditions)
+            self.stdout.write(
+                f"  {size:>4}px rendition: {size_bytes / 1024:.1f}KB ({original_bytes / size_bytes:.0f}x smaller)"
+            )
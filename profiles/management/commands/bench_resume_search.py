@@ -0,0 +1,101 @@
+import multiprocessing
+import random
+import tempfile
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+
+from profiles import resumes
+from profiles.benchmarks import benchmark_database, make_pdf, resume_text, seed_profiles
+from profiles.models import UserProfile
+
+
+def _extract_all(workers):
+    # Drain the pending queue with the given number of worker processes
+    connections.close_all()
+    ctx = multiprocessing.get_context('fork')
+    processes = [ctx.Process(target=resumes.process_pending_resumes) for _ in range(workers)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return time.perf_counter() - start
+
+
+def _query_latency(queries, repeat):
+    # Median milliseconds per keyword search over all queries
+    timings = []
+    for _ in range(repeat):
+        for terms in queries:
+            start = time.perf_counter()
+            resumes.search_resume_ids(terms)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark resume text extraction throughput on synthetic PDFs, and "
+        "keyword search latency with the FTS5 index versus substring lookups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--docs', type=int, default=2000, help='Number of synthetic resumes')
+        parser.add_argument(
+            '--workers', type=int, nargs='+', default=[1, 2, 4],
+            help='Worker process counts to time extraction with (default: 1 2 4)',
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per search query')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic corpus')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        texts = {}
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), \
+                benchmark_database():
+            seed_profiles(options['docs'], seed=options['seed'])
+
+            # Write one synthetic PDF per profile
+            for profile_id in UserProfile.objects.values_list('id', flat=True):
+                lines = resume_text(rng)
+                texts[profile_id] = '\n'.join(lines)
+                name = default_storage.save(f'resumes/bench-{profile_id}.pdf', ContentFile(make_pdf(lines)))
+                UserProfile.objects.filter(id=profile_id).update(resume=name)
+
+            if resumes.pypdf is None:
+                self.stdout.write("pypdf is not installed: skipping extraction, indexing the generated text.")
+                for profile_id, text in texts.items():
+                    UserProfile.objects.filter(id=profile_id).update(
+                        resume_text=text, resume_status=UserProfile.RESUME_DONE
+                    )
+                    resumes.index_resume_text(profile_id, text)
+            else:
+                for workers in options['workers']:
+                    # Forget earlier hashes so every file is extracted again
+                    UserProfile.objects.update(resume_status=UserProfile.RESUME_PENDING, resume_sha256='')
+                    elapsed = _extract_all(workers)
+                    self.stdout.write(
+                        f"extract workers={workers}: {options['docs'] / elapsed:.1f} docs/s ({elapsed:.2f}s)"
+                    )
+
+            queries = [['python'], ['machine', 'learning'], ['tool42'], ['security', 'tool1234']]
+            fts = _query_latency(queries, options['repeat']) if resumes.has_fts() else None
+
+            # Same searches without the FTS index
+            name = connections['default'].settings_dict['NAME']
+            resumes._fts_tables[name] = False
+            try:
+                fallback = _query_latency(queries, options['repeat'])
+            finally:
+                resumes._fts_tables.pop(name, None)
+
+            self.stdout.write(
+                f"search p50: fts5={'n/a' if fts is None else f'{fts:.2f}ms'} substring={fallback:.2f}ms"
+            )
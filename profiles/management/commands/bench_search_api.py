@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from profiles.benchmarks import benchmark_database, consume_response, seed_profiles, staff_request
+from profiles.result_cache import get_cache
+from profiles.views import export_filter_page, profile_search_api
+
+
+def _measure(view, path, params, requests):
+    # Call the view back to back and read every response, as a client would
+    size = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        _, _, size = consume_response(view(staff_request(path, params)), time.perf_counter())
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, elapsed / requests, size
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests per second of the JSON profile search API with the "
+        "export_filter_page HTML view for the same query."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='Number of profiles to generate')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per view')
+        parser.add_argument('--page-size', type=int, default=50, help='Results per page')
+        parser.add_argument('--skills', default='python', help='Skills filter used by both views')
+        parser.add_argument(
+            '--fields', default='id,name,email',
+            help='Fields requested from the API (default: id,name,email)',
+        )
+
+    def handle(self, *args, **options):
+        params = {'skills': options['skills'], 'page_size': options['page_size']}
+
+        with benchmark_database():
+            seed_profiles(options['rows'])
+
+            views = (
+                ('html', export_filter_page, '/export-profiles/', params),
+                ('api', profile_search_api, '/api/profiles/', params),
+                ('api-fields', profile_search_api, '/api/profiles/', dict(params, fields=options['fields'])),
+            )
+            for label, view, path, view_params in views:
+                # Start every view from a cold result cache, then warm up once
+                get_cache().clear()
+                view(staff_request(path, view_params))
+
+                rate, latency, size = _measure(view, path, view_params, options['requests'])
+                self.stdout.write(
+                    f"{label:<10} {rate:>8.1f} req/s  {latency * 1000:>7.2f} ms/req  {size / 1024:>7.1f} KB"
+                )
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from profiles.benchmarks import benchmark_database, seed_profiles
+from profiles.models import UserProfile
+from profiles.skill_index import skill_index
+
+
+def _python_skill_filter(input_skills):
+    # The original approach: load every profile and compare skills in Python
+    profiles = list(UserProfile.objects.select_related('user').all())
+    return [
+        profile for profile in profiles
+        if profile.skills and all(skill in [s.lower() for s in profile.skills] for skill in input_skills)
+    ]
+
+
+def _indexed_skill_filter(input_skills):
+    return list(UserProfile.objects.select_related('user').with_all_skills(input_skills))
+
+
+def _bitmap_skill_filter(input_skills):
+    # Only the id resolution; the index is built once before timing starts
+    return list(skill_index.lookup(input_skills))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the Python-side skill filter with the indexed skill table query "
+        "and the in-memory bitmap index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help='Number of profiles to generate')
+        parser.add_argument(
+            '--skills', default='python,django',
+            help='Comma separated skills every result must have (default: python,django)',
+        )
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the best time is reported')
+
+    def handle(self, *args, **options):
+        input_skills = [s.strip().lower() for s in options['skills'].split(',') if s.strip()]
+
+        with benchmark_database():
+            seed_profiles(options['rows'])
+            skill_index.build()
+
+            paths = (
+                ('python', _python_skill_filter),
+                ('indexed', _indexed_skill_filter),
+                ('bitmap', _bitmap_skill_filter),
+            )
+            for label, func in paths:
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    matches = func(input_skills)
+                    timings.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f"{label:>8}: {min(timings) * 1000:.1f}ms for {len(matches)} matches "
+                    f"out of {options['rows']} profiles"
+                )
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from profiles.blobs import (
+    collect_unreferenced_blobs, collect_untracked_files, get_grace_period, recount_references,
+)
+from profiles.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete resume and photo blobs that no profile references any more, "
+        "and expired chunked upload sessions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=None,
+            help='Keep unreferenced files younger than this (default: PROFILE_MEDIA_GC_GRACE, 24 hours)',
+        )
+        parser.add_argument(
+            '--deep', action='store_true',
+            help='Recount references from the profiles and also delete unreferenced files without a blob row',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only list what would be deleted')
+
+    def handle(self, *args, **options):
+        grace = get_grace_period()
+        if options['grace_hours'] is not None:
+            grace = timedelta(hours=options['grace_hours'])
+
+        deleted = []
+        if options['deep']:
+            referenced = recount_references()
+            deleted += collect_untracked_files(referenced, grace, dry_run=options['dry_run'])
+        deleted += collect_unreferenced_blobs(grace, dry_run=options['dry_run'])
+        # A dry run may list a file from both passes
+        deleted = list(dict.fromkeys(deleted))
+
+        for name in deleted:
+            self.stdout.write(f"{'Would delete' if options['dry_run'] else 'Deleted'} {name}")
+        self.stdout.write(f"{len(deleted)} file(s) {'to delete' if options['dry_run'] else 'deleted'}.")
+
+        if not options['dry_run']:
+            self.stdout.write(f"{purge_stale_uploads()} expired upload session(s) removed.")
@@ -0,0 +1,99 @@
+import csv
+import multiprocessing
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from profiles.imports import import_candidates, read_rows
+
+# Errors printed when no --errors file is given
+MAX_PRINTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Import candidates (a user and profile per row) from a CSV, XLSX or JSONL file. "
+        "Columns: email, name, mobile_no, work_status, gender, and optionally dob, "
+        "education, work_experience, skills (comma separated) and password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument(
+            '--format', choices=['csv', 'xlsx', 'jsonl'], default=None,
+            help='File format (default: taken from the file extension)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per transaction')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Processes hashing passwords (default: one per CPU)',
+        )
+        parser.add_argument('--errors', default=None, help='Write rejected rows to this CSV file')
+
+    def handle(self, *args, **options):
+        try:
+            rows = read_rows(options['path'], options['format'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        error_file = open(options['errors'], 'w', newline='') if options['errors'] else None
+        error_writer = csv.writer(error_file) if error_file else None
+        if error_writer:
+            error_writer.writerow(['line', 'email', 'error'])
+        printed = 0
+
+        def on_error(line, email, message):
+            nonlocal printed
+            if error_writer:
+                error_writer.writerow([line, email, message])
+            elif printed < MAX_PRINTED_ERRORS:
+                self.stderr.write(f"Line {line} ({email or 'no email'}): {message}")
+                printed += 1
+
+        start = last_report = time.perf_counter()
+
+        def on_batch(stats):
+            nonlocal last_report
+            # Progress at most every five seconds
+            now = time.perf_counter()
+            if now - last_report < 5:
+                return
+            last_report = now
+            elapsed = now - start
+            self.stdout.write(
+                f"{stats['rows']} rows read, {stats['created']} created "
+                f"({stats['rows'] / elapsed:.0f} rows/s)"
+            )
+
+        pool = None
+        if options['workers'] > 1:
+            # Database connections must not be shared with the hashing processes
+            connections.close_all()
+            pool = multiprocessing.get_context('fork').Pool(options['workers'])
+
+        try:
+            stats = import_candidates(
+                rows, batch_size=options['batch_size'], pool=pool, on_error=on_error, on_batch=on_batch,
+            )
+        except FileNotFoundError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            if error_file:
+                error_file.close()
+
+        elapsed = time.perf_counter() - start
+        rejected = stats['invalid'] + stats['duplicates']
+        if rejected > printed and not error_writer:
+            self.stderr.write(f"{rejected - printed} more rejected row(s) not shown; use --errors to list them all.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['created']} of {stats['rows']} rows in {elapsed:.1f}s "
+            f"({stats['rows'] / max(elapsed, 1e-9):.0f} rows/s): "
+            f"{stats['duplicates']} duplicate email(s), {stats['invalid']} invalid row(s)."
+        ))
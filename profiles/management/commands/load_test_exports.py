@@ -0,0 +1,126 @@
+import threading
+import time
+import urllib.request
+from urllib.error import URLError
+
+from django.core.management.base import BaseCommand
+
+
+def _percentile(values, percent):
+    # Nearest-rank percentile of an unsorted list
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _open(url, cookie):
+    request = urllib.request.Request(url, headers={'Cookie': f'sessionid={cookie}'} if cookie else {})
+    return urllib.request.urlopen(request, timeout=300)
+
+
+def _slow_download(url, cookie, read_size, read_delay, results):
+    # Read the export in small pieces with a pause in between, like a slow client
+    start = time.perf_counter()
+    size = 0
+    try:
+        with _open(url, cookie) as response:
+            while True:
+                chunk = response.read(read_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                time.sleep(read_delay)
+    except (OSError, URLError) as exc:
+        results.append({'error': str(exc)})
+        return
+    results.append({'seconds': time.perf_counter() - start, 'bytes': size})
+
+
+def _probe(url, cookie, interval, stop, latencies, errors):
+    # Keep timing a cheap request while the downloads are in flight
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with _open(url, cookie) as response:
+                response.read()
+            latencies.append(time.perf_counter() - start)
+        except (OSError, URLError):
+            errors.append(time.perf_counter() - start)
+        time.sleep(interval)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running server with concurrent slow export downloads while "
+        "timing a cheap probe request. Run it against the same app served over "
+        "WSGI (e.g. gunicorn career_portal.wsgi -w 2) and over ASGI (e.g. uvicorn "
+        "career_portal.asgi:application --workers 2) with the same worker count; "
+        "probe latency shows whether slow downloads starve other requests."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Base URL of the running server, e.g. http://127.0.0.1:8000')
+        parser.add_argument(
+            '--export-path', default='/export-profiles/async-csv/',
+            help='Export to download (use /export-profiles/?download=1&format=csv for the sync view)',
+        )
+        parser.add_argument(
+            '--probe-path', default='/api/profiles/async/?page_size=1',
+            help='Cheap request timed while the exports run',
+        )
+        parser.add_argument('--session', default='', help='sessionid cookie of a staff user')
+        parser.add_argument('--concurrency', type=int, default=20, help='Simultaneous downloads')
+        parser.add_argument('--read-size', type=int, default=16 * 1024, help='Bytes read per step')
+        parser.add_argument('--read-delay', type=float, default=0.05, help='Seconds to wait between reads')
+        parser.add_argument('--probe-interval', type=float, default=0.1, help='Seconds between probes')
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        cookie = options['session']
+
+        downloads = []
+        latencies = []
+        probe_errors = []
+        stop = threading.Event()
+
+        probe = threading.Thread(
+            target=_probe,
+            args=(base + options['probe_path'], cookie, options['probe_interval'], stop, latencies, probe_errors),
+        )
+        workers = [
+            threading.Thread(
+                target=_slow_download,
+                args=(base + options['export_path'], cookie, options['read_size'], options['read_delay'], downloads),
+            )
+            for _ in range(options['concurrency'])
+        ]
+
+        start = time.perf_counter()
+        probe.start()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        stop.set()
+        probe.join()
+        elapsed = time.perf_counter() - start
+
+        finished = [result for result in downloads if 'error' not in result]
+        self.stdout.write(
+            f"downloads: {len(finished)}/{options['concurrency']} finished in {elapsed:.1f}s, "
+            f"{len(downloads) - len(finished)} failed"
+        )
+        if finished:
+            self.stdout.write(
+                f"download time: p50={_percentile([r['seconds'] for r in finished], 50):.2f}s "
+                f"max={max(r['seconds'] for r in finished):.2f}s "
+                f"bytes={finished[0]['bytes']}"
+            )
+        self.stdout.write(
+            f"probe: {len(latencies)} ok, {len(probe_errors)} failed, "
+            f"p50={_percentile(latencies, 50) * 1000:.1f}ms "
+            f"p95={_percentile(latencies, 95) * 1000:.1f}ms "
+            f"max={max(latencies, default=0) * 1000:.1f}ms"
+        )
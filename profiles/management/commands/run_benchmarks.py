@@ -0,0 +1,202 @@
+import json
+import platform
+import subprocess
+import time
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from profiles.benchmarks import (
+    benchmark_database, compare_results, consume_response, load_results, seed_profiles, summarize_timings,
+)
+
+User = get_user_model()
+
+# Password of the generated candidate and staff users
+PASSWORD = 'bench-pass-123'
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _profile_form(user, i):
+    # Profile form data; the skills alternate so every POST changes the profile
+    return {
+        'name': user.name,
+        'email': user.email,
+        'mobile_no': user.mobile_no,
+        'gender': 'female',
+        'dob': '1995-05-17',
+        'education': 'masters',
+        'work_experience': '3-5 years',
+        'skills[]': ['python', 'django'] if i % 2 else ['python', 'sql', 'aws'],
+    }
+
+
+def _register_form(i):
+    email = f'bench-register-{i}@example.com'
+    return {
+        'name': f'Registered {i}', 'mobile_no': '9876543210', 'email': email,
+        'work_status': 'fresher', 'password1': PASSWORD, 'password2': PASSWORD,
+    }
+
+
+def _clear_caches():
+    for alias in caches:
+        caches[alias].clear()
+
+
+def _scenarios(staff, candidate, skill):
+    """
+    Return (name, expected status, request function, cold) for every
+    benchmark. Each request function takes the iteration number and returns
+    a response. Cold benchmarks clear every cache (untimed) before each
+    request; the others measure the warmed-up, mostly cached, case.
+    """
+    export_url = f'/export-profiles/?skills={skill}'
+
+    def client(user=None):
+        # A new client, logged in as user if given
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    # Logged-in views reuse one client (and session) per user; the login and
+    # register benchmarks make a new anonymous client for every request
+    staff_client = client(staff)
+    candidate_client = client(candidate)
+
+    return [
+        ('export_filter_page', 200, lambda i: staff_client.get(export_url), False),
+        ('export_filter_page_cold', 200, lambda i: staff_client.get(export_url), True),
+        ('export_filter_page_download', 200, lambda i: staff_client.get(export_url + '&download=1'), False),
+        ('export_filter_page_download_cold', 200, lambda i: staff_client.get(export_url + '&download=1'), True),
+        ('profile_view_get', 200, lambda i: candidate_client.get('/profile/'), False),
+        ('profile_view_get_cold', 200, lambda i: candidate_client.get('/profile/'), True),
+        ('profile_view_post', 302, lambda i: candidate_client.post('/profile/', _profile_form(candidate, i)), False),
+        ('login_view_get', 200, lambda i: client().get('/login/'), False),
+        ('login_view_post', 302, lambda i: client().post(
+            '/login/', {'email': candidate.email, 'password': PASSWORD},
+        ), False),
+        ('register_get', 200, lambda i: client().get('/register/'), False),
+        ('register_post', 302, lambda i: client().post('/register/', _register_form(i)), False),
+        ('admin_changelist_skill_filter', 200, lambda i: staff_client.get(
+            f'/admin/profiles/userprofile/?skill={skill}',
+        ), False),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot views (export page and download, profile page GET/POST, login, "
+        "register, admin changelist with the skills filter) against a throwaway database "
+        "of generated profiles. The export and profile pages are also timed cold (*_cold), "
+        "with every cache cleared before each request. Results can be saved as JSON and "
+        "compared with a baseline run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000, help='Number of profiles to generate')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated data')
+        parser.add_argument('--requests', type=int, default=20, help='Timed requests per view')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per view first')
+        parser.add_argument('--skill', default='python', help='Skill used by the filtered views')
+        parser.add_argument('--only', nargs='+', default=None, help='Run only these benchmarks')
+        parser.add_argument('--output', default=None, help='Save the results to this JSON file')
+        parser.add_argument('--baseline', default=None, help='Compare with results saved by an earlier run')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Fail when a median time grew by more than this fraction of the baseline (default: 0.2)',
+        )
+
+    def handle(self, *args, **options):
+        baseline = load_results(options['baseline']) if options['baseline'] else None
+
+        # Production-like settings; test clients use the "testserver" host
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']), benchmark_database():
+            results = self.run_benchmarks(options)
+
+        output = {
+            'meta': {
+                'rows': options['rows'],
+                'seed': options['seed'],
+                'requests': options['requests'],
+                'git_revision': _git_revision(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'created_at': timezone.now().isoformat(),
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as fileobj:
+                json.dump(output, fileobj, indent=2)
+            self.stdout.write(f"Results saved to {options['output']}")
+
+        if baseline:
+            self.compare(output, baseline, options['threshold'])
+
+    def run_benchmarks(self, options):
+        seed_profiles(options['rows'], seed=options['seed'])
+        staff = User.objects.create_superuser(
+            email='bench-admin@example.com', password=PASSWORD, name='Bench Admin',
+            mobile_no='9000000000', work_status='experienced',
+        )
+        candidate = User.objects.create_user(
+            email='bench-candidate@example.com', password=PASSWORD, name='Bench Candidate',
+            mobile_no='9000000001', work_status='fresher',
+        )
+
+        results = {}
+        for name, status, request, cold in _scenarios(staff, candidate, options['skill']):
+            if options['only'] and name not in options['only']:
+                continue
+            # Every view starts from empty caches, then warms up
+            _clear_caches()
+            for i in range(options['warmup']):
+                consume_response(request(-1 - i), time.perf_counter())
+
+            timings = []
+            for i in range(options['requests']):
+                if cold:
+                    _clear_caches()
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = request(i)
+                    _, elapsed, size = consume_response(response, start)
+                if response.status_code != status:
+                    raise CommandError(f"{name}: expected status {status}, got {response.status_code}")
+                timings.append(elapsed)
+
+            results[name] = dict(summarize_timings(timings), queries=len(queries), bytes=size)
+            result = results[name]
+            self.stdout.write(
+                f"{name:<34} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+                f"{result['rps']:>8.1f} req/s  {result['queries']:>3} queries"
+            )
+        return results
+
+    def compare(self, output, baseline, threshold):
+        self.stdout.write(f"Compared with baseline {baseline.get('meta', {}).get('git_revision') or ''}:")
+        regressions = []
+        for name, base, value, change, regressed in compare_results(output, baseline, threshold):
+            line = f"{name:<34} p50 {base:>9.2f}ms -> {value:>9.2f}ms ({change:+.0%})"
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+            if regressed:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
@@ -0,0 +1,61 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from profiles.jobs import claim_next_job, purge_expired_jobs, requeue_stale_jobs, run_job
+
+
+def _worker_loop(poll_interval, once):
+    # Each worker process claims and runs jobs until told to stop
+    while True:
+        job = claim_next_job()
+        if job is not None:
+            run_job(job)
+            continue
+        if once:
+            return
+        time.sleep(poll_interval)
+
+
+class Command(BaseCommand):
+    help = "Run background export jobs queued from the export profiles page."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of worker processes')
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds to wait before checking an empty queue again',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is empty instead of waiting for new jobs',
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs()
+        purged = purge_expired_jobs()
+        self.stdout.write(f"Requeued {requeued} stale job(s), purged {purged} expired job(s).")
+
+        # Database connections must not be shared with the worker processes
+        connections.close_all()
+
+        ctx = multiprocessing.get_context('fork')
+        workers = [
+            ctx.Process(target=_worker_loop, args=(options['poll_interval'], options['once']))
+            for _ in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} export worker(s).")
+
+        try:
+            while any(worker.is_alive() for worker in workers):
+                for worker in workers:
+                    worker.join(timeout=60)
+                # Enforce the retention policy while the workers run
+                purge_expired_jobs()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
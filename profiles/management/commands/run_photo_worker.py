@@ -0,0 +1,55 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from profiles import photos
+
+
+def _worker_loop(poll_interval, once):
+    # Each worker process claims and processes photos until told to stop
+    while True:
+        if photos.process_pending_photos():
+            continue
+        if once:
+            return
+        time.sleep(poll_interval)
+
+
+class Command(BaseCommand):
+    help = "Make the resized WebP renditions of uploaded profile photos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of worker processes')
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help='Seconds to wait before checking for new photos again',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once no photos are pending instead of waiting for new ones',
+        )
+
+    def handle(self, *args, **options):
+        requeued = photos.requeue_stuck_photos()
+        self.stdout.write(f"Requeued {requeued} photo(s) left processing.")
+
+        # Database connections must not be shared with the worker processes
+        connections.close_all()
+
+        ctx = multiprocessing.get_context('fork')
+        workers = [
+            ctx.Process(target=_worker_loop, args=(options['poll_interval'], options['once']))
+            for _ in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} photo worker(s).")
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
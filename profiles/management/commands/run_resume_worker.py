@@ -0,0 +1,58 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from profiles import resumes
+
+
+def _worker_loop(poll_interval, once):
+    # Each worker process claims and extracts resumes until told to stop
+    while True:
+        if resumes.process_pending_resumes():
+            continue
+        if once:
+            return
+        time.sleep(poll_interval)
+
+
+class Command(BaseCommand):
+    help = "Extract the text of uploaded resumes for keyword search."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Number of worker processes')
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help='Seconds to wait before checking for new resumes again',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once no resumes are pending instead of waiting for new ones',
+        )
+
+    def handle(self, *args, **options):
+        if resumes.pypdf is None:
+            raise CommandError("The resume worker requires the pypdf package.")
+
+        requeued = resumes.requeue_stuck_resumes()
+        self.stdout.write(f"Requeued {requeued} resume(s) left processing.")
+
+        # Database connections must not be shared with the worker processes
+        connections.close_all()
+
+        ctx = multiprocessing.get_context('fork')
+        workers = [
+            ctx.Process(target=_worker_loop, args=(options['poll_interval'], options['once']))
+            for _ in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} resume worker(s).")
+
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
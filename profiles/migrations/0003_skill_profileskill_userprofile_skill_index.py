@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_userprofile_created_at_userprofile_dob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProfileSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='profiles.userprofile')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='profiles.skill')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='skill_index',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='profiles', through='profiles.ProfileSkill', to='profiles.skill'),
+        ),
+        migrations.AddConstraint(
+            model_name='profileskill',
+            constraint=models.UniqueConstraint(fields=('skill', 'profile'), name='unique_skill_profile'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+# Profiles processed per batch while backfilling
+BATCH_SIZE = 2000
+
+
+def _normalize(skills):
+    names = set()
+    for skill in skills or []:
+        if isinstance(skill, str) and skill.strip():
+            names.add(skill.strip().lower()[:100])
+    return names
+
+
+def backfill_skill_index(apps, schema_editor):
+    """
+    Build the normalized skill rows from the existing skills JSON lists.
+    """
+    UserProfile = apps.get_model('profiles', 'UserProfile')
+    Skill = apps.get_model('profiles', 'Skill')
+    ProfileSkill = apps.get_model('profiles', 'ProfileSkill')
+
+    skill_ids = dict(Skill.objects.values_list('name', 'id'))
+    batch = []
+
+    def flush():
+        names = set().union(*(names for _, names in batch)) - set(skill_ids)
+        if names:
+            Skill.objects.bulk_create([Skill(name=name) for name in names], ignore_conflicts=True)
+            skill_ids.update(Skill.objects.filter(name__in=names).values_list('name', 'id'))
+        ProfileSkill.objects.bulk_create(
+            [
+                ProfileSkill(profile_id=profile_id, skill_id=skill_ids[name])
+                for profile_id, names in batch
+                for name in names
+            ],
+            ignore_conflicts=True,
+        )
+        batch.clear()
+
+    for profile_id, skills in UserProfile.objects.values_list('id', 'skills').iterator(chunk_size=BATCH_SIZE):
+        batch.append((profile_id, _normalize(skills)))
+        if len(batch) >= BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_skill_profileskill_userprofile_skill_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_skill_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:08
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_profile_counts(apps, schema_editor):
+    Skill = apps.get_model('profiles', 'Skill')
+    ProfileSkill = apps.get_model('profiles', 'ProfileSkill')
+
+    counts = (
+        ProfileSkill.objects.filter(skill=OuterRef('pk'))
+        .values('skill')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Skill.objects.update(profile_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_backfill_skill_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='profile_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_profile_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0009_userprofile_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='resume_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='resume_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='resume_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# Must match profiles.resumes.FTS_TABLE
+FTS_TABLE = 'profiles_resume_fts'
+
+
+def _has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return any(option == 'ENABLE_FTS5' for option, in cursor.fetchall())
+
+
+def create_resume_fts(apps, schema_editor):
+    """
+    Create the FTS5 index over extracted resume text when running on a
+    SQLite build with FTS5. Other databases fall back to plain lookups.
+    The rowid of each entry is the profile id.
+    """
+    if _has_fts5(schema_editor.connection):
+        schema_editor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(resume_text)')
+
+
+def drop_resume_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def queue_existing_resumes(apps, schema_editor):
+    # Resumes uploaded before the pipeline existed still need their text extracted
+    UserProfile = apps.get_model('profiles', 'UserProfile')
+    UserProfile.objects.exclude(resume='').exclude(resume__isnull=True).update(resume_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0010_userprofile_resume_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_resume_fts, drop_resume_fts),
+        migrations.RunPython(queue_existing_resumes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:36
+
+from django.db import migrations, models
+
+
+def queue_existing_photos(apps, schema_editor):
+    # Photos uploaded before the pipeline existed still need their renditions
+    UserProfile = apps.get_model('profiles', 'UserProfile')
+    UserProfile.objects.exclude(photo='').exclude(photo__isnull=True).update(photo_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0011_resume_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='photo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='photo_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='photo_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, editable=False, max_length=10),
+        ),
+        migrations.RunPython(queue_existing_photos, migrations.RunPython.noop),
+    ]
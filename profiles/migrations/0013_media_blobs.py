@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:39
+
+import profiles.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0012_userprofile_photo_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='photo',
+            field=models.ImageField(blank=True, null=True, storage=profiles.storage.get_media_storage, upload_to='profile_photos/'),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='resume',
+            field=models.FileField(blank=True, null=True, storage=profiles.storage.get_media_storage, upload_to='resumes/'),
+        ),
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refcount', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['refcount', 'updated_at'], name='profiles_me_refcoun_c4e5a1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0014_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='parts',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+    ]
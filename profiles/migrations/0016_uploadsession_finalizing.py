@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0015_exportjob_parts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('open', 'Open'), ('finalizing', 'Finalizing'), ('complete', 'Complete')], default='open', max_length=10),
+        ),
+    ]
@@ -1,10 +1,63 @@
+import os
+import uuid
+
 from django.db import models
+from django.db.models import Count, F
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.utils import timezone
 
+from accounts.tracking import DirtyFieldsMixin
+
+from .storage import get_media_storage
+
 User = get_user_model()
 
-class UserProfile(models.Model):
+# Longest skill name kept in the normalized skill table
+SKILL_MAX_LENGTH = 100
+
+
+def normalize_skills(skills):
+    """
+    Turn a list of free-text skills into a sorted list of unique,
+    stripped, lowercase skill names.
+    """
+    names = set()
+    for skill in skills or []:
+        if isinstance(skill, str) and skill.strip():
+            names.add(skill.strip().lower()[:SKILL_MAX_LENGTH])
+    return sorted(names)
+
+
+class UserProfileQuerySet(models.QuerySet):
+    def with_all_skills(self, skills):
+        """
+        Keep only profiles that have every one of the given skills.
+        Resolved from the bitmap index when enabled, otherwise in a
+        single query against the normalized skill table.
+        """
+        names = normalize_skills(skills)
+        if not names:
+            return self
+
+        # Answer from the in-memory bitmap index when it is enabled
+        from .skill_index import resolve_skill_ids
+        profile_ids = resolve_skill_ids(names)
+        if profile_ids is not None:
+            return self.filter(id__in=profile_ids)
+
+        matching_profiles = (
+            ProfileSkill.objects
+            .filter(skill__name__in=names)
+            .values('profile')
+            .annotate(matched=Count('skill'))
+            .filter(matched=len(names))
+            .values('profile')
+        )
+        return self.filter(id__in=matching_profiles)
+
+
+class UserProfile(DirtyFieldsMixin, models.Model):
     # Choices for gender field
     GENDER_CHOICES = [
         ('male', 'Male'),
@@ -32,10 +85,274 @@ class UserProfile(models.Model):
     education = models.CharField(max_length=20, choices=EDUCATION_CHOICES, blank=True)
     work_experience = models.CharField(max_length=20, choices=EXPERIENCE_CHOICES, default='fresher')
     skills = models.JSONField(default=list)
-    photo = models.ImageField(upload_to='profile_photos/', blank=True, null=True)
-    resume = models.FileField(upload_to='resumes/', blank=True, null=True)  
+    # Stored once per distinct content and shared through MediaBlob (see profiles.storage)
+    photo = models.ImageField(upload_to='profile_photos/', storage=get_media_storage, blank=True, null=True)
+    resume = models.FileField(upload_to='resumes/', storage=get_media_storage, blank=True, null=True)
+
+    # Resized, metadata-free WebP copies of the photo made by the run_photo_worker
+    # command (see profiles.photos), as {size in px: storage name}
+    PHOTO_PENDING = 'pending'
+    PHOTO_PROCESSING = 'processing'
+    PHOTO_DONE = 'done'
+    PHOTO_FAILED = 'failed'
+    PHOTO_STATUS_CHOICES = [
+        (PHOTO_PENDING, 'Pending'),
+        (PHOTO_PROCESSING, 'Processing'),
+        (PHOTO_DONE, 'Done'),
+        (PHOTO_FAILED, 'Failed'),
+    ]
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    photo_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    photo_status = models.CharField(
+        max_length=10, choices=PHOTO_STATUS_CHOICES, blank=True, editable=False, db_index=True,
+    )
+
+    # Text extracted from the resume by the run_resume_worker command (see profiles.resumes)
+    RESUME_PENDING = 'pending'
+    RESUME_PROCESSING = 'processing'
+    RESUME_DONE = 'done'
+    RESUME_FAILED = 'failed'
+    RESUME_STATUS_CHOICES = [
+        (RESUME_PENDING, 'Pending'),
+        (RESUME_PROCESSING, 'Processing'),
+        (RESUME_DONE, 'Done'),
+        (RESUME_FAILED, 'Failed'),
+    ]
+    resume_text = models.TextField(blank=True, editable=False)
+    # SHA-256 of the file the text was extracted from, so unchanged files are skipped
+    resume_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    resume_status = models.CharField(
+        max_length=10, choices=RESUME_STATUS_CHOICES, blank=True, editable=False, db_index=True,
+    )
 
     created_at = models.DateTimeField(default=timezone.now)
+    # Change-version stamp used for ETag / Last-Modified headers
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Normalized copy of skills, kept in sync on save (see profiles.signals)
+    skill_index = models.ManyToManyField(
+        'Skill', through='ProfileSkill', related_name='profiles', blank=True, editable=False
+    )
+
+    objects = UserProfileQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the export page walks this index newest first
+            models.Index(fields=['created_at', 'id'], name='profile_created_id_idx'),
+            # Export page filters on a choice field, newest first
+            models.Index(fields=['gender', 'created_at'], name='profile_gender_created_idx'),
+            models.Index(fields=['education', 'created_at'], name='profile_education_created_idx'),
+            models.Index(fields=['work_experience', 'created_at'], name='profile_experience_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.name}'s Profile"
+
+    def photo_url(self, size):
+        """
+        URL of the smallest photo rendition at least size pixels wide (or
+        the largest one), or of the original photo while none exists yet.
+        """
+        if self.photo_renditions:
+            sizes = sorted(int(key) for key in self.photo_renditions)
+            best = next((key for key in sizes if key >= size), sizes[-1])
+            return default_storage.url(self.photo_renditions[str(best)])
+        return self.photo.url if self.photo else ''
+
+    @property
+    def avatar_url(self):
+        return self.photo_url(120)
+
+    @property
+    def avatar_2x_url(self):
+        return self.photo_url(240)
+
+    def sync_skill_index(self):
+        """
+        Bring the normalized skill rows in line with the skills JSON list.
+        Returns the sets of skill names that were added and removed.
+        """
+        names = set(normalize_skills(self.skills))
+        current = dict(
+            ProfileSkill.objects.filter(profile=self).values_list('skill__name', 'id')
+        )
+
+        removed = set(current) - names
+        added = names - set(current)
+
+        if removed:
+            ProfileSkill.objects.filter(id__in=[current[name] for name in removed]).delete()
+            Skill.objects.filter(name__in=removed).update(profile_count=F('profile_count') - 1)
+        if added:
+            # Create missing skills, then link them to this profile
+            Skill.objects.bulk_create([Skill(name=name) for name in added], ignore_conflicts=True)
+            skill_ids = Skill.objects.filter(name__in=added).values_list('id', flat=True)
+            ProfileSkill.objects.bulk_create(
+                [ProfileSkill(profile=self, skill_id=skill_id) for skill_id in skill_ids],
+                ignore_conflicts=True,
+            )
+            Skill.objects.filter(name__in=added).update(profile_count=F('profile_count') + 1)
+        return added, removed
+
+
+class Skill(models.Model):
+    # Lowercased skill name shared by every profile listing it
+    name = models.CharField(max_length=SKILL_MAX_LENGTH, unique=True)
+    # Number of profiles listing this skill, maintained alongside ProfileSkill
+    profile_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+
+class ProfileSkill(models.Model):
+    # Through table linking a profile to each of its normalized skills
+    profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            # Skill first so "profiles with skill X" lookups use this index
+            models.UniqueConstraint(fields=['skill', 'profile'], name='unique_skill_profile'),
+        ]
+
+    def __str__(self):
+        return f"{self.profile_id}: {self.skill_id}"
+
+
+class MediaBlob(models.Model):
+    # Content-addressed file in media storage and the number of profile fields using it
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.IntegerField(default=0)
+    # Last reference change; unreferenced blobs are collected after a grace period
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # gc_media_blobs looks for unreferenced blobs
+            models.Index(fields=['refcount', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount})"
+
+    @classmethod
+    def touch(cls, name):
+        # Restart the grace period of a blob, adding an unreferenced row if there is none
+        if not cls.objects.filter(name=name).update(updated_at=timezone.now()):
+            cls.objects.get_or_create(name=name)
+
+    @classmethod
+    def acquire(cls, name):
+        blob, _ = cls.objects.get_or_create(name=name)
+        cls.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1, updated_at=timezone.now())
+
+    @classmethod
+    def release(cls, name):
+        # Names stored before content addressing have no blob row and are left alone
+        cls.objects.filter(name=name, refcount__gt=0).update(
+            refcount=F('refcount') - 1, updated_at=timezone.now()
+        )
+
+
+def export_file_path(instance, filename):
+    # Random file names so finished exports cannot be guessed under MEDIA_URL
+    return f"exports/{uuid.uuid4().hex}{os.path.splitext(filename)[1]}"
+
+
+class ExportJob(models.Model):
+    # Lifecycle of a background export
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    # Filter parameters as produced by profiles.filters.get_filter_params
+    params = models.JSONField(default=dict)
+    # Part file format of a parallel export (a zip of part files); empty for a single xlsx file
+    parts = models.CharField(max_length=10, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # Rows written so far, and the expected total once the job has started
+    row_count = models.PositiveIntegerField(default=0)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    file = models.FileField(upload_to=export_file_path, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers pick the oldest pending job
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Export #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        # Percentage of rows written, 100 once the job is done
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.row_count * 100 / self.total_rows))
+
+    @property
+    def is_downloadable(self):
+        return self.status == self.STATUS_DONE and bool(self.file)
+
+    @property
+    def download_name(self):
+        return 'filtered_profiles.zip' if self.parts else 'filtered_profiles.xlsx'
+
+
+class UploadSession(models.Model):
+    """
+    A resumable, chunked upload of a resume or photo (see profiles.uploads).
+    """
+    FIELD_CHOICES = [
+        ('resume', 'Resume'),
+        ('photo', 'Photo'),
+    ]
+    STATUS_OPEN = 'open'
+    STATUS_FINALIZING = 'finalizing'
+    STATUS_COMPLETE = 'complete'
+    STATUS_CHOICES = [
+        (STATUS_OPEN, 'Open'),
+        (STATUS_FINALIZING, 'Finalizing'),
+        (STATUS_COMPLETE, 'Complete'),
+    ]
+
+    # Random id, so upload URLs cannot be guessed
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    field = models.CharField(max_length=10, choices=FIELD_CHOICES)
+    filename = models.CharField(max_length=255)
+    # Declared total size and bytes received so far
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_OPEN)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Abandoned uploads are purged by age
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.field} upload {self.id} ({self.offset}/{self.size})"
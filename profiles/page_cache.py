@@ -0,0 +1,61 @@
+"""
+Per-user cache of the rendered profile page.
+
+Entries are keyed by user, a per-user version token, the edit flag and
+the CSRF secret the page's tokens were made from. Saving or deleting a
+profile or its user bumps the version (see profiles.signals), which makes
+every cached page of that user unreachable.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+
+
+def _version_key(user_id):
+    return f'profiles:page_version:{user_id}'
+
+
+def _page_key(request):
+    # Built once per request, so a page rendered while the version changes
+    # is stored under the old, already invalidated version
+    if not hasattr(request, '_profile_page_key'):
+        # get_token() makes sure the CSRF secret exists before it is used in the key
+        get_token(request)
+        secret = hashlib.md5(request.META.get('CSRF_COOKIE', '').encode()).hexdigest()
+        version = cache.get_or_set(_version_key(request.user.pk), _new_version, timeout=None)
+        edit = request.GET.get('edit') == '1'
+        request._profile_page_key = f'profiles:page:{request.user.pk}:{version}:{int(edit)}:{secret}'
+    return request._profile_page_key
+
+
+def get_cached_page(request):
+    """
+    Return the cached entry for this request's profile page, a dict with
+    'content', 'profile_id' and 'updated_at', or None.
+    """
+    if not hasattr(request, '_cached_profile_page'):
+        request._cached_profile_page = cache.get(_page_key(request))
+    return request._cached_profile_page
+
+
+def set_cached_page(request, profile, content):
+    timeout = getattr(settings, 'PROFILE_PAGE_CACHE_TIMEOUT', 600)
+    cache.set(_page_key(request), {
+        'content': content,
+        'profile_id': profile.pk,
+        'updated_at': profile.updated_at,
+    }, timeout)
+
+
+def _new_version():
+    # Random versions stay safe if the version key is evicted: a fresh one
+    # never matches entries cached under the old one
+    return uuid.uuid4().hex
+
+
+def invalidate_profile_page(user_id):
+    # Move the user on to a new version; old entries age out of the cache
+    cache.set(_version_key(user_id), _new_version(), timeout=None)
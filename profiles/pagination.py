@@ -0,0 +1,150 @@
+"""
+Keyset (cursor) pagination over profiles ordered newest first by
+(created_at, id). Each page is fetched with an indexed range predicate,
+so deep pages cost the same as the first one.
+"""
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+
+def get_page_size(value=None):
+    """
+    Return the requested page size clamped to the configured maximum,
+    or the default page size when none (or an invalid one) is given.
+    """
+    default = getattr(settings, 'PROFILE_EXPORT_PAGE_SIZE', 50)
+    maximum = getattr(settings, 'PROFILE_EXPORT_MAX_PAGE_SIZE', 200)
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
+
+
+def encode_cursor(profile):
+    # Opaque cursor pointing just after the given profile
+    return encode_key_cursor(profile.created_at, profile.pk)
+
+
+def encode_key_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Turn a cursor back into (created_at, id).
+    Raises ValueError for malformed cursors.
+    """
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = datetime.fromisoformat(created_at)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+
+    # Cursors are always produced from aware datetimes
+    if timezone.is_naive(created_at):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return created_at, pk
+
+
+def keyset_page(queryset, cursor=None, page_size=None):
+    """
+    Return (profiles, next_cursor) for the page starting after cursor.
+    next_cursor is None on the last page.
+    """
+    page_size = page_size or get_page_size()
+    queryset = _after_cursor(queryset, cursor)
+
+    # Fetch one extra row to find out whether there is a next page
+    profiles = list(queryset[:page_size + 1])
+    if len(profiles) > page_size:
+        profiles = profiles[:page_size]
+        return profiles, encode_cursor(profiles[-1])
+    return profiles, None
+
+
+def keyset_values_page(queryset, fields, cursor=None, page_size=None):
+    """
+    Like keyset_page, but SELECT only the given fields and return the page
+    as value tuples in fields order, without building model instances.
+    """
+    page_size = page_size or get_page_size()
+    rows = list(_values_page_query(queryset, fields, cursor, page_size))
+    return _values_page(rows, page_size)
+
+
+async def akeyset_values_page(queryset, fields, cursor=None, page_size=None):
+    # Async version of keyset_values_page, for async views
+    page_size = page_size or get_page_size()
+    rows = [row async for row in _values_page_query(queryset, fields, cursor, page_size)]
+    return _values_page(rows, page_size)
+
+
+def _values_page_query(queryset, fields, cursor, page_size):
+    # The sort key is selected after the requested fields to build the cursor;
+    # one extra row tells whether there is a next page
+    queryset = _after_cursor(queryset, cursor)
+    return queryset.values_list(*fields, 'created_at', 'id')[:page_size + 1]
+
+
+def _values_page(rows, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_key_cursor(*rows[-1][-2:])
+    return [row[:-2] for row in rows], next_cursor
+
+
+def _after_cursor(queryset, cursor):
+    # Newest first, starting just after the cursor's (created_at, id)
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    return queryset
+
+
+def offset_page(ids, cursor=None, page_size=None):
+    """
+    Return (ids, next_cursor) for a page of an already ordered id list,
+    such as ranked search results, which have no stable sort key to page on.
+    """
+    page_size = page_size or get_page_size()
+    offset = 0
+    if cursor:
+        try:
+            kind, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            offset = int(offset)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+        if kind != 'offset' or offset < 0:
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+
+    end = offset + page_size
+    next_cursor = None
+    if end < len(ids):
+        next_cursor = base64.urlsafe_b64encode(f"offset|{end}".encode()).decode()
+    return ids[offset:end], next_cursor
+
+
+def cached_count(queryset, params):
+    """
+    Count the rows matching params, reusing a recent count for the same
+    filters instead of running COUNT(*) on every page view. Counts are
+    invalidated together with the result cache.
+    """
+    # Imported here because the result cache itself pages with this module
+    from .result_cache import filter_key
+    key = 'profiles:count:' + filter_key(params)
+
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, getattr(settings, 'PROFILE_EXPORT_COUNT_TIMEOUT', 60))
+    return count
@@ -0,0 +1,107 @@
+"""
+Parallel export: the filtered profiles are split into primary key ranges,
+each range is rendered to its own part file in a separate process, and the
+parts are collected, in id order, into a single zip archive.
+
+export_parallel() forks, so it only runs in the export job workers and
+management commands, never inside a web request.
+"""
+import math
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .exports import get_chunk_size, profile_rows, write_csv, write_xlsx
+from .filters import filter_profiles
+
+# Part file formats and the writer used for each
+PART_WRITERS = {
+    'xlsx': write_xlsx,
+    'csv': write_csv,
+}
+
+
+def get_worker_count():
+    # Number of processes used for a parallel export
+    return getattr(settings, 'PROFILE_EXPORT_WORKERS', None) or os.cpu_count() or 1
+
+
+def split_id_ranges(queryset, parts):
+    """
+    Split the queryset into at most `parts` contiguous primary key ranges
+    holding roughly the same number of rows. Returns (first id, next range's
+    first id) pairs; the upper bound of the last range is None.
+    """
+    total = queryset.count()
+    if not total:
+        return []
+
+    size = math.ceil(total / parts)
+    # Number the rows by id and keep every size-th one, in a single query
+    numbered = queryset.order_by().annotate(row=Window(RowNumber(), order_by=F('id').asc()))
+    starts = list(
+        numbered.filter(row__in=range(1, total + 1, size)).order_by('id').values_list('id', flat=True)
+    )
+    return list(zip(starts, starts[1:] + [None]))
+
+
+def render_part(params, id_range, part_format, path):
+    """
+    Render the profiles matching params within id_range to a part file.
+    Runs inside a worker process; returns the number of rows written.
+    """
+    start, stop = id_range
+    queryset = filter_profiles(params).filter(id__gte=start).order_by('id')
+    if stop is not None:
+        queryset = queryset.filter(id__lt=stop)
+
+    count = 0
+
+    def counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    with open(path, 'wb') as output:
+        profiles = queryset.iterator(chunk_size=get_chunk_size())
+        PART_WRITERS[part_format](counted(profile_rows(profiles)), output)
+    return count
+
+
+def export_parallel(params, output, workers=None, part_format='xlsx'):
+    """
+    Export the profiles matching params to output (a binary file object)
+    as a zip of part files, rendering the parts in a process pool.
+    Returns the total number of rows written.
+    """
+    workers = workers or get_worker_count()
+    ranges = split_id_ranges(filter_profiles(params), workers)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = [os.path.join(tmpdir, f'part-{i + 1:04d}.{part_format}') for i in range(len(ranges))]
+        jobs = [(params, id_range, part_format, path) for id_range, path in zip(ranges, paths)]
+
+        if workers == 1 or len(jobs) <= 1:
+            counts = [render_part(*job) for job in jobs]
+        else:
+            # Forked workers must open their own database connections
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                counts = list(pool.map(render_part, *zip(*jobs)))
+
+        # Parts are already compressed (xlsx) or compress well (csv)
+        compression = zipfile.ZIP_STORED if part_format == 'xlsx' else zipfile.ZIP_DEFLATED
+        with zipfile.ZipFile(output, 'w', compression) as archive:
+            for path in paths:
+                archive.write(path, os.path.basename(path))
+
+    return sum(counts)
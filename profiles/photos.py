@@ -0,0 +1,176 @@
+"""
+Profile photo renditions.
+
+Saving a profile with a new photo marks it pending (see profiles.signals).
+Workers started with the run_photo_worker management command claim
+pending profiles and write square WebP renditions of the photo in each of
+PROFILE_PHOTO_SIZES. Renditions are rotated according to the EXIF
+orientation and carry no metadata. Pages show the renditions (see
+UserProfile.photo_url) instead of the uploaded original.
+"""
+import hashlib
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import UserProfile
+from .page_cache import invalidate_profile_page
+
+logger = logging.getLogger(__name__)
+
+
+def get_sizes():
+    # Edge lengths in pixels of the square renditions made for every photo
+    return getattr(settings, 'PROFILE_PHOTO_SIZES', (64, 120, 240))
+
+
+def get_quality():
+    return getattr(settings, 'PROFILE_PHOTO_QUALITY', 80)
+
+
+def render_renditions(fileobj, sizes):
+    """
+    Return {size: WebP bytes} with a square crop of the image for each size.
+    """
+    with Image.open(fileobj) as image:
+        # Let JPEG decode at a reduced scale when the photo is much larger than needed
+        image.draft('RGB', (max(sizes), max(sizes)))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+        renditions = {}
+        for size in sizes:
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            output = BytesIO()
+            # A newly built image carries no EXIF or other metadata
+            thumbnail.save(output, 'WEBP', quality=get_quality(), method=4)
+            renditions[size] = output.getvalue()
+        return renditions
+
+
+def _delete_files(storage, names):
+    for name in names:
+        storage.delete(name)
+
+
+def mark_photo_changed(profile):
+    """
+    Queue a new photo for processing, or drop the renditions when the
+    photo was removed.
+    """
+    if profile.photo:
+        profile.photo_status = UserProfile.PHOTO_PENDING
+        UserProfile.objects.filter(pk=profile.pk).update(photo_status=profile.photo_status)
+        profile.mark_clean('photo_status')
+        return
+
+    delete_renditions(profile)
+    profile.photo_renditions, profile.photo_sha256, profile.photo_status = {}, '', ''
+    UserProfile.objects.filter(pk=profile.pk).update(photo_renditions={}, photo_sha256='', photo_status='')
+    profile.mark_clean('photo_renditions', 'photo_sha256', 'photo_status')
+
+
+def delete_renditions(profile):
+    # Remove the profile's rendition files once the current transaction commits
+    names = list(profile.photo_renditions.values())
+    if names:
+        transaction.on_commit(lambda: _delete_files(default_storage, names))
+
+
+def claim_next_photo():
+    """
+    Atomically move the oldest pending profile to processing and return it,
+    or return None when nothing is pending.
+    """
+    while True:
+        profile_id = (
+            UserProfile.objects.filter(photo_status=UserProfile.PHOTO_PENDING)
+            .order_by('id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if profile_id is None:
+            return None
+
+        claimed = UserProfile.objects.filter(id=profile_id, photo_status=UserProfile.PHOTO_PENDING).update(
+            photo_status=UserProfile.PHOTO_PROCESSING
+        )
+        if claimed:
+            return UserProfile.objects.only(
+                'id', 'user_id', 'photo', 'photo_sha256', 'photo_renditions'
+            ).get(id=profile_id)
+
+
+def process_photo(profile):
+    """
+    Write the renditions of a claimed profile's photo.
+    Returns True when new renditions were written.
+    """
+    # Renditions belong to one profile, so they live outside the shared blob storage
+    storage = default_storage
+    sizes = get_sizes()
+    try:
+        with profile.photo.open('rb') as fileobj:
+            digest = hashlib.sha256(fileobj.read()).hexdigest()
+            renditions = None
+            if digest != profile.photo_sha256 or set(profile.photo_renditions) != {str(s) for s in sizes}:
+                fileobj.seek(0)
+                renditions = {
+                    str(size): storage.save(
+                        f'profile_photos/renditions/{profile.pk}/{digest[:16]}-{size}.webp', ContentFile(data)
+                    )
+                    for size, data in render_renditions(fileobj, sizes).items()
+                }
+    except Exception:
+        logger.exception("Processing photo of profile %s failed", profile.pk)
+        UserProfile.objects.filter(id=profile.pk, photo_status=UserProfile.PHOTO_PROCESSING).update(
+            photo_status=UserProfile.PHOTO_FAILED
+        )
+        return False
+
+    with transaction.atomic():
+        # Only finish if no newer upload put the profile back to pending meanwhile
+        fields = {'photo_status': UserProfile.PHOTO_DONE}
+        if renditions is not None:
+            # updated_at moves so the profile page's ETag changes
+            fields.update(photo_renditions=renditions, photo_sha256=digest, updated_at=timezone.now())
+        updated = UserProfile.objects.filter(
+            id=profile.pk, photo_status=UserProfile.PHOTO_PROCESSING
+        ).update(**fields)
+
+        if renditions is None:
+            return False
+        if not updated:
+            _delete_files(storage, renditions.values())
+            return False
+
+        old = set(profile.photo_renditions.values()) - set(renditions.values())
+        transaction.on_commit(lambda: _delete_files(storage, old))
+        transaction.on_commit(lambda: invalidate_profile_page(profile.user_id))
+    return True
+
+
+def process_pending_photos():
+    """
+    Process pending photos until none are left. Returns how many were processed.
+    """
+    count = 0
+    while True:
+        profile = claim_next_photo()
+        if profile is None:
+            return count
+        process_photo(profile)
+        count += 1
+
+
+def requeue_stuck_photos():
+    # Put profiles left processing by a stopped worker back in the queue
+    return UserProfile.objects.filter(photo_status=UserProfile.PHOTO_PROCESSING).update(
+        photo_status=UserProfile.PHOTO_PENDING
+    )
@@ -0,0 +1,143 @@
+"""
+Cache of export page results keyed by the normalized filter set.
+
+Each entry holds the (created_at, id) keys of the matching profiles in
+ascending order, so repeat searches can count and paginate without running
+the filter query again, and re-downloads only fetch rows by primary key.
+Entries live in the PROFILE_RESULT_CACHE cache alias (TTL and LRU eviction
+are configured there) and are invalidated all at once by bumping a
+generation number whenever a profile or its user's exported fields change.
+"""
+import bisect
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .filters import filter_profiles, normalize_filter_params
+from .models import UserProfile
+from .pagination import decode_cursor, encode_key_cursor
+
+GENERATION_KEY = 'profiles:results:generation'
+HITS_KEY = 'profiles:results:hits'
+MISSES_KEY = 'profiles:results:misses'
+
+# Cached in place of the keys when a result set is too large to cache, so
+# the next lookup for the same filters does not read it again to find out
+TOO_LARGE = 'too-large'
+
+
+def get_cache():
+    return caches[getattr(settings, 'PROFILE_RESULT_CACHE', 'default')]
+
+
+def _incr(key):
+    # Counters are created on first use; add() is a no-op if one already exists
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def get_generation():
+    # Current generation number, bumped by invalidate_results()
+    return get_cache().get_or_set(GENERATION_KEY, 1, timeout=None)
+
+
+def filter_key(params):
+    """
+    Return the key of a filter set for the current generation: equivalent
+    filters give the same key, and every key changes on invalidation.
+    """
+    generation = get_generation()
+    normalized = json.dumps(normalize_filter_params(params), sort_keys=True, default=str)
+    return f"{generation}:{hashlib.md5(normalized.encode()).hexdigest()}"
+
+
+def _cache_key(params):
+    return f"profiles:results:{filter_key(params)}"
+
+
+def get_result_keys(params):
+    """
+    Return the ascending (created_at, id) keys of the profiles matching
+    params, from the cache when possible. Returns None when the result set
+    is larger than PROFILE_RESULT_CACHE_MAX_IDS; that is cached too, until
+    the next invalidation.
+    """
+    cache = get_cache()
+    key = _cache_key(params)
+
+    keys = cache.get(key)
+    if keys is not None:
+        _incr(HITS_KEY)
+        return None if keys == TOO_LARGE else keys
+    _incr(MISSES_KEY)
+
+    limit = getattr(settings, 'PROFILE_RESULT_CACHE_MAX_IDS', 10000)
+    keys = list(
+        filter_profiles(params)
+        .order_by('created_at', 'id')
+        .values_list('created_at', 'id')[:limit + 1]
+    )
+    if len(keys) > limit:
+        cache.set(key, TOO_LARGE)
+        return None
+
+    cache.set(key, keys)
+    return keys
+
+
+def page_from_keys(keys, cursor=None, page_size=50):
+    """
+    Return (profile ids, next cursor) for a newest-first page of cached keys,
+    using the same cursors as profiles.pagination.keyset_page.
+    """
+    end = len(keys)
+    if cursor:
+        end = bisect.bisect_left(keys, decode_cursor(cursor))
+
+    start = max(0, end - page_size)
+    page = keys[start:end][::-1]
+    next_cursor = encode_key_cursor(*page[-1]) if start > 0 and page else None
+    return [pk for _, pk in page], next_cursor
+
+
+def profiles_by_ids(ids, chunk_size=2000):
+    """
+    Yield the profiles (with users) for ids, in the given order,
+    fetched by primary key one chunk at a time.
+    """
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        profiles = UserProfile.objects.select_related('user').in_bulk(chunk)
+        for pk in chunk:
+            if pk in profiles:
+                yield profiles[pk]
+
+
+def invalidate_results():
+    # Bump the generation so every existing entry is ignored and ages out
+    cache = get_cache()
+    cache.add(GENERATION_KEY, 1, timeout=None)
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, timeout=None)
+
+
+def get_stats():
+    cache = get_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 3) if lookups else None,
+        'generation': cache.get(GENERATION_KEY, 1),
+    }
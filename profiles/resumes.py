@@ -0,0 +1,211 @@
+"""
+Resume text extraction and keyword search over resumes.
+
+Saving a profile with a new resume marks it pending (see profiles.signals).
+Workers started with the run_resume_worker management command claim
+pending profiles, extract the PDF text with pypdf and store it in
+resume_text, skipping files whose SHA-256 has not changed. On SQLite builds
+with FTS5 the text is also kept in the profiles_resume_fts index, which
+ranks keyword matches with bm25; other databases fall back to substring
+lookups ordered newest first.
+"""
+import hashlib
+import logging
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+
+from .models import UserProfile
+
+# Listed in requirements.txt; only the resume worker needs it, so the site still
+# starts without it and the worker reports the missing package
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+logger = logging.getLogger(__name__)
+
+# FTS5 table created by migration 0011 when the SQLite build supports it
+FTS_TABLE = 'profiles_resume_fts'
+
+# Databases checked for the FTS table, by database name
+_fts_tables = {}
+
+
+def get_search_limit():
+    # Most resume matches considered for a single keyword search
+    return getattr(settings, 'PROFILE_RESUME_SEARCH_LIMIT', 1000)
+
+
+def get_max_chars():
+    # Extracted text is cut off after this many characters
+    return getattr(settings, 'PROFILE_RESUME_MAX_CHARS', 100_000)
+
+
+def has_fts():
+    # Whether the current database has the FTS5 index
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        _fts_tables[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[name]
+
+
+def keyword_terms(keywords):
+    """
+    Split free-text keywords into a sorted list of unique lowercase words.
+    """
+    return sorted(set(re.findall(r'\w+', (keywords or '').lower())))
+
+
+def search_resume_ids(terms, limit=None):
+    """
+    Return the ids of the profiles whose resume contains every term,
+    best match first, at most PROFILE_RESUME_SEARCH_LIMIT of them.
+    """
+    if not terms:
+        return []
+    limit = limit or get_search_limit()
+
+    if has_fts():
+        # Each term is quoted, so the input can never be read as FTS5 syntax
+        query = ' '.join(f'"{term}"' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s',
+                [query, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    queryset = UserProfile.objects.filter(resume_status=UserProfile.RESUME_DONE)
+    for term in terms:
+        queryset = queryset.filter(resume_text__icontains=term)
+    return list(queryset.order_by('-created_at', '-id').values_list('id', flat=True)[:limit])
+
+
+def index_resume_text(profile_id, text):
+    # Replace the profile's entry in the FTS index
+    if not has_fts():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [profile_id])
+        if text:
+            cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, resume_text) VALUES (%s, %s)', [profile_id, text])
+
+
+def mark_resume_changed(profile):
+    """
+    Queue a new resume for extraction, or clear the extracted text when
+    the resume was removed.
+    """
+    if profile.resume:
+        profile.resume_status = UserProfile.RESUME_PENDING
+        UserProfile.objects.filter(pk=profile.pk).update(resume_status=profile.resume_status)
+        profile.mark_clean('resume_status')
+        return
+
+    profile.resume_text = profile.resume_sha256 = profile.resume_status = ''
+    UserProfile.objects.filter(pk=profile.pk).update(resume_text='', resume_sha256='', resume_status='')
+    profile.mark_clean('resume_text', 'resume_sha256', 'resume_status')
+    index_resume_text(profile.pk, '')
+
+
+def extract_text(fileobj):
+    """
+    Return the text of every page of a PDF file object.
+    """
+    if pypdf is None:
+        raise ImproperlyConfigured("Extracting resume text requires the pypdf package.")
+    reader = pypdf.PdfReader(fileobj)
+    text = '\n'.join(page.extract_text() or '' for page in reader.pages)
+    return text[:get_max_chars()]
+
+
+def _sha256(fileobj):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(64 * 1024), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def claim_next_resume():
+    """
+    Atomically move the oldest pending profile to processing and return it,
+    or return None when nothing is pending.
+    """
+    while True:
+        profile_id = (
+            UserProfile.objects.filter(resume_status=UserProfile.RESUME_PENDING)
+            .order_by('id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if profile_id is None:
+            return None
+
+        claimed = UserProfile.objects.filter(id=profile_id, resume_status=UserProfile.RESUME_PENDING).update(
+            resume_status=UserProfile.RESUME_PROCESSING
+        )
+        if claimed:
+            return UserProfile.objects.only('id', 'resume', 'resume_sha256').get(id=profile_id)
+
+
+def process_resume(profile):
+    """
+    Extract and store the text of a claimed profile's resume.
+    Returns True when new text was extracted.
+    """
+    try:
+        with profile.resume.open('rb') as fileobj:
+            digest = _sha256(fileobj)
+            text = None
+            if digest != profile.resume_sha256:
+                fileobj.seek(0)
+                text = extract_text(fileobj)
+    except Exception:
+        logger.exception("Extracting resume of profile %s failed", profile.pk)
+        UserProfile.objects.filter(id=profile.pk, resume_status=UserProfile.RESUME_PROCESSING).update(
+            resume_status=UserProfile.RESUME_FAILED
+        )
+        return False
+
+    with transaction.atomic():
+        # Only finish if no newer upload put the profile back to pending meanwhile
+        fields = {'resume_status': UserProfile.RESUME_DONE}
+        if text is not None:
+            fields.update(resume_text=text, resume_sha256=digest)
+        updated = UserProfile.objects.filter(
+            id=profile.pk, resume_status=UserProfile.RESUME_PROCESSING
+        ).update(**fields)
+
+        if not updated or text is None:
+            return False
+        index_resume_text(profile.pk, text)
+
+        # Cached keyword searches may now match differently. Imported here
+        # because the result cache depends on the filters, which use this module.
+        from .result_cache import invalidate_results
+        transaction.on_commit(invalidate_results)
+    return True
+
+
+def process_pending_resumes():
+    """
+    Process pending resumes until none are left. Returns how many were processed.
+    """
+    count = 0
+    while True:
+        profile = claim_next_resume()
+        if profile is None:
+            return count
+        process_resume(profile)
+        count += 1
+
+
+def requeue_stuck_resumes():
+    # Put profiles left processing by a stopped worker back in the queue
+    return UserProfile.objects.filter(resume_status=UserProfile.RESUME_PROCESSING).update(
+        resume_status=UserProfile.RESUME_PENDING
+    )
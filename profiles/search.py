@@ -0,0 +1,51 @@
+"""
+Field projection for the JSON profile search API.
+
+Callers pick the fields they need with ?fields=name,email,...; only those
+columns are SELECTed and each row is serialized straight from its value
+tuple.
+"""
+
+# Public field name -> ORM lookup selected for it
+SEARCH_FIELDS = {
+    'id': 'id',
+    'name': 'user__name',
+    'email': 'user__email',
+    'mobile_no': 'user__mobile_no',
+    'gender': 'gender',
+    'dob': 'dob',
+    'education': 'education',
+    'work_experience': 'work_experience',
+    'skills': 'skills',
+    'photo': 'photo',
+    'resume': 'resume',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+# Returned when the caller does not ask for specific fields
+DEFAULT_SEARCH_FIELDS = ['id', 'name', 'email', 'gender', 'education', 'work_experience', 'skills', 'created_at']
+
+
+def get_search_fields(value):
+    """
+    Parse a comma separated ?fields= value into a list of field names,
+    keeping the caller's order. Raises ValueError for unknown fields.
+    """
+    if not value:
+        return list(DEFAULT_SEARCH_FIELDS)
+
+    fields = []
+    for name in value.split(','):
+        name = name.strip()
+        if not name or name in fields:
+            continue
+        if name not in SEARCH_FIELDS:
+            raise ValueError(f"Unknown field: {name}")
+        fields.append(name)
+    return fields or list(DEFAULT_SEARCH_FIELDS)
+
+
+def search_results(rows, fields):
+    # One dict per value tuple; files are returned by their stored name
+    return [dict(zip(fields, row)) for row in rows]
@@ -0,0 +1,128 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import MediaBlob, Skill, User, UserProfile, normalize_skills
+from .page_cache import invalidate_profile_page
+from .photos import delete_renditions, mark_photo_changed
+from .result_cache import invalidate_results
+from .resumes import index_resume_text, mark_resume_changed
+from .skill_index import skill_index
+from .skills import invalidate_skill_vocabulary
+
+
+@receiver(post_save, sender=UserProfile)
+def sync_profile_skills(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Keep the normalized skill table in line with the skills JSON list
+    if raw:
+        return
+    # Partial saves that leave skills alone cannot change the index
+    if update_fields is not None and 'skills' not in update_fields:
+        return
+    added, removed = instance.sync_skill_index()
+
+    # Mirror the change in the bitmap index and vocabulary once committed
+    if added or removed:
+        transaction.on_commit(lambda: skill_index.update(instance.pk, added, removed))
+        transaction.on_commit(invalidate_skill_vocabulary)
+
+
+@receiver(pre_delete, sender=UserProfile)
+def release_profile_skill_counts(sender, instance, **kwargs):
+    # Runs inside the delete transaction, before the through rows cascade away
+    Skill.objects.filter(profiles=instance).update(profile_count=F('profile_count') - 1)
+
+
+@receiver(post_delete, sender=UserProfile)
+def remove_profile_skills(sender, instance, **kwargs):
+    profile_id = instance.pk
+    names = normalize_skills(instance.skills)
+    transaction.on_commit(lambda: skill_index.update(profile_id, removed=names))
+    transaction.on_commit(invalidate_skill_vocabulary)
+
+
+# User fields that appear in profile search results and exports
+EXPORTED_USER_FIELDS = {'name', 'email', 'mobile_no'}
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_results(sender, **kwargs):
+    # Any profile change can alter which profiles match a cached filter set
+    transaction.on_commit(invalidate_results)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_results(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login, which never shows up in results
+    if update_fields is not None and not EXPORTED_USER_FIELDS.intersection(update_fields):
+        return
+    transaction.on_commit(invalidate_results)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_profile_page(sender, instance, **kwargs):
+    # Covers the profile page POST as well as edits made in the admin
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_profile_page(user_id))
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_page(sender, instance, update_fields=None, **kwargs):
+    # The profile page shows the user's details; logins only touch last_login
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_profile_page(user_id))
+
+
+@receiver(post_save, sender=UserProfile)
+def queue_file_processing(sender, instance, created, raw=False, **kwargs):
+    # Queue resume text extraction and photo renditions when the files change
+    if raw:
+        return
+    dirty = instance.get_dirty_fields()
+    if (dirty is None or 'resume' in dirty) and not (created and not instance.resume):
+        mark_resume_changed(instance)
+    if (dirty is None or 'photo' in dirty) and not (created and not instance.photo):
+        mark_photo_changed(instance)
+
+
+@receiver(post_delete, sender=UserProfile)
+def remove_processed_files(sender, instance, **kwargs):
+    index_resume_text(instance.pk, '')
+    delete_renditions(instance)
+
+
+# Profile file fields stored in content-addressed media storage
+MEDIA_FIELDS = ('resume', 'photo')
+
+
+@receiver(post_save, sender=UserProfile)
+def count_media_references(sender, instance, created, raw=False, **kwargs):
+    # Move the references from the previous files to the new ones
+    if raw:
+        return
+    dirty = instance.get_dirty_fields()
+    for field in MEDIA_FIELDS:
+        if dirty is not None and field not in dirty:
+            continue
+        old = None if created else instance.get_loaded_value(field)
+        new = getattr(instance, field).name
+        if old == new:
+            continue
+        if new:
+            MediaBlob.acquire(new)
+        if old:
+            MediaBlob.release(old)
+
+
+@receiver(post_delete, sender=UserProfile)
+def release_media_references(sender, instance, **kwargs):
+    for field in MEDIA_FIELDS:
+        name = getattr(instance, field).name
+        if name:
+            MediaBlob.release(name)
@@ -0,0 +1,176 @@
+"""
+Optional process-local inverted index from skill name to the ids of the
+profiles that list it, stored as compressed bitmaps.
+
+Enable with PROFILE_SKILL_BITMAP_INDEX = True. Writes made in this process
+are applied incrementally once their transaction commits; writes made by
+other processes become visible when the index is rebuilt, at most
+PROFILE_SKILL_BITMAP_INDEX_TTL seconds later.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from accounts.instrumentation import timed
+
+# Ids are split into a high part selecting the container and a 16-bit low part
+CONTAINER_BITS = 16
+CONTAINER_MASK = (1 << CONTAINER_BITS) - 1
+
+
+class Bitmap:
+    """
+    Roaring-style bitmap of non-negative integer ids.
+    Ids are grouped into containers of 65536; each container is a Python int
+    used as a bitset, so sparse id ranges cost nothing and AND-ing two
+    bitmaps only touches containers present in both.
+    """
+
+    def __init__(self, containers=None):
+        self.containers = containers or {}
+
+    @classmethod
+    def from_ids(cls, ids):
+        # Set bits in a byte buffer per container and convert once at the end
+        buffers = {}
+        for id_ in ids:
+            buffer = buffers.get(id_ >> CONTAINER_BITS)
+            if buffer is None:
+                buffer = buffers[id_ >> CONTAINER_BITS] = bytearray((CONTAINER_MASK + 1) // 8)
+            low = id_ & CONTAINER_MASK
+            buffer[low >> 3] |= 1 << (low & 7)
+        return cls({high: int.from_bytes(buffer, 'little') for high, buffer in buffers.items()})
+
+    def add(self, id_):
+        high = id_ >> CONTAINER_BITS
+        self.containers[high] = self.containers.get(high, 0) | (1 << (id_ & CONTAINER_MASK))
+
+    def discard(self, id_):
+        high = id_ >> CONTAINER_BITS
+        bits = self.containers.get(high, 0) & ~(1 << (id_ & CONTAINER_MASK))
+        if bits:
+            self.containers[high] = bits
+        else:
+            self.containers.pop(high, None)
+
+    def copy(self):
+        # Containers are ints, so copying the dict copies the bitmap
+        return Bitmap(dict(self.containers))
+
+    def __and__(self, other):
+        if len(other.containers) < len(self.containers):
+            self, other = other, self
+        result = {}
+        for high, bits in self.containers.items():
+            common = bits & other.containers.get(high, 0)
+            if common:
+                result[high] = common
+        return Bitmap(result)
+
+    def __len__(self):
+        return sum(bits.bit_count() for bits in self.containers.values())
+
+    def __contains__(self, id_):
+        return bool(self.containers.get(id_ >> CONTAINER_BITS, 0) >> (id_ & CONTAINER_MASK) & 1)
+
+    def __iter__(self):
+        # Yield ids in ascending order
+        for high in sorted(self.containers):
+            base = high << CONTAINER_BITS
+            bits = self.containers[high]
+            while bits:
+                lowest = bits & -bits
+                yield base + lowest.bit_length() - 1
+                bits ^= lowest
+
+
+class SkillBitmapIndex:
+    """
+    Maps each lowercase skill name to a Bitmap of UserProfile ids.
+    Built lazily from the normalized skill table on first use.
+    """
+
+    def __init__(self):
+        self._bitmaps = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def build(self):
+        from .models import ProfileSkill
+
+        ids_by_skill = {}
+        rows = ProfileSkill.objects.values_list('skill__name', 'profile_id').iterator(chunk_size=10000)
+        for name, profile_id in rows:
+            ids_by_skill.setdefault(name, []).append(profile_id)
+
+        bitmaps = {name: Bitmap.from_ids(ids) for name, ids in ids_by_skill.items()}
+        with self._lock:
+            self._bitmaps = bitmaps
+            self._built_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._bitmaps = None
+
+    def is_stale(self):
+        ttl = getattr(settings, 'PROFILE_SKILL_BITMAP_INDEX_TTL', 300)
+        return self._bitmaps is None or time.monotonic() - self._built_at > ttl
+
+    def lookup(self, names):
+        """
+        Return a Bitmap of the profiles having every one of the given
+        (already normalized) skill names. The result is always a new
+        Bitmap, never one of the index's own, so callers can use it
+        while update() changes the index.
+        """
+        if self.is_stale():
+            self.build()
+
+        # update() changes the bitmaps in place, so they are only read under the lock
+        with self._lock:
+            bitmaps = [self._bitmaps.get(name) for name in names]
+            if not bitmaps or any(bitmap is None for bitmap in bitmaps):
+                return Bitmap()
+
+            # Intersect smallest first so the working set shrinks quickly
+            bitmaps.sort(key=lambda bitmap: len(bitmap.containers))
+            result = bitmaps[0].copy()
+            for bitmap in bitmaps[1:]:
+                result = result & bitmap
+            return result
+
+    def update(self, profile_id, added=(), removed=()):
+        # Apply a profile's skill changes; a no-op until the index is built
+        with self._lock:
+            if self._bitmaps is None:
+                return
+            for name in added:
+                self._bitmaps.setdefault(name, Bitmap()).add(profile_id)
+            for name in removed:
+                if name in self._bitmaps:
+                    self._bitmaps[name].discard(profile_id)
+
+
+# Index shared by every request handled by this process
+skill_index = SkillBitmapIndex()
+
+
+def is_enabled():
+    return getattr(settings, 'PROFILE_SKILL_BITMAP_INDEX', False)
+
+
+def resolve_skill_ids(names):
+    """
+    Resolve a list of normalized skill names to a sorted list of profile ids
+    using the bitmap index. Returns None when the index is disabled or the
+    result is too large to pass back to the database as an id list.
+    """
+    if not is_enabled():
+        return None
+
+    with timed('skills'):
+        bitmap = skill_index.lookup(names)
+    if len(bitmap) > getattr(settings, 'PROFILE_SKILL_BITMAP_MAX_IDS', 10000):
+        return None
+    return list(bitmap)
@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import ProfileSkill, Skill, normalize_skills
+
+# Cache key holding the (name, profile count) list of every skill in use
+VOCABULARY_CACHE_KEY = 'profiles:skill_vocabulary'
+
+
+def index_profiles(profiles):
+    """
+    Create the normalized skill rows for a batch of profiles in bulk.
+    Used for profiles inserted with bulk_create, which skips the
+    post_save signal that normally keeps the skill table in sync.
+    """
+    profile_names = [(profile.pk, normalize_skills(profile.skills)) for profile in profiles]
+    all_names = set().union(*(names for _, names in profile_names)) if profile_names else set()
+    if not all_names:
+        return
+
+    Skill.objects.bulk_create([Skill(name=name) for name in all_names], ignore_conflicts=True)
+    skill_ids = dict(Skill.objects.filter(name__in=all_names).values_list('name', 'id'))
+
+    ProfileSkill.objects.bulk_create(
+        [
+            ProfileSkill(profile_id=profile_id, skill_id=skill_ids[name])
+            for profile_id, names in profile_names
+            for name in names
+        ],
+        ignore_conflicts=True,
+    )
+    refresh_skill_counts(all_names)
+
+
+def refresh_skill_counts(names=None):
+    """
+    Recount Skill.profile_count from the through table, for the given
+    skill names or for every skill.
+    """
+    counts = (
+        ProfileSkill.objects.filter(skill=OuterRef('pk'))
+        .values('skill')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    skills = Skill.objects.all() if names is None else Skill.objects.filter(name__in=names)
+    skills.update(profile_count=Coalesce(Subquery(counts), 0))
+    invalidate_skill_vocabulary()
+
+
+def invalidate_skill_vocabulary():
+    cache.delete(VOCABULARY_CACHE_KEY)
+
+
+def skill_vocabulary(top=None):
+    """
+    Return a list of (skill name, profile count) for every skill in use,
+    sorted by name. With top, return only the top most common skills,
+    most common first. Served from the cache and rebuilt from the Skill
+    table (one row per skill) when missing.
+    """
+    vocabulary = cache.get(VOCABULARY_CACHE_KEY)
+    if vocabulary is None:
+        vocabulary = list(
+            Skill.objects.filter(profile_count__gt=0)
+            .order_by('name')
+            .values_list('name', 'profile_count')
+        )
+        timeout = getattr(settings, 'PROFILE_SKILL_VOCABULARY_TIMEOUT', 3600)
+        cache.set(VOCABULARY_CACHE_KEY, vocabulary, timeout)
+
+    if top is not None:
+        return sorted(vocabulary, key=lambda item: (-item[1], item[0]))[:top]
+    return vocabulary
@@ -0,0 +1,60 @@
+"""
+Content-addressed storage for resumes and photos.
+
+Uploads are stored under their SHA-256, e.g. resumes/3f/3fa4...e1.pdf, so
+the same file uploaded again (by anyone) is stored once and not written
+again. Profiles reference blobs through MediaBlob rows whose reference
+counts are kept by profiles.signals; saving a blob touches its row, and the
+gc_media_blobs management command deletes blobs that are no longer
+referenced and were not touched during its grace period.
+"""
+import hashlib
+import os
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def blob_name(self, name, content):
+        """
+        Return the content-addressed name for storing content uploaded as
+        name: the upload directory, a two-character fan-out directory, and
+        the hash with the original (lowercased) extension.
+        """
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+
+        extension = os.path.splitext(name)[1].lower()[:10]
+        return posixpath.join(posixpath.dirname(name), digest[:2], digest + extension)
+
+    def _save(self, name, content):
+        # Imported here because the models use this storage
+        from .models import MediaBlob
+
+        name = self.blob_name(name, content)
+        with transaction.atomic():
+            # Touch the blob before looking for it, so the garbage collector
+            # (which only deletes blobs untouched for its grace period) cannot
+            # remove it before the upload is attached to a profile
+            MediaBlob.touch(name)
+            # Identical content is already stored: nothing to write
+            if self.exists(name):
+                return name
+
+        stored = super()._save(name, content)
+        if stored != name:
+            # Another upload of the same content won the race; keep its copy
+            self.delete(stored)
+        return name
+
+
+media_storage = ContentAddressedStorage()
+
+
+def get_media_storage():
+    # Used as a callable so migrations do not serialize the storage instance
+    return media_storage
@@ -1,3 +1,1164 @@
-from django.test import TestCase
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import posixpath
+import shutil
+import unittest
+import tempfile
+import zipfile
+from datetime import datetime, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from accounts.query_budget import QueryBudget, QueryBudgetExceeded, QueryBudgetTestMixin
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+from PIL import Image
+
+from .admin import SkillsFilter, UserProfileAdmin
+from . import exports, photos, resumes, views
+from .blobs import collect_unreferenced_blobs, collect_untracked_files, recount_references
+from .benchmarks import compare_results, make_pdf, summarize_timings
+from .filters import filter_profiles
+from .imports import hash_passwords, import_candidates, read_rows
+from .jobs import claim_next_job, run_job
+from .models import ExportJob, MediaBlob, ProfileSkill, UploadSession, UserProfile
+from .pagination import cached_count
+from .parallel_export import split_id_ranges
+from .result_cache import get_result_keys, get_stats
+from .skill_index import Bitmap, skill_index
+from .skills import skill_vocabulary
+from .storage import media_storage
+from .uploads import partial_path, purge_stale_uploads
+
+User = get_user_model()
+
+
+def clear_caches():
+    # Cached results from earlier tests would otherwise leak into the next one
+    for alias in caches:
+        caches[alias].clear()
+
+
+def create_profile(email, **kwargs):
+    # Create a user together with its profile
+    user = User.objects.create_user(
+        email=email, password='pass12345', name=email.split('@')[0],
+        mobile_no='9876543210', work_status='fresher',
+    )
+    kwargs.setdefault('gender', 'male')
+    return UserProfile.objects.create(user=user, **kwargs)
+
+
+def create_staff(**kwargs):
+    # Create a staff user, allowed into the export pages and the admin
+    return User.objects.create_user(
+        email='staff@example.com', password='pass12345', name='Staff',
+        mobile_no='9876543210', work_status='experienced', is_staff=True, **kwargs,
+    )
+
+
+class StaffClientMixin:
+    """
+    TestCase mixin starting every test from empty caches with a staff
+    user, self.staff, logged in to self.client. Set staff_is_superuser
+    for tests that need the admin's model permissions.
+    """
+    staff_is_superuser = False
+
+    def setUp(self):
+        super().setUp()
+        clear_caches()
+        self.staff = create_staff(is_superuser=self.staff_is_superuser)
+        self.client.force_login(self.staff)
+
+
+class ExportFilterPageTests(StaffClientMixin, TestCase):
+    def test_download_streams_filtered_workbook(self):
+        create_profile('alice@example.com', skills=['Python', 'Django'])
+        create_profile('bob@example.com', skills=['Java'])
+
+        response = self.client.get(reverse('export_filter_page'), {'download': '1', 'skills': 'python'})
+
+        self.assertTrue(response.streaming)
+        self.assertIn('filtered_profiles.xlsx', response['Content-Disposition'])
+        ws = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)['Profiles']
+        rows = list(ws.values)
+        self.assertEqual(rows[0][1], 'Email')
+        self.assertEqual([row[1] for row in rows[1:]], ['alice@example.com'])
+
+    def test_csv_download_streams_rows(self):
+        create_profile('alice@example.com', skills=['Python', 'Django'])
+
+        response = self.client.get(reverse('export_filter_page'), {'download': '1', 'format': 'csv'})
+
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ','.join(exports.EXPORT_HEADERS))
+        self.assertTrue(lines[1].startswith('alice,alice@example.com,9876543210,male'))
+        self.assertIn('"Python, Django"', lines[1])
+
+    @unittest.skipIf(exports.pyarrow is None, 'pyarrow is not installed')
+    def test_parquet_download(self):
+        create_profile('alice@example.com')
+
+        response = self.client.get(reverse('export_filter_page'), {'download': '1', 'format': 'parquet'})
+
+        table = exports.pyarrow.parquet.read_table(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(table.column('Email').to_pylist(), ['alice@example.com'])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse('export_filter_page'), {'download': '1', 'format': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_split_id_ranges_covers_every_profile(self):
+        profiles = [create_profile(f'user{i}@example.com', skills=['Python']) for i in range(5)]
+        create_profile('java@example.com', skills=['Java'])
+        # A count, then every range boundary in one query
+        with self.assertNumQueries(2):
+            ranges = split_id_ranges(filter_profiles({'skills': 'python'}), 2)
+        self.assertEqual(ranges, [(profiles[0].pk, profiles[3].pk), (profiles[3].pk, None)])
+
+    @override_settings(PROFILE_EXPORT_WORKERS=1)
+    def test_parallel_export_job_returns_zip_of_parts(self):
+        create_profile('alice@example.com', skills=['Python'])
+        create_profile('bob@example.com', skills=['Java'])
+
+        # Parallel exports run in the export workers, never in the request
+        self.assertEqual(
+            self.client.get(reverse('export_filter_page'), {'download': 'parallel'}).status_code, 200,
+        )
+        self.assertEqual(self.client.post(reverse('export_job_create'), {'parts': 'pdf'}).status_code, 400)
+        self.client.post(reverse('export_job_create'), {'skills': 'python', 'parts': 'csv'})
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root):
+            run_job(claim_next_job())
+            job = ExportJob.objects.get()
+            self.assertEqual((job.status, job.row_count), ('done', 1))
+            response = self.client.get(reverse('export_job_download', args=[job.pk]))
+
+        self.assertIn('filtered_profiles.zip', response['Content-Disposition'])
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), ['part-0001.csv'])
+        lines = archive.read('part-0001.csv').decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('alice,alice@example.com'))
+
+
+class ExportTimingTests(StaffClientMixin, TestCase):
+    def test_streamed_download_is_timed_until_sent(self):
+        create_profile('alice@example.com', skills=['python'])
+
+        with self.assertLogs('accounts.instrumentation', 'INFO') as logs:
+            response = self.client.get('/export-profiles/', {'download': '1', 'format': 'csv'})
+            # Nothing is logged until the body has been produced
+            self.assertEqual(logs.records, [])
+            b''.join(response.streaming_content)
+            response.close()
+
+        self.assertIn('db;dur=', response['Server-Timing'])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'export_filter_page')
+        self.assertGreater(record['serialize_ms'], 0)
+
+
+class ExportPaginationTests(StaffClientMixin, TestCase):
+    def test_pages_follow_cursor_newest_first(self):
+        profiles = [create_profile(f'user{i}@example.com') for i in range(5)]
+        url = reverse('export_filter_page')
+
+        # Small result sets are paged from the result cache, large ones from the database
+        for max_cached_ids in (10000, 0):
+            with self.subTest(max_cached_ids=max_cached_ids), \
+                    self.settings(PROFILE_RESULT_CACHE_MAX_IDS=max_cached_ids):
+                clear_caches()
+                response = self.client.get(url, {'page_size': 2})
+                self.assertEqual(response.context['profiles'], [profiles[4], profiles[3]])
+                self.assertEqual(response.context['total_count'], 5)
+
+                response = self.client.get(response.context['next_url'])
+                self.assertEqual(response.context['profiles'], [profiles[2], profiles[1]])
+
+                response = self.client.get(response.context['next_url'])
+                self.assertEqual(response.context['profiles'], [profiles[0]])
+                self.assertIsNone(response.context['next_url'])
+
+    @override_settings(PROFILE_RESULT_CACHE_MAX_IDS=0)
+    def test_total_count_follows_profile_writes(self):
+        create_profile('alice@example.com', skills=['Python'])
+        url = reverse('export_filter_page')
+        self.assertEqual(self.client.get(url, {'skills': 'python'}).context['total_count'], 1)
+
+        # Equivalent filters share the cached count
+        with self.assertNumQueries(0):
+            cached_count(None, {'skills': ' PYTHON'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_profile('bob@example.com', skills=['Python'])
+        self.assertEqual(self.client.get(url, {'skills': 'python'}).context['total_count'], 2)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse('export_filter_page'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProfileSearchApiTests(StaffClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('profile_search_api')
+
+    def test_pages_filtered_results_newest_first(self):
+        profiles = [create_profile(f'user{i}@example.com', skills=['Python']) for i in range(3)]
+        create_profile('java@example.com', skills=['Java'])
+
+        data = self.client.get(self.url, {'skills': 'python', 'page_size': 2}).json()
+        self.assertEqual([row['id'] for row in data['results']], [profiles[2].pk, profiles[1].pk])
+        self.assertEqual(data['results'][0]['email'], 'user2@example.com')
+
+        data = self.client.get(data['next']).json()
+        self.assertEqual([row['id'] for row in data['results']], [profiles[0].pk])
+        self.assertIsNone(data['next'])
+
+    def test_selects_only_requested_fields(self):
+        create_profile('alice@example.com', education='masters')
+
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(self.url, {'fields': 'email,education'}).json()
+        self.assertEqual(data['results'], [{'email': 'alice@example.com', 'education': 'masters'}])
+
+        sql = queries.captured_queries[-1]['sql']
+        self.assertIn('"email"', sql)
+        self.assertNotIn('"mobile_no"', sql)
+        self.assertNotIn('"skills"', sql)
+
+    def test_rejects_unknown_fields_and_bad_cursors(self):
+        self.assertEqual(self.client.get(self.url, {'fields': 'password'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 400)
+
+
+class AsyncViewTests(StaffClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.profiles = [create_profile(f'user{i}@example.com', skills=['Python']) for i in range(3)]
+        create_profile('java@example.com', skills=['Java'])
+
+    async def test_async_search_matches_sync_api(self):
+        await self.async_client.aforce_login(self.staff)
+        params = {'skills': 'python', 'page_size': 2, 'fields': 'id,email'}
+
+        data = (await self.async_client.get(reverse('async_profile_search_api'), params)).json()
+        self.assertEqual(data['results'], [
+            {'id': self.profiles[2].pk, 'email': 'user2@example.com'},
+            {'id': self.profiles[1].pk, 'email': 'user1@example.com'},
+        ])
+        data = (await self.async_client.get(data['next'])).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.profiles[0].pk])
+
+    async def test_async_csv_streams_filtered_rows(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse('async_export_csv'), {'skills': 'python'})
+        self.assertTrue(response.is_async)
+
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        rows = list(csv.reader(content.splitlines()))
+        self.assertEqual(rows[0], exports.EXPORT_HEADERS)
+        self.assertEqual(sorted(row[1] for row in rows[1:]), [f'user{i}@example.com' for i in range(3)])
+
+    async def test_async_views_require_staff(self):
+        response = await self.async_client.get(reverse('async_export_csv'))
+        self.assertEqual(response.status_code, 302)
+
+
+class ResultCacheTests(StaffClientMixin, TestCase):
+    def test_repeat_lookups_skip_the_filter_query(self):
+        alice = create_profile('alice@example.com', skills=['Python'])
+        create_profile('bob@example.com', skills=['Java'])
+
+        self.assertEqual(get_result_keys({'skills': 'python'}), [(alice.created_at, alice.pk)])
+        # Same filters after normalization: served from the cache
+        with self.assertNumQueries(0):
+            self.assertEqual(get_result_keys({'skills': ' PYTHON,'}), [(alice.created_at, alice.pk)])
+        self.assertEqual(get_stats()['hits'], 1)
+        self.assertEqual(get_stats()['misses'], 1)
+
+    def test_large_result_sets_are_only_counted_once(self):
+        create_profile('alice@example.com', skills=['Python'])
+        create_profile('bob@example.com', skills=['Python'])
+
+        with self.settings(PROFILE_RESULT_CACHE_MAX_IDS=1):
+            self.assertIsNone(get_result_keys({'skills': 'python'}))
+            with self.assertNumQueries(0):
+                self.assertIsNone(get_result_keys({'skills': 'python'}))
+
+    def test_downloads_keep_their_order_with_or_without_cached_keys(self):
+        # Same created_at, so only the id tells the rows apart
+        created_at = timezone.now()
+        profiles = [create_profile(f'user{i}@example.com') for i in range(3)]
+        UserProfile.objects.update(created_at=created_at)
+
+        emails = []
+        for max_cached_ids in (10000, 0):
+            clear_caches()
+            with self.settings(PROFILE_RESULT_CACHE_MAX_IDS=max_cached_ids):
+                response = self.client.get(reverse('export_filter_page'), {'download': '1', 'format': 'csv'})
+            rows = b''.join(response.streaming_content).decode().splitlines()[1:]
+            emails.append([row.split(',')[1] for row in rows])
+        self.assertEqual(emails[0], [profile.user.email for profile in reversed(profiles)])
+        self.assertEqual(emails[1], emails[0])
+
+    def test_profile_and_user_writes_invalidate(self):
+        alice = create_profile('alice@example.com', skills=['Python'])
+        self.assertEqual(len(get_result_keys({'skills': 'python'})), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            alice.skills = ['Java']
+            alice.save()
+        self.assertEqual(get_result_keys({'skills': 'python'}), [])
+
+        # Saving only last_login (as a login does) keeps cached results
+        generation = get_stats()['generation']
+        with self.captureOnCommitCallbacks(execute=True):
+            alice.user.save(update_fields=['last_login'])
+        self.assertEqual(get_stats()['generation'], generation)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            alice.user.name = 'Alice'
+            alice.user.save()
+        self.assertGreater(get_stats()['generation'], generation)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_profile_page_answers_304_until_profile_changes(self):
+        profile = create_profile('alice@example.com')
+        self.client.force_login(profile.user)
+        url = reverse('profile')
+
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+
+        with self.assertNumQueries(2):  # session, user; the version comes from the page cache
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Edit mode renders a different page
+        self.assertEqual(self.client.get(url, {'edit': '1'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.education = 'phd'
+            profile.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_export_page_answers_304_until_profiles_change(self):
+        self.client.force_login(create_staff())
+        profile = create_profile('alice@example.com')
+        url = reverse('export_filter_page')
+
+        etag = self.client.get(url, {'gender': 'male'})['ETag']
+        self.assertEqual(self.client.get(url, {'gender': 'male'}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, {'gender': 'female'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.delete()
+        self.assertEqual(self.client.get(url, {'gender': 'male'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ProfilePageCacheTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.profile = create_profile('alice@example.com', skills=['Python'])
+        self.client.force_login(self.profile.user)
+
+    def test_cached_get_makes_no_queries_after_user_lookup(self):
+        url = reverse('profile')
+        first = self.client.get(url)
+
+        with self.assertNumQueries(2):  # session, user
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+
+    def test_post_and_admin_edits_invalidate_the_cached_page(self):
+        url = reverse('profile')
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {
+                'name': 'Alice Smith', 'email': 'alice@example.com', 'mobile_no': '9876543210',
+                'gender': 'female', 'work_experience': 'fresher', 'skills[]': ['Python', 'SQL'],
+            })
+        self.assertContains(self.client.get(url), 'Alice Smith')
+
+        # A change made elsewhere, such as in the admin
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.refresh_from_db()
+            self.profile.skills = ['Rust']
+            self.profile.save()
+        self.assertContains(self.client.get(url), 'Rust')
+
+
+class ProfileUpdateTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.profile = create_profile(
+            'alice@example.com', gender='female', education='bachelors', skills=['Python', 'SQL'],
+        )
+        self.client.force_login(self.profile.user)
+        self.data = {
+            'name': 'alice', 'email': 'alice@example.com', 'mobile_no': '9876543210',
+            'gender': 'female', 'education': 'bachelors', 'work_experience': 'fresher',
+            'skills[]': ['Python', 'SQL'],
+        }
+
+    def post(self, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('profile'), data)
+        self.assertEqual(response.status_code, 302)
+        return [query['sql'] for query in queries.captured_queries]
+
+    def test_unchanged_post_does_no_update(self):
+        sql = self.post(self.data)
+        self.assertFalse([query for query in sql if query.startswith('UPDATE')], sql)
+
+    def test_changed_post_writes_only_changed_columns(self):
+        sql = self.post(dict(self.data, name='Alice Smith', education='masters'))
+        updates = [query for query in sql if query.startswith('UPDATE')]
+        # One for the profile, one for the user; no skill index work
+        self.assertEqual(len(updates), 2, sql)
+        self.assertIn('"education"', updates[0])
+        self.assertNotIn('"skills"', updates[0])
+        self.assertIn('"name"', updates[1])
+        self.assertNotIn('"password"', updates[1])
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.education, 'masters')
+        self.assertEqual(self.profile.user.name, 'Alice Smith')
+
+    def test_skill_change_updates_the_index(self):
+        self.post(dict(self.data, **{'skills[]': ['Python', 'Rust']}))
+        self.assertEqual(
+            sorted(ProfileSkill.objects.filter(profile=self.profile).values_list('skill__name', flat=True)),
+            ['python', 'rust'],
+        )
+
+
+class ResumeSearchTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def upload(self, profile, content=b'%PDF-1.4'):
+        profile = UserProfile.objects.get(pk=profile.pk)
+        profile.resume.save('cv.pdf', ContentFile(content), save=False)
+        profile.save_dirty()
+        return profile
+
+    def extract(self, texts):
+        # Run the worker with extract_text returning the given text per file content
+        with mock.patch.object(resumes, 'extract_text', side_effect=lambda f: texts[f.read()]):
+            return resumes.process_pending_resumes()
+
+    def test_new_resume_is_queued_and_extracted_once(self):
+        profile = create_profile('alice@example.com')
+        self.assertEqual(UserProfile.objects.get(pk=profile.pk).resume_status, '')
+
+        profile = self.upload(profile, b'cv-1')
+        self.assertEqual(UserProfile.objects.get(pk=profile.pk).resume_status, UserProfile.RESUME_PENDING)
+
+        with mock.patch.object(resumes, 'extract_text', return_value='Django developer') as extract:
+            self.assertEqual(resumes.process_pending_resumes(), 1)
+            # Saving other fields does not queue the resume again
+            profile.education = 'phd'
+            profile.save_dirty()
+            self.assertEqual(resumes.process_pending_resumes(), 0)
+            # Re-uploading the same file keeps its content-addressed name: nothing to do
+            self.upload(profile, b'cv-1')
+            self.assertEqual(resumes.process_pending_resumes(), 0)
+        self.assertEqual(extract.call_count, 1)
+
+        profile.refresh_from_db()
+        self.assertEqual(profile.resume_status, UserProfile.RESUME_DONE)
+        self.assertEqual(profile.resume_text, 'Django developer')
+        self.assertEqual(resumes.search_resume_ids(['django']), [profile.pk])
+
+    def test_failed_extraction_is_recorded(self):
+        profile = self.upload(create_profile('alice@example.com'))
+        with mock.patch.object(resumes, 'extract_text', side_effect=ValueError('not a PDF')), \
+                self.assertLogs('profiles.resumes', 'ERROR'):
+            resumes.process_pending_resumes()
+        self.assertEqual(UserProfile.objects.get(pk=profile.pk).resume_status, UserProfile.RESUME_FAILED)
+
+    def test_removed_resume_leaves_the_index(self):
+        profile = self.upload(create_profile('alice@example.com'), b'cv')
+        self.extract({b'cv': 'Rust engineer'})
+        self.assertEqual(resumes.search_resume_ids(['rust']), [profile.pk])
+
+        profile = UserProfile.objects.get(pk=profile.pk)
+        profile.resume = None
+        profile.save_dirty()
+        self.assertEqual(resumes.search_resume_ids(['rust']), [])
+        self.assertEqual(UserProfile.objects.get(pk=profile.pk).resume_text, '')
+
+    def test_export_page_ranks_keyword_matches(self):
+        self.client.force_login(create_staff())
+        weak = self.upload(create_profile('weak@example.com'), b'weak')
+        strong = self.upload(create_profile('strong@example.com'), b'strong')
+        other = self.upload(create_profile('other@example.com', gender='female'), b'other')
+        self.extract({
+            b'weak': 'Java developer with some python ' + 'filler words ' * 50,
+            b'strong': 'Python python python developer',
+            b'other': 'Python developer',
+        })
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('export_filter_page'), {'keywords': 'Python', 'gender': 'male'})
+        self.assertEqual(response.context['profiles'], [strong, weak])
+        # The keyword search is run once, then intersected with the other filters
+        self.assertEqual(sum(' MATCH ' in query['sql'] or ' LIKE ' in query['sql'] for query in queries), 1)
+        self.assertEqual(response.context['total_count'], 2)
+
+        response = self.client.get(reverse('export_filter_page'), {'keywords': 'python', 'page_size': 1})
+        self.assertEqual(response.context['total_count'], 3)
+        self.assertEqual(self.client.get(response.context['next_url']).context['profiles'], [other])
+
+    @unittest.skipIf(resumes.pypdf is None, "pypdf is not installed")
+    def test_extracts_text_from_pdf(self):
+        pdf = BytesIO(make_pdf(['Senior Django developer', 'Kubernetes']))
+        self.assertIn('Kubernetes', resumes.extract_text(pdf))
+
+
+def make_jpeg():
+    # 40x20 JPEG, red on the left and blue on the right, stored rotated (EXIF orientation 6)
+    image = Image.new('RGB', (40, 20), 'blue')
+    image.paste('red', (0, 0, 20, 20))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = 'Test Camera'
+    output = BytesIO()
+    image.save(output, 'JPEG', exif=exif)
+    return output.getvalue()
+
+
+@override_settings(PROFILE_PHOTO_SIZES=(64, 120))
+class PhotoRenditionTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.profile = UserProfile.objects.get(pk=create_profile('alice@example.com').pk)
+        self.profile.photo.save('me.jpg', ContentFile(make_jpeg()), save=False)
+        self.profile.save_dirty()
+
+    def test_renditions_are_upright_square_webp_without_metadata(self):
+        self.assertEqual(UserProfile.objects.get(pk=self.profile.pk).photo_status, UserProfile.PHOTO_PENDING)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(photos.process_pending_photos(), 1)
+
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+        self.assertEqual(profile.photo_status, UserProfile.PHOTO_DONE)
+        self.assertEqual(set(profile.photo_renditions), {'64', '120'})
+
+        with default_storage.open(profile.photo_renditions['64']) as fileobj:
+            image = Image.open(fileobj)
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (64, 64))
+            self.assertEqual(len(image.getexif()), 0)
+            # Rotated upright: the red half ends up on top
+            red, _, blue = image.convert('RGB').getpixel((32, 5))
+            self.assertGreater(red, blue)
+            red, _, blue = image.convert('RGB').getpixel((32, 58))
+            self.assertGreater(blue, red)
+
+    def test_profile_page_shows_renditions(self):
+        self.client.force_login(self.profile.user)
+        self.assertContains(self.client.get(reverse('profile')), self.profile.photo.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            photos.process_pending_photos()
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+        response = self.client.get(reverse('profile'))
+        self.assertContains(response, profile.avatar_url)
+        self.assertNotContains(response, profile.photo.url)
+
+    def test_removed_photo_deletes_renditions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            photos.process_pending_photos()
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+        names = list(profile.photo_renditions.values())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.photo = None
+            profile.save_dirty()
+        profile.refresh_from_db()
+        self.assertEqual(profile.photo_renditions, {})
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+
+
+class MediaBlobTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def upload(self, profile, content, filename='cv.pdf'):
+        profile = UserProfile.objects.get(pk=profile.pk)
+        profile.resume.save(filename, ContentFile(content), save=False)
+        profile.save_dirty()
+        return profile
+
+    def test_identical_uploads_share_one_blob(self):
+        alice = self.upload(create_profile('alice@example.com'), b'same resume', 'Alice CV.PDF')
+        bob = self.upload(create_profile('bob@example.com'), b'same resume', 'bob.pdf')
+
+        self.assertEqual(alice.resume.name, bob.resume.name)
+        self.assertRegex(alice.resume.name, r'^resumes/[0-9a-f]{2}/[0-9a-f]{64}\.pdf$')
+        self.assertEqual(len(media_storage.listdir(posixpath.dirname(alice.resume.name))[1]), 1)
+        self.assertEqual(MediaBlob.objects.get(name=alice.resume.name).refcount, 2)
+
+    def test_unreferenced_blobs_are_collected(self):
+        alice = self.upload(create_profile('alice@example.com'), b'v1')
+        bob = self.upload(create_profile('bob@example.com'), b'v1')
+        first = alice.resume.name
+
+        # Replacing one reference keeps the blob
+        alice = self.upload(alice, b'v2')
+        self.assertEqual(MediaBlob.objects.get(name=first).refcount, 1)
+        self.assertEqual(collect_unreferenced_blobs(grace=timedelta(0)), [])
+
+        bob.delete()
+        self.assertEqual(MediaBlob.objects.get(name=first).refcount, 0)
+        # Still within the grace period
+        self.assertEqual(collect_unreferenced_blobs(), [])
+
+        self.assertEqual(collect_unreferenced_blobs(grace=timedelta(0)), [first])
+        self.assertFalse(media_storage.exists(first))
+        self.assertTrue(media_storage.exists(alice.resume.name))
+
+    def test_uploading_unreferenced_content_again_restarts_grace_period(self):
+        bob = self.upload(create_profile('bob@example.com'), b'old resume')
+        name = bob.resume.name
+        bob.delete()
+        MediaBlob.objects.filter(name=name).update(updated_at=timezone.now() - timedelta(days=2))
+
+        # Stored again but not attached to a profile yet
+        self.assertEqual(media_storage.save('resumes/cv.pdf', ContentFile(b'old resume')), name)
+        self.assertEqual(collect_unreferenced_blobs(grace=timedelta(hours=1)), [])
+        self.assertTrue(media_storage.exists(name))
+
+    def test_deep_collection_recounts_and_removes_untracked_files(self):
+        profile = create_profile('alice@example.com')
+        # Files stored before content addressing; one is referenced without a blob row
+        kept = default_storage.save('resumes/kept.pdf', ContentFile(b'kept'))
+        orphan = default_storage.save('resumes/orphan.pdf', ContentFile(b'orphan'))
+        UserProfile.objects.filter(pk=profile.pk).update(resume=kept)
+
+        referenced = recount_references()
+        self.assertEqual(MediaBlob.objects.get(name=kept).refcount, 1)
+        self.assertEqual(collect_untracked_files(referenced, grace=timedelta(0)), [orphan])
+        self.assertTrue(media_storage.exists(kept))
+
+
+@override_settings(PROFILE_UPLOAD_CHUNK_SIZE=4)
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        upload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.addCleanup(shutil.rmtree, upload_dir)
+        upload_settings = override_settings(MEDIA_ROOT=media_root, PROFILE_UPLOAD_TEMP_DIR=upload_dir)
+        upload_settings.enable()
+        self.addCleanup(upload_settings.disable)
+
+        self.profile = create_profile('alice@example.com')
+        self.client.force_login(self.profile.user)
+
+    def start(self, content, field='resume', filename='cv.pdf'):
+        response = self.client.post(reverse('upload_create'), {
+            'field': field, 'filename': filename, 'size': len(content),
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def send(self, session, offset, chunk):
+        return self.client.patch(
+            session['url'], chunk, content_type='application/offset+octet-stream',
+            headers={'Upload-Offset': str(offset)},
+        )
+
+    def finalize(self, session, content):
+        return self.client.post(session['finalize_url'], {'sha256': hashlib.sha256(content).hexdigest()})
+
+    def test_chunks_are_assembled_and_attached(self):
+        content = b'%PDF-1.4 resume'
+        session = self.start(content)
+        for offset in range(0, len(content), 4):
+            response = self.send(session, offset, content[offset:offset + 4])
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Upload-Offset'], str(len(content)))
+
+        response = self.finalize(session, content)
+        self.assertEqual(response.status_code, 200)
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+        self.assertEqual(profile.resume.name, response.json()['name'])
+        with profile.resume.open('rb') as fileobj:
+            self.assertEqual(fileobj.read(), content)
+        self.assertEqual(profile.resume_status, UserProfile.RESUME_PENDING)
+        self.assertEqual(MediaBlob.objects.get(name=profile.resume.name).refcount, 1)
+        # The partial file was moved into storage
+        self.assertFalse(os.path.exists(partial_path(UploadSession.objects.get())))
+
+    def test_interrupted_upload_resumes_from_stored_offset(self):
+        content = b'0123456789'
+        session = self.start(content)
+        self.send(session, 0, content[:4])
+
+        # A retried chunk the server already has is rejected with the current offset
+        response = self.send(session, 0, content[:4])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 4)
+
+        response = self.client.get(session['url'])
+        self.assertEqual(response['Upload-Offset'], '4')
+        self.send(session, 4, content[4:8])
+        self.send(session, 8, content[8:])
+        self.assertEqual(self.finalize(session, content).status_code, 200)
+
+    def test_checksum_and_size_are_verified(self):
+        content = b'0123456'
+        session = self.start(content)
+        self.assertEqual(self.send(session, 0, b'01234').status_code, 413)
+
+        self.send(session, 0, content[:4])
+        self.assertEqual(self.finalize(session, content).status_code, 400)
+        self.send(session, 4, content[4:])
+        response = self.finalize(session, b'something else')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Checksum does not match.')
+        self.assertFalse(UserProfile.objects.get(pk=self.profile.pk).resume)
+
+    def test_only_one_of_two_racing_finalizes_attaches_the_file(self):
+        content = b'0123'
+        session = self.start(content)
+        self.send(session, 0, content)
+        # Loaded by a second request before the first one claimed the session
+        stale = UploadSession.objects.get()
+
+        self.assertEqual(self.finalize(session, content).status_code, 200)
+        with mock.patch.object(views, 'get_object_or_404', return_value=stale):
+            response = self.finalize(session, content)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['error'], 'Upload is already being finalized.')
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.STATUS_COMPLETE)
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+        self.assertEqual(MediaBlob.objects.get(name=profile.resume.name).refcount, 1)
+
+    def test_photo_must_be_an_image(self):
+        content = b'not an image'
+        session = self.start(content, field='photo', filename='me.jpg')
+        for offset in range(0, len(content), 4):
+            self.send(session, offset, content[offset:offset + 4])
+        self.assertEqual(self.finalize(session, content).status_code, 400)
+
+    def test_sessions_belong_to_their_user(self):
+        session = self.start(b'0123')
+        self.client.force_login(create_profile('bob@example.com').user)
+        self.assertEqual(self.send(session, 0, b'0123').status_code, 404)
+        self.assertEqual(self.client.get(session['url']).status_code, 404)
+
+    def test_stale_sessions_are_purged(self):
+        session = self.start(b'0123')
+        UploadSession.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        path = partial_path(UploadSession.objects.get(pk=session['id']))
+
+        self.assertEqual(purge_stale_uploads(), 1)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportCandidatesTests(TestCase):
+    HEADER = ['Email', 'Name', 'Mobile No', 'Work Status', 'Gender', 'DOB', 'Education', 'Skills', 'Password']
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def write_csv(self, rows):
+        path = os.path.join(self.tmpdir, 'candidates.csv')
+        with open(path, 'w', newline='') as fileobj:
+            writer = csv.writer(fileobj)
+            writer.writerow(self.HEADER)
+            writer.writerows(rows)
+        return path
+
+    def test_valid_rows_are_imported_in_batches(self):
+        create_profile('taken@example.com')
+        path = self.write_csv([
+            ['alice@example.com', 'Alice', '9876543210', 'fresher', 'Female', '1999-04-01', "Bachelor's", 'Python, SQL', 's3cret!'],
+            ['bob@example.com', 'Bob', '12345', 'fresher', 'male', '', '', '', ''],
+            ['taken@example.com', 'Taken', '9876543211', 'fresher', 'male', '', '', '', ''],
+            ['alice@example.com', 'Alice again', '9876543212', 'fresher', 'female', '', '', '', ''],
+            ['carol@example.com', 'Carol', '9876543213', 'experienced', 'female', '', 'phd', 'python', ''],
+        ])
+        errors = []
+        stats = import_candidates(
+            read_rows(path), batch_size=2, on_error=lambda *error: errors.append(error),
+        )
+
+        self.assertEqual(stats, {'rows': 5, 'created': 2, 'duplicates': 2, 'invalid': 1})
+        self.assertEqual([line for line, _, _ in errors], [3, 4, 5])
+        self.assertIn('mobile_no', errors[0][2])
+
+        alice = UserProfile.objects.select_related('user').get(user__email='alice@example.com')
+        self.assertEqual(alice.user.name, 'Alice')
+        self.assertEqual(alice.education, 'bachelors')
+        self.assertEqual(str(alice.dob), '1999-04-01')
+        self.assertTrue(alice.user.check_password('s3cret!'))
+        self.assertFalse(User.objects.get(email='carol@example.com').has_usable_password())
+        # The skill table was filled in although bulk_create skips post_save
+        self.assertEqual(
+            list(filter_profiles({'skills': 'python'}).order_by('id').values_list('user__email', flat=True)),
+            ['alice@example.com', 'carol@example.com'],
+        )
+
+    def test_xlsx_and_jsonl_files(self):
+        workbook = Workbook()
+        workbook.active.append(self.HEADER)
+        # Spreadsheets store numbers and dates as such
+        workbook.active.append(['dave@example.com', 'Dave', 9876543210, 'fresher', 'male', datetime(2000, 1, 2)])
+        xlsx_path = os.path.join(self.tmpdir, 'candidates.xlsx')
+        workbook.save(xlsx_path)
+
+        jsonl_path = os.path.join(self.tmpdir, 'candidates.jsonl')
+        with open(jsonl_path, 'w') as fileobj:
+            fileobj.write(json.dumps({
+                'email': 'erin@example.com', 'name': 'Erin', 'mobile_no': '9876543211',
+                'work_status': 'experienced', 'gender': 'female', 'skills': ['go', 'rust'],
+            }) + '\n')
+            fileobj.write('not json\n')
+
+        call_command('import_candidates', xlsx_path, workers=1, stdout=StringIO())
+        stderr = StringIO()
+        call_command('import_candidates', jsonl_path, workers=1, stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(str(UserProfile.objects.get(user__email='dave@example.com').dob), '2000-01-02')
+        self.assertEqual(UserProfile.objects.get(user__email='erin@example.com').skills, ['go', 'rust'])
+        self.assertIn('Line 2', stderr.getvalue())
+
+    def test_passwords_are_hashed_in_worker_processes(self):
+        with multiprocessing.get_context('fork').Pool(2) as pool:
+            hashed = hash_passwords(['first', '', 'second'], pool)
+        user = User(email='x@example.com')
+        user.password = hashed[0]
+        self.assertTrue(user.check_password('first'))
+        self.assertTrue(hashed[1].startswith('!'))
+        user.password = hashed[2]
+        self.assertTrue(user.check_password('second'))
+
+
+class BenchmarkToolTests(TestCase):
+    def test_generated_profiles_are_reproducible_and_skewed(self):
+        call_command('generate_profiles', 300, seed=7, prefix='first', stdout=StringIO())
+        call_command('generate_profiles', 300, seed=7, prefix='second', stdout=StringIO())
+
+        first, second = (
+            list(UserProfile.objects.filter(user__email__startswith=prefix).order_by('id').values_list(
+                'gender', 'dob', 'education', 'skills',
+            ))
+            for prefix in ('first', 'second')
+        )
+        self.assertEqual(first, second)
+        # Common skills are listed far more often than the long tail
+        counts = dict(skill_vocabulary())
+        self.assertGreater(counts['python'], 5 * counts.get('hadoop', 0))
+        self.assertEqual(counts['python'], filter_profiles({'skills': 'python'}).count())
+
+    def test_results_are_compared_with_baseline(self):
+        baseline = {'results': {
+            'fast': summarize_timings([0.010, 0.010, 0.011]),
+            'slow': summarize_timings([0.010, 0.010, 0.011]),
+            'removed': summarize_timings([0.010]),
+        }}
+        results = {'results': {
+            'fast': summarize_timings([0.010, 0.011, 0.011]),
+            'slow': summarize_timings([0.020, 0.020, 0.022]),
+            'new': summarize_timings([0.010]),
+        }}
+        rows = compare_results(results, baseline, threshold=0.2)
+
+        self.assertEqual([(name, regressed) for name, _, _, _, regressed in rows], [('fast', False), ('slow', True)])
+        self.assertAlmostEqual(rows[1][3], 1.0)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QueryBudgetTests(StaffClientMixin, QueryBudgetTestMixin, TestCase):
+    staff_is_superuser = True
+
+    def setUp(self):
+        super().setUp()
+        for i in range(15):
+            create_profile(f'user{i}@example.com', skills=['python', f'skill{i}'])
+
+    def test_export_page_stays_within_budget(self):
+        self.assertWithinQueryBudget('get', '/export-profiles/', {'skills': 'python'})
+        self.assertWithinQueryBudget('get', '/export-profiles/', {'skills': 'python', 'download': '1'})
+        self.assertWithinQueryBudget('get', '/api/profiles/', {'skills': 'python'})
+
+    def test_profile_page_stays_within_budget(self):
+        profile = UserProfile.objects.select_related('user').first()
+        self.client.force_login(profile.user)
+        self.assertWithinQueryBudget('get', '/profile/')
+        self.assertWithinQueryBudget('post', '/profile/', {
+            'name': 'New Name', 'email': profile.user.email, 'mobile_no': '9876543210',
+            'gender': 'female', 'work_experience': 'fresher', 'skills[]': ['python', 'go'],
+        })
+
+    def test_admin_changelist_loads_users_with_the_page(self):
+        url = '/admin/profiles/userprofile/'
+        self.assertWithinQueryBudget('get', url, {'skill': 'python'})
+
+        # Without list_select_related the user column costs a query per row;
+        # the development middleware logs the same report
+        with mock.patch.object(UserProfileAdmin, 'list_select_related', ()):
+            with self.assertLogs('accounts.query_budget', 'WARNING') as logs:
+                with self.assertRaisesRegex(AssertionError, r'Repeated \d+x: SELECT .*accounts_customuser'):
+                    self.assertWithinQueryBudget('get', url, {'skill': 'python'})
+        self.assertIn('GET /admin/profiles/userprofile/: Query budget exceeded', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_ACTION='raise')
+    @modify_settings(MIDDLEWARE={
+        'remove': 'accounts.query_budget.QueryBudgetMiddleware',
+        'prepend': 'accounts.query_budget.QueryBudgetMiddleware',
+    })
+    def test_middleware_reports_offending_query(self):
+        budget = QueryBudget(max_queries=1)
+        with mock.patch.object(views.export_filter_page, 'query_budget', budget):
+            with self.assertRaises(QueryBudgetExceeded) as raised:
+                self.client.get('/export-profiles/')
+        # The report points at the project code that ran the query
+        self.assertIn('Offending query', str(raised.exception))
+        self.assertIn('File "', str(raised.exception))
+
+        with override_settings(QUERY_BUDGET_ACTION='log'), self.assertLogs('accounts.query_budget', 'WARNING'):
+            with mock.patch.object(views.export_filter_page, 'query_budget', budget):
+                self.client.get('/export-profiles/')
+
+
+    @override_settings(QUERY_BUDGETS={'async_profile_search_api': {'max_queries': 1}})
+    @modify_settings(MIDDLEWARE={
+        'remove': 'accounts.query_budget.QueryBudgetMiddleware',
+        'prepend': 'accounts.query_budget.QueryBudgetMiddleware',
+    })
+    async def test_middleware_checks_async_views(self):
+        await self.async_client.aforce_login(self.staff)
+        with self.assertLogs('accounts.query_budget', 'WARNING') as logs:
+            response = await self.async_client.get('/api/profiles/async/', {'skills': 'python'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('GET /api/profiles/async/: Query budget exceeded', logs.output[0])
+
+
+class ExportJobTests(StaffClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def test_background_export_runs_and_downloads(self):
+        create_profile('alice@example.com', skills=['Python'])
+        create_profile('bob@example.com', skills=['Java'])
+
+        page = self.client.get(reverse('export_filter_page'), {'skills': 'python'})
+        self.assertContains(page, f'action="{reverse("export_job_create")}"')
+        self.assertContains(page, '<input type="hidden" name="skills" value="python">')
+
+        # Queuing a job is a POST; GET only views jobs
+        self.assertEqual(self.client.get(reverse('export_job_create')).status_code, 405)
+        response = self.client.post(reverse('export_job_create'), {'skills': 'python'})
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, reverse('export_job_detail', args=[job.pk]))
+        self.assertEqual(job.params, {'skills': 'python'})
+
+        run_job(claim_next_job())
+        self.assertIsNone(claim_next_job())
+
+        status = self.client.get(reverse('export_job_status', args=[job.pk])).json()
+        self.assertEqual((status['status'], status['row_count'], status['progress']), ('done', 1, 100))
+
+        response = self.client.get(status['download_url'])
+        ws = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)['Profiles']
+        self.assertEqual([row[1] for row in list(ws.values)[1:]], ['alice@example.com'])
+
+
+class SkillIndexTests(TestCase):
+    def test_skill_index_follows_skills_list(self):
+        profile = create_profile('alice@example.com', skills=['Python', ' Django ', 'python'])
+        self.assertEqual(
+            sorted(ProfileSkill.objects.filter(profile=profile).values_list('skill__name', flat=True)),
+            ['django', 'python'],
+        )
+
+        profile.skills = ['SQL']
+        profile.save()
+        self.assertEqual(
+            list(ProfileSkill.objects.filter(profile=profile).values_list('skill__name', flat=True)),
+            ['sql'],
+        )
+
+    def test_with_all_skills_requires_every_skill(self):
+        alice = create_profile('alice@example.com', skills=['Python', 'Django'])
+        create_profile('bob@example.com', skills=['Python'])
+
+        self.assertEqual(list(UserProfile.objects.with_all_skills(['python', 'DJANGO'])), [alice])
+        self.assertEqual(UserProfile.objects.with_all_skills(['python']).count(), 2)
+
+
+class SkillVocabularyTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_vocabulary_counts_follow_saves_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            alice = create_profile('alice@example.com', skills=['Python', 'Django'])
+            create_profile('bob@example.com', skills=['python'])
+        self.assertEqual(skill_vocabulary(), [('django', 1), ('python', 2)])
+        self.assertEqual(skill_vocabulary(top=1), [('python', 2)])
+
+        # Served from the cache without touching the database
+        with self.assertNumQueries(0):
+            skill_vocabulary()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            alice.delete()
+        self.assertEqual(skill_vocabulary(), [('python', 1)])
+
+
+class QueryPlanTestMixin:
+    def assertNoFullScan(self, queryset):
+        """
+        Fail if SQLite plans a full table scan for the queryset.
+        Query plans are backend specific, so other backends are skipped.
+        """
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plan assertions are written for SQLite')
+
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        scans = [step for step in plan if step.startswith('SCAN')]
+        self.assertEqual(scans, [], f'Full scan in query plan: {plan}')
+
+
+class SkillsFilterTests(QueryPlanTestMixin, TestCase):
+    def filter_profiles(self, value):
+        model_admin = UserProfileAdmin(UserProfile, AdminSite())
+        skills_filter = SkillsFilter(None, {'skill': [value]}, UserProfile, model_admin)
+        return skills_filter.queryset(None, UserProfile.objects.all())
+
+    def test_matches_exact_skill_case_insensitively(self):
+        alice = create_profile('alice@example.com', skills=['PYTHON', 'Django'])
+        create_profile('bob@example.com', skills=['Pythonista'])
+
+        self.assertEqual(list(self.filter_profiles('python')), [alice])
+
+    def test_skill_filter_uses_indexes(self):
+        self.assertNoFullScan(self.filter_profiles('python').select_related('user'))
+
+
+class ProfileFilterTests(QueryPlanTestMixin, TestCase):
+    def test_choice_filters_match_exact_values_ignoring_case(self):
+        fresher = create_profile('alice@example.com', work_experience='fresher', education='phd')
+        create_profile('bob@example.com', work_experience='3-5 years', education='phd')
+
+        self.assertEqual(list(filter_profiles({'work_experience': 'Fresher', 'education': 'PhD'})), [fresher])
+
+    def test_created_date_includes_the_whole_day(self):
+        profile = create_profile('alice@example.com')
+        day = timezone.localdate(profile.created_at)
+
+        self.assertEqual(list(filter_profiles({'created_date': day.isoformat()})), [profile])
+        self.assertEqual(list(filter_profiles({'created_date': (day + timedelta(days=1)).isoformat()})), [])
+
+    def test_filters_use_indexes(self):
+        for params in (
+            {'gender': 'male'},
+            {'education': 'phd'},
+            {'work_experience': 'fresher'},
+            {'created_date': '2024-01-01'},
+            {'gender': 'female', 'education': 'masters', 'created_date': '2024-01-01'},
+            {'skills': 'python, django'},
+        ):
+            with self.subTest(params=params):
+                # Same shape as the export page query: newest first, one page
+                self.assertNoFullScan(filter_profiles(params).order_by('-created_at', '-id')[:51])
+
+
+class BitmapTests(TestCase):
+    def test_intersection_and_iteration(self):
+        left = Bitmap.from_ids([1, 5, 70000, 200000])
+        right = Bitmap.from_ids([5, 6, 200000])
+        self.assertEqual(list(left & right), [5, 200000])
+
+        left.add(6)
+        left.discard(200000)
+        self.assertEqual(list(left & right), [5, 6])
+        self.assertEqual(len(left), 4)
+
+
+@override_settings(PROFILE_SKILL_BITMAP_INDEX=True)
+class SkillBitmapIndexTests(TestCase):
+    def setUp(self):
+        skill_index.clear()
+        self.addCleanup(skill_index.clear)
+
+    def test_index_follows_profile_changes(self):
+        alice = create_profile('alice@example.com', skills=['Python', 'Django'])
+        bob = create_profile('bob@example.com', skills=['Python'])
+        self.assertEqual(list(skill_index.lookup(['python'])), [alice.pk, bob.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bob.skills = ['Python', 'Django']
+            bob.save()
+        self.assertEqual(list(UserProfile.objects.with_all_skills(['django', 'python'])), [alice, bob])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            alice.delete()
+        self.assertEqual(list(skill_index.lookup(['django'])), [bob.pk])
+
+    def test_lookups_do_not_share_the_index_bitmaps(self):
+        alice = create_profile('alice@example.com', skills=['Python'])
+        result = skill_index.lookup(['python'])
+        skill_index.update(12345, added=['python'])
+
+        self.assertEqual(list(result), [alice.pk])
+        result.add(999)
+        self.assertEqual(list(skill_index.lookup(['python'])), [alice.pk, 12345])
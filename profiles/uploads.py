@@ -0,0 +1,203 @@
+"""
+Chunked, resumable uploads of resumes and photos.
+
+A client creates an UploadSession, then sends the file in chunks of at
+most PROFILE_UPLOAD_CHUNK_SIZE bytes, each tagged with the offset it
+starts at. Chunks are appended to a partial file outside MEDIA_ROOT as
+they are read, so memory per upload stays bounded by the read buffer.
+After a dropped connection the client asks for the current offset and
+continues from there. Finalizing checks the size and SHA-256, then moves
+the file into media storage and attaches it to the user's profile.
+"""
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File, locks
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from .models import UploadSession, UserProfile
+
+# Bytes read from the request and written to disk at a time
+READ_SIZE = 64 * 1024
+
+
+class OffsetMismatch(ValueError):
+    # A chunk that does not start where the partial file ends
+    def __init__(self, offset):
+        super().__init__(f"Upload is at offset {offset}.")
+        self.offset = offset
+
+
+class UploadInProgress(ValueError):
+    # Another request is already finalizing the upload
+    def __init__(self):
+        super().__init__("Upload is already being finalized.")
+
+
+class _PartialFile(File):
+    # Lets FileSystemStorage move the finished upload into place instead of copying it
+    def temporary_file_path(self):
+        return self.name
+
+
+def get_chunk_size():
+    # Largest chunk accepted in a single request
+    return getattr(settings, 'PROFILE_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024)
+
+
+def get_max_size():
+    return getattr(settings, 'PROFILE_UPLOAD_MAX_SIZE', 20 * 1024 * 1024)
+
+
+def get_expiry():
+    # Unfinished uploads untouched for this long are purged
+    return getattr(settings, 'PROFILE_UPLOAD_EXPIRY', timedelta(days=1))
+
+
+def get_upload_dir():
+    # Partial files are kept outside MEDIA_ROOT so they are never served
+    base = getattr(settings, 'PROFILE_UPLOAD_TEMP_DIR', None)
+    return base or os.path.join(settings.FILE_UPLOAD_TEMP_DIR or tempfile.gettempdir(), 'profile-uploads')
+
+
+def partial_path(session):
+    return os.path.join(get_upload_dir(), f'{session.id}.part')
+
+
+def create_session(user, field, filename, size):
+    """
+    Start an upload. Raises ValueError for an unknown field or a size
+    outside the allowed range.
+    """
+    if field not in dict(UploadSession.FIELD_CHOICES):
+        raise ValueError(f"Unknown upload field: {field}")
+    if not 0 < size <= get_max_size():
+        raise ValueError(f"File size must be between 1 and {get_max_size()} bytes.")
+
+    session = UploadSession.objects.create(
+        user=user, field=field, filename=os.path.basename(filename)[:255] or field, size=size,
+    )
+    os.makedirs(get_upload_dir(), exist_ok=True)
+    open(partial_path(session), 'wb').close()
+    return session
+
+
+def append_chunk(session, offset, stream, length):
+    """
+    Append length bytes read from stream at offset and return the new
+    offset. Raises OffsetMismatch when offset is not where the partial
+    file ends, and ValueError when the chunk would pass the declared size.
+    If the client disconnects midway, whatever arrived is kept.
+    """
+    if offset + length > session.size:
+        raise ValueError("Chunk goes past the declared file size.")
+
+    with open(partial_path(session), 'ab') as partial:
+        # The partial file is the source of truth; the lock serializes concurrent chunks
+        locks.lock(partial, locks.LOCK_EX)
+        try:
+            current = partial.seek(0, os.SEEK_END)
+            if current != offset:
+                raise OffsetMismatch(current)
+
+            remaining = length
+            while remaining:
+                data = stream.read(min(READ_SIZE, remaining))
+                if not data:
+                    break
+                partial.write(data)
+                remaining -= len(data)
+            partial.flush()
+            current = partial.tell()
+        finally:
+            locks.unlock(partial)
+
+    UploadSession.objects.filter(pk=session.pk).update(offset=current, updated_at=timezone.now())
+    session.offset = current
+    return current
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fileobj:
+        for chunk in iter(lambda: fileobj.read(READ_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def finalize_upload(session, sha256):
+    """
+    Verify a fully received upload and attach it to the user's profile.
+    Returns the profile. Raises UploadInProgress if another request is
+    finalizing the same upload, and ValueError if the file is incomplete,
+    the checksum does not match or a photo is not a valid image.
+    """
+    # Claim the session, so only one request moves the partial file
+    claimed = UploadSession.objects.filter(pk=session.pk, status=UploadSession.STATUS_OPEN).update(
+        status=UploadSession.STATUS_FINALIZING, updated_at=timezone.now(),
+    )
+    if not claimed:
+        raise UploadInProgress()
+
+    try:
+        profile = _attach_upload(session, sha256)
+    except BaseException:
+        # Reopen the session so the client can fix the upload and retry
+        UploadSession.objects.filter(pk=session.pk, status=UploadSession.STATUS_FINALIZING).update(
+            status=UploadSession.STATUS_OPEN, updated_at=timezone.now(),
+        )
+        raise
+
+    # Identical content already in storage leaves the partial file behind
+    path = partial_path(session)
+    if os.path.exists(path):
+        os.remove(path)
+    return profile
+
+
+def _attach_upload(session, sha256):
+    # Check the claimed upload and save it to the profile field
+    path = partial_path(session)
+    if os.path.getsize(path) != session.size:
+        raise ValueError("Upload is incomplete.")
+    if _sha256(path) != (sha256 or '').lower():
+        raise ValueError("Checksum does not match.")
+
+    if session.field == 'photo':
+        try:
+            with Image.open(path) as image:
+                image.verify()
+        except Exception as exc:
+            raise ValueError("Upload is not a valid image.") from exc
+
+    with transaction.atomic():
+        profile, _ = UserProfile.objects.get_or_create(user=session.user)
+        with _PartialFile(open(path, 'rb'), name=path) as partial:
+            getattr(profile, session.field).save(session.filename, partial, save=False)
+        profile.save_dirty()
+
+        session.status = UploadSession.STATUS_COMPLETE
+        session.offset = session.size
+        session.save(update_fields=['status', 'offset', 'updated_at'])
+    return profile
+
+
+def purge_stale_uploads():
+    """
+    Delete finished and abandoned upload sessions older than the expiry,
+    with their partial files. Returns the number of sessions removed.
+    """
+    cutoff = timezone.now() - get_expiry()
+    count = 0
+    for session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+        path = partial_path(session)
+        if os.path.exists(path):
+            os.remove(path)
+        session.delete()
+        count += 1
+    return count
@@ -3,5 +3,16 @@ from . import views
 from .views import export_filter_page
 urlpatterns = [
     path('profile/', views.profile_view, name='profile'),
+    path('profile/uploads/', views.upload_create, name='upload_create'),
+    path('profile/uploads/<uuid:pk>/', views.upload_session, name='upload_session'),
+    path('profile/uploads/<uuid:pk>/finalize/', views.upload_finalize, name='upload_finalize'),
     path('export-profiles/', export_filter_page, name='export_filter_page'),
+    path('api/profiles/', views.profile_search_api, name='profile_search_api'),
+    path('api/profiles/async/', views.async_profile_search_api, name='async_profile_search_api'),
+    path('export-profiles/async-csv/', views.async_export_csv, name='async_export_csv'),
+    path('export-profiles/cache-stats/', views.export_cache_stats, name='export_cache_stats'),
+    path('export-jobs/', views.export_job_create, name='export_job_create'),
+    path('export-jobs/<int:pk>/', views.export_job_detail, name='export_job_detail'),
+    path('export-jobs/<int:pk>/status/', views.export_job_status, name='export_job_status'),
+    path('export-jobs/<int:pk>/download/', views.export_job_download, name='export_job_download'),
 ]
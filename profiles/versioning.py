@@ -0,0 +1,84 @@
+"""
+ETag and Last-Modified functions for django.views.decorators.http.condition.
+Each costs one indexed lookup, so an unchanged page can be answered with
+304 Not Modified before the view does any real work.
+"""
+import hashlib
+
+from django.db.models import Max
+from django.middleware.csrf import get_token
+
+from .models import UserProfile
+from .page_cache import get_cached_page
+from .result_cache import get_generation
+
+
+def _digest(*parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _csrf_secret(request):
+    # Pages embed a CSRF token, so a rotated CSRF secret must change the ETag.
+    # get_token() makes sure the secret exists (and is sent) before rendering.
+    get_token(request)
+    return request.META.get('CSRF_COOKIE', '')
+
+
+def _profile_version(request):
+    # (profile id, updated_at) of the current user's profile, looked up once per request.
+    # A cached page is only reachable while it is current, so its stamp can be used as is.
+    if not hasattr(request, '_profile_version'):
+        cached = get_cached_page(request)
+        if cached is not None:
+            request._profile_version = (cached['profile_id'], cached['updated_at'])
+        else:
+            request._profile_version = (
+                UserProfile.objects.filter(user=request.user).values_list('id', 'updated_at').first()
+            )
+    return request._profile_version
+
+
+def profile_etag(request):
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    version = _profile_version(request)
+    if version is None:
+        # Profile is created on first visit; nothing to compare against yet
+        return None
+
+    user = request.user
+    return _digest(
+        *version, user.pk, user.name, user.email, user.mobile_no, user.work_status,
+        request.GET.get('edit'), _csrf_secret(request),
+    )
+
+
+def profile_last_modified(request):
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    version = _profile_version(request)
+    return version[1] if version else None
+
+
+def _profile_watermark(request):
+    # Latest profile change, looked up once per request through the updated_at index
+    if not hasattr(request, '_profile_watermark'):
+        request._profile_watermark = UserProfile.objects.aggregate(latest=Max('updated_at'))['latest']
+    return request._profile_watermark
+
+
+def export_etag(request):
+    # Downloads are always generated fresh; only the HTML results page is compared
+    if request.method not in ('GET', 'HEAD') or request.GET.get('download'):
+        return None
+    # The result cache generation also moves on deletes and user edits
+    return _digest(
+        _profile_watermark(request), get_generation(), request.user.pk,
+        sorted(request.GET.lists()), _csrf_secret(request),
+    )
+
+
+def export_last_modified(request):
+    if request.method not in ('GET', 'HEAD') or request.GET.get('download'):
+        return None
+    return _profile_watermark(request)
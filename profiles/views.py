@@ -1,98 +1,269 @@
-from django.shortcuts import render, redirect
+from asgiref.sync import sync_to_async
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from accounts.instrumentation import timed
+from accounts.query_budget import query_budget
 from .forms import UserProfileForm
-from .models import UserProfile
+from .models import ExportJob, UploadSession, UserProfile
+from django.db import transaction
 from django.db.models import Q
-from django.http import HttpResponse
-from django.utils.timezone import localtime
-from openpyxl import Workbook
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods, require_POST
+from .exports import (
+    EXPORT_FORMATS, aprofile_rows, async_csv_response, get_chunk_size, profile_rows,
+)
+from .filters import FILTER_PARAMS, filter_profiles, get_filter_params
+from .page_cache import get_cached_page, set_cached_page
+from .pagination import (
+    akeyset_values_page, cached_count, get_page_size, keyset_page, keyset_values_page, offset_page,
+)
+from .parallel_export import PART_WRITERS
+from .resumes import keyword_terms, search_resume_ids
+from .result_cache import get_result_keys, get_stats, page_from_keys, profiles_by_ids
+from .search import SEARCH_FIELDS, get_search_fields, search_results
+from . import uploads
+from .versioning import export_etag, export_last_modified, profile_etag, profile_last_modified
 
 
 @staff_member_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=export_etag, last_modified_func=export_last_modified)
+@query_budget(max_queries=10, max_time_ms=200)
 def export_filter_page(request):
     """
     Admin-only view to filter UserProfiles by various criteria
     and optionally download the filtered data as an Excel file.
+    Background and parallel export jobs are queued with a POST to export_job_create.
     """
 
-    queryset = UserProfile.objects.select_related('user').all()
-
-    # Get filter parameters from the query string
-    gender = request.GET.get('gender')
-    education = request.GET.get('education')
-    work_experience = request.GET.get('work_experience')
-    created_date = request.GET.get('created_date')
-    skills_input = request.GET.get('skills')
+    # Get filter parameters from the query string and apply them
+    filters = get_filter_params(request.GET)
     download = request.GET.get('download')
 
-    # Apply filters if the parameters are provided
-    if gender:
-        queryset = queryset.filter(gender__iexact=gender)
-    if education:
-        queryset = queryset.filter(education__icontains=education)
-    if work_experience:
-        queryset = queryset.filter(work_experience__icontains=work_experience)
-    if created_date:
-        queryset = queryset.filter(created_at__date__gte=created_date)
-
-    # Convert queryset to list for easier Python filtering below
-    queryset = list(queryset)
-
-    # Filter profiles by skills if skills input is provided
-    if skills_input:
-        input_skills = [s.strip().lower() for s in skills_input.split(',') if s.strip()]
-
-        # Keep only profiles where all input skills exist in profile.skills
-        queryset = [
-            profile for profile in queryset
-            if profile.skills and all(skill in [s.lower() for s in profile.skills] for skill in input_skills)
-        ]
-
-    # If 'download=1' in GET params, generate and return an Excel file
+    # Keyword pages are shown best resume match first; the ranking query
+    # runs once here and the other filters are intersected with it in SQL
+    ranked_ids = None
+    if filters.get('keywords') and download is None:
+        ranked_ids = search_resume_ids(keyword_terms(filters['keywords']))
+    queryset = filter_profiles(filters, resume_ids=ranked_ids)
+
+    # Matching profiles for this filter set, if cached (None for large result sets)
+    result_keys = None
+    if download == "1" or (download is None and ranked_ids is None):
+        result_keys = get_result_keys(filters)
+
+    # If 'download=1' in GET params, stream the filtered data in the requested format
     if download == "1":
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Profiles"
-
-        # Write header row
-        ws.append(['Name', 'Email', 'Mobile', 'Gender', 'Education', 'Work Experience', 'Skills', 'Created At'])
-
-        # Write data rows for each filtered profile
-        for profile in queryset:
-            ws.append([
-                profile.user.name,
-                profile.user.email,
-                profile.user.mobile_no,
-                profile.gender or '',
-                profile.education or '',
-                profile.work_experience or '',
-                ', '.join(profile.skills) if profile.skills else '',
-                localtime(profile.created_at).strftime('%Y-%m-%d'),
-            ])
-
-        # Prepare HTTP response with Excel content type and attachment headers
-        response = HttpResponse(content_type='application/ms-excel')
-        response['Content-Disposition'] = 'attachment; filename="filtered_profiles.xlsx"'
-
-        # Save workbook to response and return it
-        wb.save(response)
-        return response
+        export_response = EXPORT_FORMATS.get(request.GET.get('format') or 'xlsx')
+        if export_response is None:
+            return HttpResponseBadRequest("Unsupported export format.")
+
+        # Iterate in chunks so the whole result set is never loaded at once;
+        # newest first by (created_at, id) whether or not the keys are cached
+        if result_keys is not None:
+            ids = [pk for _, pk in reversed(result_keys)]
+            profiles = profiles_by_ids(ids, chunk_size=get_chunk_size())
+        else:
+            profiles = queryset.order_by('-created_at', '-id').iterator(chunk_size=get_chunk_size())
+        return export_response(profile_rows(profiles))
+
+    # Fetch one page of results, starting after the cursor if one was given
+    cursor = request.GET.get('cursor')
+    page_size = get_page_size(request.GET.get('page_size'))
+    try:
+        if ranked_ids is not None:
+            # At most PROFILE_RESUME_SEARCH_LIMIT ids, as the queryset is limited to the ranked ones
+            matching = set(queryset.values_list('id', flat=True))
+            ranked_ids = [pk for pk in ranked_ids if pk in matching]
+            page_ids, next_cursor = offset_page(ranked_ids, cursor, page_size)
+            profiles = list(profiles_by_ids(page_ids))
+            total_count = len(ranked_ids)
+        elif result_keys is not None:
+            # Cached results only need a primary key lookup for the page rows
+            page_ids, next_cursor = page_from_keys(result_keys, cursor, page_size)
+            profiles = list(profiles_by_ids(page_ids))
+            total_count = len(result_keys)
+        else:
+            profiles, next_cursor = keyset_page(queryset, cursor, page_size)
+            total_count = cached_count(queryset, filters)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid page cursor.")
+
+    # Link to the next page keeps the current filters
+    next_url = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_url = f"{request.path}?{query.urlencode()}"
+
+    # Link back to the first page, shown when browsing a later page
+    first_url = None
+    if request.GET.get('cursor'):
+        query = request.GET.copy()
+        del query['cursor']
+        first_url = f"{request.path}?{query.urlencode()}"
 
     # Render template with filtered profiles and current filter selections for form pre-fill
     return render(request, 'profiles/export_filter_page.html', {
-        'profiles': queryset,
-        'selected_filters': {
-            'gender': gender,
-            'education': education,
-            'work_experience': work_experience,
-            'created_date': created_date,
-            'skills': skills_input,
-        }
+        'profiles': profiles,
+        'total_count': total_count,
+        'next_url': next_url,
+        'first_url': first_url,
+        'export_formats': list(EXPORT_FORMATS),
+        'selected_filters': {name: filters.get(name) for name in FILTER_PARAMS},
+    })
+
+
+@staff_member_required
+@query_budget(max_queries=6, max_time_ms=100)
+def profile_search_api(request):
+    """
+    Admin-only, read-only JSON search over profiles, taking the same filters
+    as export_filter_page plus ?fields=, ?page_size= and ?cursor=.
+    """
+    try:
+        fields = get_search_fields(request.GET.get('fields'))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    # Select only the requested columns and serialize the value tuples directly
+    queryset = filter_profiles(get_filter_params(request.GET))
+    page_size = get_page_size(request.GET.get('page_size'))
+    try:
+        rows, next_cursor = keyset_values_page(
+            queryset, [SEARCH_FIELDS[name] for name in fields], request.GET.get('cursor'), page_size,
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid page cursor.'}, status=400)
+
+    # Link to the next page keeps the current filters and fields
+    next_url = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_url = f"{request.path}?{query.urlencode()}"
+
+    with timed('serialize'):
+        return JsonResponse({
+            'fields': fields,
+            'results': search_results(rows, fields),
+            'next': next_url,
+        })
+
+
+@staff_member_required
+async def async_profile_search_api(request):
+    """
+    Async version of profile_search_api, for deployments served over ASGI.
+    """
+    try:
+        fields = get_search_fields(request.GET.get('fields'))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    # Building the queryset may touch the database (bitmap index rebuilds)
+    queryset = await sync_to_async(filter_profiles)(get_filter_params(request.GET))
+    page_size = get_page_size(request.GET.get('page_size'))
+    try:
+        rows, next_cursor = await akeyset_values_page(
+            queryset, [SEARCH_FIELDS[name] for name in fields], request.GET.get('cursor'), page_size,
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid page cursor.'}, status=400)
+
+    next_url = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_url = f"{request.path}?{query.urlencode()}"
+
+    with timed('serialize'):
+        return JsonResponse({
+            'fields': fields,
+            'results': search_results(rows, fields),
+            'next': next_url,
+        })
+
+
+@staff_member_required
+async def async_export_csv(request):
+    """
+    Admin-only CSV download of the filtered profiles, streamed from an async
+    ORM iterator. Under ASGI slow downloads do not hold a worker thread.
+    """
+    queryset = await sync_to_async(filter_profiles)(get_filter_params(request.GET))
+    profiles = queryset.aiterator(chunk_size=get_chunk_size())
+    return async_csv_response(aprofile_rows(profiles))
+
+
+@staff_member_required
+def export_cache_stats(request):
+    """
+    Admin-only JSON endpoint reporting export result cache hits and misses.
+    """
+    return JsonResponse(get_stats())
+
+
+@staff_member_required
+@require_POST
+def export_job_create(request):
+    """
+    Admin-only: queue a background export of the profiles matching the
+    posted filters and redirect to the job's progress page. With parts=xlsx
+    or parts=csv the job renders a zip of part files in parallel.
+    """
+    parts = request.POST.get('parts', '')
+    if parts and parts not in PART_WRITERS:
+        return HttpResponseBadRequest("Unsupported part format.")
+    job = ExportJob.objects.create(created_by=request.user, params=get_filter_params(request.POST), parts=parts)
+    return redirect('export_job_detail', pk=job.pk)
+
+
+@staff_member_required
+def export_job_detail(request, pk):
+    """
+    Admin-only page showing the progress of a background export job,
+    with a download link once it has finished.
+    """
+    job = get_object_or_404(ExportJob, pk=pk)
+    return render(request, 'profiles/export_job.html', {'job': job})
+
+
+@staff_member_required
+def export_job_status(request, pk):
+    """
+    Admin-only JSON endpoint polled by the export job page.
+    """
+    job = get_object_or_404(ExportJob, pk=pk)
+    return JsonResponse({
+        'id': job.pk,
+        'status': job.status,
+        'row_count': job.row_count,
+        'total_rows': job.total_rows,
+        'progress': job.progress,
+        'error': job.error,
+        'download_url': reverse('export_job_download', args=[job.pk]) if job.is_downloadable else None,
     })
 
 
+@staff_member_required
+def export_job_download(request, pk):
+    """
+    Admin-only download of a finished export job's file.
+    """
+    job = get_object_or_404(ExportJob, pk=pk)
+    if not job.is_downloadable:
+        raise Http404("Export file is not available.")
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.download_name)
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=profile_etag, last_modified_func=profile_last_modified)
+@query_budget(max_queries=20, max_time_ms=100)
 def profile_view(request):
     """
     View to display and edit the logged-in user's profile.
@@ -100,8 +271,16 @@ def profile_view(request):
     POST updates the profile with submitted data.
     """
 
+    # Serve a GET from the per-user page cache when possible
+    if request.method == 'GET':
+        cached_page = get_cached_page(request)
+        if cached_page is not None:
+            return HttpResponse(cached_page['content'])
+
     # Get or create the profile for the current user
     profile, created = UserProfile.objects.get_or_create(user=request.user)
+    # Share the already loaded user instead of fetching it again through the profile
+    profile.user = request.user
 
     # Example list of all skills (could be dynamic or from DB)
     all_skills = ['java', 'python', 'javascript']
@@ -130,15 +309,11 @@ def profile_view(request):
             # Assign skills list from submitted data
             profile.skills = skills
 
-            # Save profile to DB
-            profile.save()
-
-            # Also update the linked User fields from form data
-            user = request.user
-            user.name = form.cleaned_data.get('name')
-            user.email = form.cleaned_data.get('email')
-            user.mobile_no = form.cleaned_data.get('mobile_no')
-            user.save()
+            # form.save() already copied name/email/mobile onto the user;
+            # write only the columns that changed, both or neither
+            with transaction.atomic():
+                profile.save_dirty()
+                profile.user.save_dirty()
 
             # Redirect to profile page (GET) after successful update
             return redirect('profile')
@@ -154,7 +329,7 @@ def profile_view(request):
     skills = [skill.strip() for skill in profile.skills] if profile.skills else []
 
     # Render profile page template with form and context data
-    return render(request, 'profiles/profile.html', {
+    response = render(request, 'profiles/profile.html', {
         'form': form,
         'skills': skills,
         'all_skills': all_skills,
@@ -162,3 +337,94 @@ def profile_view(request):
         'profile': profile,
         'request': request
     })
+
+    # Cache the rendered page for the next GET; invalidated when the profile or user changes
+    if request.method == 'GET':
+        set_cached_page(request, profile, response.content)
+    return response
+
+
+def _upload_state(session):
+    # JSON describing an upload session to the client
+    return {
+        'id': str(session.id),
+        'field': session.field,
+        'size': session.size,
+        'offset': session.offset,
+        'status': session.status,
+        'chunk_size': uploads.get_chunk_size(),
+        'url': reverse('upload_session', args=[session.id]),
+        'finalize_url': reverse('upload_finalize', args=[session.id]),
+    }
+
+
+@login_required
+@require_POST
+def upload_create(request):
+    """
+    Start a chunked upload of the user's resume or photo.
+    Takes field, filename and size (in bytes) as form data.
+    """
+    try:
+        size = int(request.POST.get('size', ''))
+        session = uploads.create_session(
+            request.user, request.POST.get('field', ''), request.POST.get('filename', ''), size,
+        )
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(_upload_state(session), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'HEAD', 'PATCH'])
+def upload_session(request, pk):
+    """
+    GET/HEAD reports how many bytes of an upload have arrived, so an
+    interrupted client knows where to continue. PATCH appends the raw
+    request body at the offset given in the Upload-Offset header.
+    """
+    session = get_object_or_404(UploadSession, pk=pk, user=request.user, status=UploadSession.STATUS_OPEN)
+
+    if request.method == 'PATCH':
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            return JsonResponse({'error': 'Upload-Offset header is required.'}, status=400)
+        if length > uploads.get_chunk_size():
+            return JsonResponse({'error': 'Chunk is too large.'}, status=413)
+
+        try:
+            # The body is read straight from the request stream, never into memory as a whole
+            uploads.append_chunk(session, offset, request, length)
+        except uploads.OffsetMismatch as exc:
+            session.offset = exc.offset
+            response = JsonResponse(dict(_upload_state(session), error=str(exc)), status=409)
+            response['Upload-Offset'] = exc.offset
+            return response
+        except ValueError as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+
+    response = JsonResponse(_upload_state(session))
+    response['Upload-Offset'] = session.offset
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@login_required
+@require_POST
+def upload_finalize(request, pk):
+    """
+    Check a fully received upload against the sha256 form value and
+    attach it to the user's profile.
+    """
+    session = get_object_or_404(UploadSession, pk=pk, user=request.user, status=UploadSession.STATUS_OPEN)
+    try:
+        profile = uploads.finalize_upload(session, request.POST.get('sha256', ''))
+    except uploads.UploadInProgress as exc:
+        return JsonResponse(dict(_upload_state(session), error=str(exc)), status=409)
+    except ValueError as exc:
+        return JsonResponse(dict(_upload_state(session), error=str(exc)), status=400)
+
+    file = getattr(profile, session.field)
+    return JsonResponse(dict(_upload_state(session), name=file.name, file_url=file.url))
@@ -0,0 +1,119 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const inputs = document.querySelectorAll('input[type=file][data-upload-field]');
+    if (!inputs.length || !window.crypto || !crypto.subtle) {
+        return; // Fall back to the regular form upload
+    }
+
+    function csrfToken() {
+        const input = document.querySelector('input[name=csrfmiddlewaretoken]');
+        return input ? input.value : '';
+    }
+
+    function toJson(response) {
+        return response.json().then(data => {
+            data.httpStatus = response.status;
+            return data;
+        });
+    }
+
+    // SHA-256 of the whole file as hex, checked by the server on finalize
+    function sha256(file) {
+        return file.arrayBuffer()
+            .then(buffer => crypto.subtle.digest('SHA-256', buffer))
+            .then(digest => Array.from(new Uint8Array(digest))
+                .map(b => b.toString(16).padStart(2, '0')).join(''));
+    }
+
+    function createSession(url, field, file) {
+        const body = new FormData();
+        body.append('field', field);
+        body.append('filename', file.name);
+        body.append('size', file.size);
+        return fetch(url, { method: 'POST', body: body, headers: { 'X-CSRFToken': csrfToken() } })
+            .then(toJson);
+    }
+
+    // Send the file chunk by chunk; after a failure ask the server where to continue
+    function sendChunks(session, file, onProgress, retries) {
+        if (session.offset >= file.size) {
+            return Promise.resolve(session);
+        }
+        const chunk = file.slice(session.offset, session.offset + session.chunk_size);
+        return fetch(session.url, {
+            method: 'PATCH',
+            body: chunk,
+            headers: {
+                'X-CSRFToken': csrfToken(),
+                'Upload-Offset': session.offset,
+                'Content-Type': 'application/offset+octet-stream'
+            }
+        })
+            .then(toJson)
+            .then(state => {
+                if (state.httpStatus !== 200 && state.httpStatus !== 409) {
+                    throw new Error(state.error || 'Upload failed');
+                }
+                onProgress(state.offset / file.size);
+                return sendChunks(state, file, onProgress, 5);
+            })
+            .catch(error => {
+                if (retries <= 0) {
+                    throw error;
+                }
+                return new Promise(resolve => setTimeout(resolve, 2000)) // Wait two seconds before retrying
+                    .then(() => fetch(session.url).then(toJson))
+                    .then(state => sendChunks(state, file, onProgress, retries - 1),
+                          () => sendChunks(session, file, onProgress, retries - 1));
+            });
+    }
+
+    function finalize(session, digest) {
+        const body = new FormData();
+        body.append('sha256', digest);
+        return fetch(session.finalize_url, { method: 'POST', body: body, headers: { 'X-CSRFToken': csrfToken() } })
+            .then(toJson)
+            .then(state => {
+                if (state.httpStatus !== 200) {
+                    throw new Error(state.error || 'Upload failed');
+                }
+                return state;
+            });
+    }
+
+    inputs.forEach(input => {
+        const status = document.createElement('small');
+        status.className = 'upload-status';
+        input.insertAdjacentElement('afterend', status);
+
+        input.addEventListener('change', function() {
+            const file = input.files[0];
+            if (!file) {
+                return;
+            }
+            status.textContent = 'Uploading… 0%';
+            input.disabled = true;
+
+            Promise.all([createSession(input.dataset.uploadUrl, input.dataset.uploadField, file), sha256(file)])
+                .then(([session, digest]) => {
+                    if (session.httpStatus !== 201) {
+                        throw new Error(session.error || 'Upload failed');
+                    }
+                    const onProgress = fraction => {
+                        status.textContent = 'Uploading… ' + Math.round(fraction * 100) + '%';
+                    };
+                    return sendChunks(session, file, onProgress, 5).then(state => finalize(state, digest));
+                })
+                .then(() => {
+                    // The file is attached already; do not send it again with the form
+                    input.value = '';
+                    status.textContent = 'Uploaded ' + file.name;
+                })
+                .catch(error => {
+                    status.textContent = error.message;
+                })
+                .finally(() => {
+                    input.disabled = false;
+                });
+        });
+    });
+});
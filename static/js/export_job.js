@@ -0,0 +1,34 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const container = document.getElementById('exportJob');
+    if (!container) {
+        return;
+    }
+
+    const statusUrl = container.dataset.statusUrl;
+
+    // Fetch the job status and update the page until the job has finished
+    function poll() {
+        fetch(statusUrl, { headers: { 'Accept': 'application/json' } })
+            .then(response => response.json())
+            .then(job => {
+                document.getElementById('jobStatus').textContent = job.status;
+                document.getElementById('jobProgressBar').style.width = job.progress + '%';
+
+                let rows = job.row_count + ' rows written';
+                if (job.total_rows !== null) {
+                    rows = job.row_count + ' of ' + job.total_rows + ' rows written';
+                }
+                document.getElementById('jobRows').textContent = rows;
+                document.getElementById('jobError').textContent = job.error;
+
+                if (job.download_url) {
+                    document.getElementById('jobDownload').hidden = false;
+                }
+                if (job.status === 'pending' || job.status === 'running') {
+                    setTimeout(poll, 2000); // Check again in two seconds
+                }
+            });
+    }
+
+    poll();
+});